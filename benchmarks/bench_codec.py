@@ -0,0 +1,85 @@
+"""
+Benchmark of the wire codecs on pending-changes replies.
+
+Reports encode time, decode time, peak memory allocated while decoding and
+encoded size for every codec in syncr_frontend.codec.CODECS. Replies are
+decoded from CHUNK_SIZE chunks, like they arrive from the socket.
+
+Both codecs decode while the chunks arrive, so the peak is about the size
+of the decoded reply plus one chunk rather than twice the raw reply plus
+the decoded one. Streaming costs some decode time for msgpack, whose pure
+Python reader is called for every value instead of slicing one buffer.
+
+Usage: python benchmarks/bench_codec.py [number of files ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from payloads import make_pending_changes
+
+from syncr_frontend.codec import CODECS
+
+ROUNDS = 3
+CHUNK_SIZE = 64 * 1024
+ROW = '{:>8} {:>10} {:>12.1f} {:>12.1f} {:>14.0f} {:>10.0f}'
+
+
+def best_of(func, *args):
+    """
+    :return: fastest of ROUNDS runs in seconds
+    """
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def peak_memory(func, *args):
+    """
+    :return: peak bytes allocated by one run
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def chunked(data):
+    """
+    :return: list of CHUNK_SIZE memoryview chunks of data
+    """
+    view = memoryview(data)
+    return [
+        view[start:start + CHUNK_SIZE]
+        for start in range(0, len(data), CHUNK_SIZE)
+    ]
+
+
+def main(counts):
+    print('{:>8} {:>10} {:>12} {:>12} {:>14} {:>10}'.format(
+        'files', 'codec', 'encode ms', 'decode ms', 'decode peak KB',
+        'size KB',
+    ))
+    for files in counts:
+        reply = make_pending_changes(files)
+        for name, codec in CODECS.items():
+            encoded = codec.encode(reply)
+            chunks = chunked(encoded)
+            print(ROW.format(
+                files,
+                name,
+                best_of(codec.encode, reply) * 1000,
+                best_of(codec.decode_chunks, chunks) * 1000,
+                peak_memory(codec.decode_chunks, chunks) / 1024,
+                len(encoded) / 1024,
+            ))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,205 @@
+"""
+Load benchmark of the frontend routes against the stand-in backend.
+
+Starts benchmarks/fake_backend.py on a temporary unix socket, then drives
+frontend.app through the Flask test client, first one request at a time
+and then from concurrent threads. Reports latency percentiles and
+throughput per route, and send_request on its own. With --max-p99 it exits
+with status 1 when a route is slower, so it can guard against regressions.
+
+Usage: python benchmarks/bench_load.py [--files N] [--concurrency N] ...
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import fake_backend
+
+from syncr_frontend.constants import BACKEND_SOCKET_ENV
+
+# Routes measured by default, {drop} is replaced by an owned drop ID
+ROUTES = (
+    '/',
+    '/drop/{drop}',
+    '/drop/{drop}/files?offset=0&limit=200',
+    '/drop/{drop}/files?q=file 00&sort=percent&order=desc',
+    '/api/v1/drops',
+    '/api/v1/drops/{drop}',
+    '/view_owners/{drop}',
+)
+
+
+def percentile(sorted_values, fraction):
+    """
+    :param sorted_values: sorted list of numbers
+    :param fraction: percentile from 0 to 1
+    :return: nearest-rank percentile
+    """
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def measure(request, count, concurrency):
+    """
+    :param request: function making one request, returns its status code
+    :param count: number of requests per thread
+    :param concurrency: number of threads
+    :return: dictionary of latency percentiles in ms, throughput and errors
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        own = []
+        failed = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            status = request()
+            own.append(time.perf_counter() - start)
+            if status >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(own)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p90': percentile(latencies, 0.9) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'max': latencies[-1] * 1000,
+    }
+
+
+def route_request(app, url):
+    """
+    :return: function requesting url with a test client of its thread
+    """
+    local = threading.local()
+
+    def request():
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.get(url)
+        response.close()
+        return response.status_code
+
+    return request
+
+
+def send_request_request(send_request, drop_id):
+    """
+    :return: function sending GET_PENDING_CHANGES straight to the backend
+    """
+    def request():
+        response = send_request({
+            'action': 'FrontendAction.GET_PENDING_CHANGES',
+            'drop_id': drop_id,
+        })
+        return 500 if response.get('status') == 'error' else 200
+
+    return request
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    fake_backend.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per thread and route (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='threads of the concurrent run (default: 8)')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='disable the frontend caches')
+    parser.add_argument('--route', dest='routes', action='append',
+                        help='route to measure, may be repeated')
+    parser.add_argument('--max-p99', type=float, default=None,
+                        help='fail if a p99 latency exceeds this many ms')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'backend.sock')
+    os.environ[BACKEND_SOCKET_ENV] = path
+
+    from syncr_frontend import app
+    from syncr_frontend import frontend
+    from syncr_frontend.communication import send_request
+
+    if not args.cache:
+        app.config.update(DROP_LIST_CACHE_TTL=0, DROP_STATE_CACHE_TTL=0)
+        frontend.configure_caches()
+        frontend.file_index_cache.ttl = 0
+    app.config['COMPRESS'] = False
+
+    results = []
+    with fake_backend.from_arguments(path, args) as backend:
+        drop_id = backend.drop_ids[0]
+        requests = [
+            ('send_request', send_request_request(send_request, drop_id)),
+        ]
+        for route in args.routes or ROUTES:
+            url = route.format(drop=drop_id)
+            requests.append((url, route_request(app, url)))
+
+        for name, request in requests:
+            # Warm up connections, caches and templates
+            for _ in range(3):
+                request()
+            for concurrency in (1, args.concurrency):
+                result = measure(request, args.requests, concurrency)
+                result.update(route=name, concurrency=concurrency)
+                results.append(result)
+        backend_requests = backend.requests
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:<52} {:>4} {:>8} {:>8} {:>8} {:>8} {:>8} {:>6}'.format(
+            'route', 'thr', 'req/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms',
+            'errors',
+        ))
+        for result in results:
+            print(
+                '{route:<52.52} {concurrency:>4} {rps:>8.0f} {p50:>8.2f} '
+                '{p90:>8.2f} {p99:>8.2f} {max:>8.2f} {errors:>6}'.format(
+                    **result
+                ),
+            )
+        print('backend requests: {}'.format(backend_requests))
+
+    if args.max_p99 is not None:
+        slow = [r for r in results if r['p99'] > args.max_p99]
+        for result in slow:
+            print('p99 of {route} with {concurrency} threads is '
+                  '{p99:.2f} ms'.format(**result), file=sys.stderr)
+        if slow:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
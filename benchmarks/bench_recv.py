@@ -0,0 +1,98 @@
+"""
+Micro-benchmark of the backend response receive path.
+
+Compares the original ``response += data`` loop followed by bencode.decode
+with the current path, which decodes chunks from communication._recv_chunks
+while they arrive. Replies are pending-changes style dictionaries sent over
+a local socket pair. Reports throughput and peak memory.
+
+Usage: python benchmarks/bench_recv.py [number of files ...]
+"""
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+
+import bencode
+from payloads import make_pending_changes
+
+from syncr_frontend.bencode_stream import decode_chunks
+from syncr_frontend.communication import _recv_chunks
+from syncr_frontend.constants import BUFFER_SIZE
+
+ROUNDS = 3
+
+
+def legacy_recv(s):
+    """
+    Receive loop and decode used before the streaming decoder
+    """
+    response = b''
+    while True:
+        data = s.recv(BUFFER_SIZE)
+        if not data:
+            break
+        else:
+            response += data
+
+    return bencode.decode(response)
+
+
+def stream_recv(s):
+    """
+    Current receive path
+    """
+    return decode_chunks(_recv_chunks(s))
+
+
+def run(recv, payload, trace=False):
+    """
+    :return: tuple of (seconds, peak bytes allocated or None)
+    """
+    reader, writer = socket.socketpair()
+
+    def send():
+        writer.sendall(payload)
+        writer.close()
+
+    sender = threading.Thread(target=send)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    sender.start()
+    recv(reader)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    sender.join()
+    reader.close()
+
+    return elapsed, peak
+
+
+def main(counts):
+    print('{:>8} {:>8} {:>12} {:>12} {:>12} {:>12}'.format(
+        'files', 'MB', 'legacy MB/s', 'stream MB/s',
+        'legacy peak', 'stream peak',
+    ))
+    for files in counts:
+        payload = bencode.encode(make_pending_changes(files))
+        size = len(payload) / (1024 * 1024)
+        results = []
+        for recv in (legacy_recv, stream_recv):
+            elapsed = min(run(recv, payload)[0] for _ in range(ROUNDS))
+            peak = run(recv, payload, trace=True)[1]
+            results.append((size / elapsed, peak / (1024 * 1024)))
+        row = '{:>8} {:>8.1f} {:>12.1f} {:>12.1f} {:>11.1f}M {:>11.1f}M'
+        print(row.format(
+            files, size,
+            results[0][0], results[1][0],
+            results[0][1], results[1][1],
+        ))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000])
@@ -0,0 +1,279 @@
+"""
+Stand-in backend for benchmarks.
+
+Serves generated drops on a unix socket. It speaks the one-shot bencode
+protocol of communication.py and, unless framing is disabled, the framed
+protocol with the bencode codec and batches of actions. Point the frontend
+at it with the SYNCR_BACKEND_SOCKET environment variable.
+
+Usage: python benchmarks/fake_backend.py SOCKET [--drops N] [--files N] ...
+"""
+import argparse
+import os
+import socket
+import struct
+import threading
+import time
+
+import bencode
+from payloads import make_drop
+
+from syncr_frontend.constants import BATCH_ACTION
+from syncr_frontend.constants import BATCH_VERSION
+from syncr_frontend.constants import FRAME_MAGIC
+from syncr_frontend.constants import FRAMING_HELLO_ACTION
+from syncr_frontend.constants import FRAMING_VERSION
+
+FRAME_HEADER = struct.Struct('!I')
+
+# Actions answered with a generic success message
+MUTATING_ACTIONS = frozenset([
+    'INITIALIZE_DROP',
+    'INPUT_DROP_TO_SUBSCRIBE_TO',
+    'ADD_OWNER',
+    'REMOVE_OWNER',
+    'DELETE_DROP',
+    'UNSUBSCRIBE',
+    'NEW_VERSION',
+    'SYNC_UPDATE',
+])
+
+
+class FakeBackend:
+    """
+    Unix socket server answering frontend actions with generated drops.
+    Replies are encoded once, so the server costs little next to the
+    frontend being measured.
+    """
+
+    def __init__(
+        self,
+        path,
+        drops=4,
+        files=1000,
+        owners=3,
+        changes=0.1,
+        remote_changes=0.0,
+        delay=0.0,
+        framing=True,
+        batching=True,
+    ):
+        """
+        :param path: path of the unix socket to listen on
+        :param drops: number of owned drops, as many are subscribed
+        :param files: number of files per drop
+        :param owners: number of owners per drop
+        :param changes: fraction of the files changed locally
+        :param remote_changes: fraction of the files changed remotely
+        :param delay: seconds the backend takes for every request
+        :param framing: accept the framed protocol
+        :param batching: accept batches, only offered with framing
+        """
+        self.path = path
+        self.delay = delay
+        self.framing = framing
+        self.batching = batching
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._socket = None
+
+        owned = ['owned-{}'.format(i) for i in range(drops)]
+        subscribed = ['subscribed-{}'.format(i) for i in range(drops)]
+        self.drop_ids = owned + subscribed
+        self._drops = {
+            drop_id: bencode.encode({'requested_drops': make_drop(
+                drop_id, files, owners, changes, remote_changes,
+            )})
+            for drop_id in self.drop_ids
+        }
+        self._drop_list = bencode.encode({'requested_drops_tuple': [
+            [{'drop_id': drop_id, 'name': drop_id} for drop_id in owned],
+            [{'drop_id': drop_id, 'name': drop_id} for drop_id in subscribed],
+        ]})
+
+    def reply(self, request):
+        """
+        :param request: decoded request
+        :return: encoded reply
+        """
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        action = str(request.get('action', '')).rpartition('.')[2]
+        if action == FRAMING_HELLO_ACTION:
+            if not self.framing:
+                return bencode.encode({'status': 'error'})
+            hello = {'framing': FRAMING_VERSION, 'codec': 'bencode'}
+            if self.batching:
+                hello['batch'] = BATCH_VERSION
+            return bencode.encode(hello)
+        if action == BATCH_ACTION and self.batching:
+            return bencode.encode({'results': [
+                bencode.decode(self.reply(item))
+                for item in request.get('requests', [])
+            ]})
+        if action == 'GET_OWNED_SUBSCRIBED_DROPS':
+            return self._drop_list
+        if action in ('GET_SELECTED_DROP', 'GET_PENDING_CHANGES'):
+            drop = self._drops.get(request.get('drop_id'))
+            if drop is None:
+                return bencode.encode({'message': 'Unknown drop'})
+            return drop
+        if action == 'GET_PUBLIC_KEY':
+            return bencode.encode({'message': 'benchmark node'})
+        if action in MUTATING_ACTIONS:
+            return bencode.encode({
+                'success': True,
+                'message': 'Done',
+                'drop_id': request.get('drop_id', 'new-drop'),
+            })
+
+        return bencode.encode({'status': 'error', 'message': 'Unknown'})
+
+    def start(self):
+        """
+        Listens on the socket and serves every connection on a thread
+        """
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.path)
+        self._socket.listen(128)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        """
+        Stops listening and removes the socket
+        """
+        self._socket.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _accept(self):
+        while True:
+            try:
+                s, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve, args=(s,), daemon=True,
+            ).start()
+
+    def _serve(self, s):
+        try:
+            first = _recv_exact(s, len(FRAME_MAGIC), allow_eof=True)
+            if first == FRAME_MAGIC and self.framing:
+                self._serve_framed(s)
+            else:
+                self._serve_one_shot(s, first)
+        except (OSError, bencode.BencodeDecodeError):
+            pass
+        finally:
+            s.close()
+
+    def _serve_one_shot(self, s, data):
+        chunks = [data]
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        s.sendall(self.reply(bencode.decode(b''.join(chunks))))
+
+    def _serve_framed(self, s):
+        while True:
+            header = _recv_exact(s, FRAME_HEADER.size, allow_eof=True)
+            if not header:
+                return
+            (length,) = FRAME_HEADER.unpack(header)
+            reply = self.reply(bencode.decode(_recv_exact(s, length)))
+            s.sendall(FRAME_HEADER.pack(len(reply)) + reply)
+
+
+def _recv_exact(s, size, allow_eof=False):
+    """
+    :return: size bytes, or fewer if allow_eof and the peer closed
+    """
+    data = b''
+    while len(data) < size:
+        chunk = s.recv(size - len(data))
+        if not chunk:
+            if allow_eof:
+                return data
+            raise ConnectionError('Connection closed')
+        data += chunk
+
+    return data
+
+
+def add_arguments(parser):
+    """
+    :param parser: argparse parser to add the drop size options to
+    """
+    parser.add_argument('--drops', type=int, default=4,
+                        help='owned and subscribed drops (default: 4)')
+    parser.add_argument('--files', type=int, default=1000,
+                        help='files per drop (default: 1000)')
+    parser.add_argument('--owners', type=int, default=3,
+                        help='owners per drop (default: 3)')
+    parser.add_argument('--changes', type=float, default=0.1,
+                        help='fraction of files changed locally '
+                        '(default: 0.1)')
+    parser.add_argument('--remote-changes', type=float, default=0.0,
+                        help='fraction of files changed remotely '
+                        '(default: 0)')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='seconds the backend takes per request '
+                        '(default: 0)')
+    parser.add_argument('--no-framing', dest='framing', action='store_false',
+                        help='only speak the one-shot protocol')
+    parser.add_argument('--no-batching', dest='batching',
+                        action='store_false',
+                        help='reject batches of actions')
+
+
+def from_arguments(path, args):
+    """
+    :param path: path of the unix socket
+    :param args: options parsed with add_arguments
+    :return: FakeBackend
+    """
+    return FakeBackend(
+        path,
+        drops=args.drops,
+        files=args.files,
+        owners=args.owners,
+        changes=args.changes,
+        remote_changes=args.remote_changes,
+        delay=args.delay,
+        framing=args.framing,
+        batching=args.batching,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('socket', help='path of the unix socket')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with from_arguments(args.socket, args):
+        print('Serving on {}, press Ctrl-C to stop'.format(args.socket))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
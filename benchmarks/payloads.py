@@ -0,0 +1,72 @@
+"""Realistic backend replies shared by the benchmarks"""
+
+
+def make_file_names(files):
+    """
+    :param files: number of files
+    :return: list of file names in nested directories
+    """
+    return ['directory/sub directory/file {:07d}.dat'.format(i)
+            for i in range(files)]
+
+
+def make_drop(drop_id, files, owners=1, changes=0.1, remote_changes=0.0):
+    """
+    :param drop_id: ID of the drop
+    :param files: number of files in the drop
+    :param owners: number of owners, including the primary owner
+    :param changes: fraction of the files changed locally
+    :param remote_changes: fraction of the files changed remotely
+    :return: requested drop dictionary of GET_PENDING_CHANGES
+    """
+    names = make_file_names(files)
+    changed = int(files * changes)
+    remote_changed = int(files * remote_changes)
+
+    return {
+        'drop': {
+            'drop_id': drop_id,
+            'name': drop_id,
+            'files': {name: 100 for name in names},
+            'primary_owner': 'owner 0',
+            'other_owners': [
+                'owner {}'.format(i) for i in range(1, max(owners, 1))
+            ],
+        },
+        'pending_changes': {
+            'added': [],
+            'changed': names[:changed],
+            'removed': [],
+            'unchanged': names[changed:],
+        },
+        'remote_pending_changes': {
+            'added': [],
+            'changed': names[:remote_changed],
+            'removed': [],
+            'unchanged': names[remote_changed:],
+        },
+    }
+
+
+def make_pending_changes(files):
+    """
+    :param files: number of files in the drop
+    :return: GET_PENDING_CHANGES style reply
+    """
+    names = make_file_names(files)
+
+    return {
+        'requested_drops': {
+            'drop': {
+                'drop_id': 'benchmark',
+                'name': 'benchmark',
+                'files': {name: 100 for name in names},
+            },
+            'pending_changes': {
+                'added': [],
+                'changed': names[:files // 10],
+                'removed': [],
+                'unchanged': names[files // 10:],
+            },
+        },
+    }
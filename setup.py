@@ -20,4 +20,13 @@ setup(
     install_requires=[
         'flask',
     ],
+    extras_require={
+        'server': ['gunicorn'],
+        'brotli': ['brotli'],
+    },
+    entry_points={
+        'console_scripts': [
+            'syncr-frontend = syncr_frontend.server:main',
+        ],
+    },
 )
@@ -1 +1,4 @@
+from .api import api
 from .frontend import app  # noqa
+
+app.register_blueprint(api)
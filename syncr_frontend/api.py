@@ -0,0 +1,452 @@
+"""
+Versioned JSON API over the drop operations of the frontend.
+
+Read endpoints send an ETag made of the stamps of the backend replies they
+describe. A request whose If-None-Match still matches the stamps kept for
+DROP_STAMP_TTL seconds gets a 304 without a backend round trip.
+"""
+import hashlib
+
+from flask import Blueprint
+from flask import jsonify
+from flask import request
+from flask import Response
+from flask import url_for
+from syncr_backend.constants import FrontendAction
+
+from . import frontend
+from .responses import etag_matches
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def make_etag(*stamps):
+    """
+    :param stamps: stamps of the backend replies a resource is built from
+    :return: ETag of the resource, or None if a stamp is unknown
+    """
+    if None in stamps:
+        return None
+
+    return hashlib.blake2b(
+        ':'.join(stamps).encode(), digest_size=16,
+    ).hexdigest()
+
+
+def not_modified(etag):
+    """
+    :param etag: current ETag of the requested resource, or None if it is \
+            not known without asking the backend
+    :return: 304 response if the client already has that version, else None
+    """
+    if etag is not None and etag_matches(etag, request.if_none_match):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    return None
+
+
+def tagged(response, etag):
+    """
+    :param response: response of a read endpoint
+    :param etag: ETag of its content
+    :return: the response carrying the ETag
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def error(message, status):
+    """
+    :param message: description of the error
+    :param status: HTTP status code
+    :return: JSON error response
+    """
+    return jsonify(success=False, message=message), status
+
+
+def perform(message, drop_id=None, drop_list=False, fields=()):
+    """
+    Sends an action to the backend and drops the cached state it changes
+
+    :param message: message sent to backend
+    :param drop_id: ID of a drop the action changes, if any
+    :param drop_list: True if the action changes the drop lists
+    :param fields: names of backend response fields included in a \
+            successful response
+    :return: JSON response with the success and message of the backend. \
+            Backend communication errors are 502, rejected actions 400.
+    """
+    response = frontend.send_message(message)
+    if drop_list:
+        frontend.invalidate_drop_list()
+    if drop_id is not None:
+        frontend.invalidate_drop(drop_id)
+
+    if response.get('status') == 'error':
+        return error(response.get('message'), 502)
+    if response.get('success') is False:
+        return error(response.get('message'), 400)
+
+    result = {name: response.get(name) for name in fields}
+
+    return jsonify(success=True, message=response.get('message'), **result)
+
+
+def get_drop_state(drop_id):
+    """
+    :param drop_id: ID of the drop
+    :return: tuple of the drop lists and the pending changes reply of the \
+            drop, each a tuple of the reply and its stamp, both None if the \
+            backend did not provide it
+    """
+    results, timings = frontend.fetch_concurrently({
+        'drops': (frontend.get_stamped_drop_lists,),
+        'selected': (
+            frontend.get_stamped_drop_state,
+            drop_id,
+            FrontendAction.GET_PENDING_CHANGES,
+        ),
+    })
+
+    return (
+        results['drops'] or (None, None),
+        results['selected'] or (None, None),
+    )
+
+
+@api.route('/drops')
+def list_drops():
+    """
+    :return: owned and subscribed drops of this node
+    """
+    response = not_modified(make_etag(frontend.get_drop_list_stamp()))
+    if response is not None:
+        return response
+
+    drops, stamp = frontend.get_stamped_drop_lists()
+    if drops is None:
+        return error('Backend unavailable', 502)
+
+    etag = make_etag(stamp)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    return tagged(jsonify(owned=drops[0], subscribed=drops[1]), etag)
+
+
+@api.route('/drops', methods=['POST'])
+def create_drop():
+    """
+    Creates a drop from the directory in the JSON body
+
+    :return: success, message and the ID of the new drop
+    """
+    directory = (request.get_json(silent=True) or {}).get('directory')
+    if not directory:
+        return error('A directory is required', 400)
+
+    return perform(
+        {
+            'action': FrontendAction.INITIALIZE_DROP,
+            'directory': directory,
+        },
+        drop_list=True,
+        fields=('drop_id',),
+    )
+
+
+@api.route('/drops/<drop_id>')
+def get_drop(drop_id):
+    """
+    :param drop_id: ID of the drop
+    :return: drop, the permission of this node, the available actions and \
+            the file summary
+    """
+    response = not_modified(make_etag(
+        frontend.get_drop_list_stamp(),
+        frontend.get_drop_stamp(drop_id, FrontendAction.GET_PENDING_CHANGES),
+    ))
+    if response is not None:
+        return response
+
+    (drops, drops_stamp), (selected_drop_info, stamp) = get_drop_state(
+        drop_id,
+    )
+    if drops is None:
+        return error('Backend unavailable', 502)
+    if not selected_drop_info or selected_drop_info.get('drop') is None:
+        return error('Drop not found', 404)
+
+    etag = make_etag(drops_stamp, stamp)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    file_index = frontend.get_file_index(drop_id, selected_drop_info, stamp)
+    if frontend.is_in_drop_list(drop_id, drops[0]):
+        permission = 'owned'
+    else:
+        permission = 'subscribed'
+
+    drop = dict(selected_drop_info['drop'])
+    drop.pop('files', None)
+
+    return tagged(jsonify(
+        drop=drop,
+        permission=permission,
+        new_version=(
+            permission == 'owned' and file_index.has_changes('local')
+        ),
+        new_updates=file_index.has_changes('remote'),
+        summary=file_index.summary(),
+        version=etag,
+    ), etag)
+
+
+@api.route('/drops/<drop_id>', methods=['DELETE'])
+def delete_drop(drop_id):
+    """
+    :param drop_id: ID of the drop to delete
+    """
+    return perform(
+        {
+            'action': FrontendAction.DELETE_DROP,
+            'drop_id': drop_id,
+        },
+        drop_id=drop_id,
+        drop_list=True,
+    )
+
+
+@api.route('/drops/<drop_id>/files')
+def list_files(drop_id):
+    """
+    Takes the offset, limit and query arguments of the drop file table
+
+    :param drop_id: ID of the drop
+    :return: total row count of the query, offset and rows of the page
+    """
+    response = not_modified(make_etag(
+        frontend.get_drop_stamp(drop_id, FrontendAction.GET_PENDING_CHANGES),
+    ))
+    if response is not None:
+        return response
+
+    selected_drop_info, stamp = frontend.get_stamped_drop_state(
+        drop_id, FrontendAction.GET_PENDING_CHANGES,
+    )
+    if not selected_drop_info:
+        return error('Drop not found', 404)
+
+    etag = make_etag(stamp)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    file_index = frontend.get_file_index(drop_id, selected_drop_info, stamp)
+    try:
+        page = frontend.query_file_table(file_index, request.args)
+    except (KeyError, ValueError):
+        return error('Invalid file query', 400)
+
+    return tagged(jsonify(page), etag)
+
+
+@api.route('/drops/<drop_id>/owners')
+def list_owners(drop_id):
+    """
+    :param drop_id: ID of the drop
+    :return: primary owner and other owners of the drop
+    """
+    response = not_modified(make_etag(
+        frontend.get_drop_stamp(drop_id, FrontendAction.GET_SELECTED_DROP),
+    ))
+    if response is not None:
+        return response
+
+    drop, stamp = frontend.get_stamped_drop_state(
+        drop_id, FrontendAction.GET_SELECTED_DROP,
+    )
+    if not drop or drop.get('drop') is None:
+        return error('Drop not found', 404)
+
+    etag = make_etag(stamp)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    return tagged(jsonify(
+        primary_owner=drop['drop'].get('primary_owner'),
+        other_owners=drop['drop'].get('other_owners', []),
+    ), etag)
+
+
+@api.route('/drops/<drop_id>/owners', methods=['POST'])
+def add_owner(drop_id):
+    """
+    Adds the owner_id of the JSON body as an owner of the drop
+
+    :param drop_id: ID of the drop
+    """
+    owner_id = (request.get_json(silent=True) or {}).get('owner_id')
+    if not owner_id:
+        return error('An owner_id is required', 400)
+
+    return perform(
+        {
+            'action': FrontendAction.ADD_OWNER,
+            'drop_id': drop_id,
+            'owner_id': owner_id,
+        },
+        drop_id=drop_id,
+    )
+
+
+@api.route('/drops/<drop_id>/owners/<owner_id>', methods=['DELETE'])
+def remove_owner(drop_id, owner_id):
+    """
+    :param drop_id: ID of the drop
+    :param owner_id: ID of the owner to remove
+    """
+    return perform(
+        {
+            'action': FrontendAction.REMOVE_OWNER,
+            'drop_id': drop_id,
+            'owner_id': owner_id,
+        },
+        drop_id=drop_id,
+    )
+
+
+def submit(action, drop_id):
+    """
+    Runs an action as a background job
+
+    :param action: name of the action in frontend.JOB_ACTIONS
+    :param drop_id: ID of the drop
+    :return: 202 response with the state of the job and its URL in the \
+            Location header, 200 if the job returned already finished, or \
+            503 if too many jobs are waiting
+    """
+    job, message = frontend.submit_job(action, drop_id)
+    if job is None:
+        return error(message, 503)
+
+    response = jsonify(job)
+    response.status_code = 200 if job['finished'] is not None else 202
+    response.headers['Location'] = url_for('api.get_job', job_id=job['id'])
+
+    return response
+
+
+@api.route('/drops/<drop_id>/new_version', methods=['POST'])
+def new_version(drop_id):
+    """
+    Creates a new version of the drop from its local changes in the
+    background
+
+    :param drop_id: ID of the drop
+    """
+    return submit('new_version', drop_id)
+
+
+@api.route('/drops/<drop_id>/sync_update', methods=['POST'])
+def sync_update(drop_id):
+    """
+    Downloads the remote updates of the drop in the background
+
+    :param drop_id: ID of the drop
+    """
+    return submit('sync_update', drop_id)
+
+
+@api.route('/jobs/<job_id>')
+def get_job(job_id):
+    """
+    Takes a wait argument of seconds to wait for the job to change from
+    the version argument, so clients can long-poll instead of polling
+
+    :param job_id: ID of a background job
+    :return: state of the job
+    """
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 60)
+    version = request.args.get('version', type=int)
+    if wait and version is not None:
+        status = frontend.job_queue.wait(job_id, version, wait)
+    else:
+        status = frontend.job_queue.status(job_id)
+    if status is None:
+        return error('Job not found', 404)
+
+    return jsonify(status)
+
+
+@api.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancels a background job. A running job is only marked as cancelled,
+    the backend may still finish it.
+
+    :param job_id: ID of a background job
+    :return: state of the job
+    """
+    status = frontend.job_queue.cancel(job_id)
+    if status is None:
+        return error('Job not found', 404)
+
+    return jsonify(status)
+
+
+@api.route('/subscriptions', methods=['POST'])
+def subscribe():
+    """
+    Subscribes to the drop_id of the JSON body, saving it in its directory
+    """
+    body = request.get_json(silent=True) or {}
+    drop_id = body.get('drop_id')
+    directory = body.get('directory')
+    if not drop_id or not directory:
+        return error('A drop_id and a directory are required', 400)
+
+    return perform(
+        {
+            'action': FrontendAction.INPUT_DROP_TO_SUBSCRIBE_TO,
+            'drop_id': drop_id,
+            'directory': directory,
+        },
+        drop_id=drop_id,
+        drop_list=True,
+    )
+
+
+@api.route('/subscriptions/<drop_id>', methods=['DELETE'])
+def unsubscribe(drop_id):
+    """
+    :param drop_id: ID of the drop to unsubscribe from
+    """
+    return perform(
+        {
+            'action': FrontendAction.UNSUBSCRIBE,
+            'drop_id': drop_id,
+        },
+        drop_id=drop_id,
+        drop_list=True,
+    )
+
+
+@api.route('/node_id')
+def node_id():
+    """
+    :return: public key of this node
+    """
+    response = frontend.send_message({
+        'action': FrontendAction.GET_PUBLIC_KEY,
+    })
+    if response.get('status') == 'error':
+        return error(response.get('message'), 502)
+
+    return jsonify(node_id=response.get('message'))
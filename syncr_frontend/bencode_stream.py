@@ -0,0 +1,167 @@
+"""Incremental bencode decoding of backend responses"""
+from bencode import BencodeDecodeError
+
+# Consumed bytes are discarded once this many have accumulated
+COMPACT_THRESHOLD = 64 * 1024
+
+_DIGITS = frozenset(b'0123456789')
+
+
+class StreamDecoder:
+    """
+    Pull parser for bencoded data arriving in chunks, e.g. from a socket.
+
+    Bytes are dropped from the internal buffer as soon as they are parsed, so
+    the raw response and the decoded values are never both held at full
+    size. Strings are decoded from utf-8 when possible, like bencode.decode.
+    """
+
+    def __init__(self, chunks):
+        """
+        :param chunks: iterable of bytes-like chunks of bencoded data
+        """
+        self._chunks = iter(chunks)
+        self._buf = bytearray()
+        self._pos = 0
+
+    def value(self):
+        """
+        :return: the next complete value
+        """
+        kind = self._peek()
+        if kind == ord('d'):
+            return {key: self.value() for key in self._iter_dict()}
+        if kind == ord('l'):
+            return list(self._iter_list())
+        if kind == ord('i'):
+            return self._int()
+        if kind in _DIGITS:
+            return self._string()
+
+        raise BencodeDecodeError('not a valid bencoded string')
+
+    def finish(self):
+        """
+        Checks that nothing follows the decoded value
+
+        :raises BencodeDecodeError: if data is left over
+        """
+        if self._available() or self._fill():
+            raise BencodeDecodeError(
+                'invalid bencoded value (data after valid prefix)',
+            )
+
+    def _iter_dict(self):
+        """
+        Reads a dictionary key by key. The value of each key must be read
+        before the next key is requested.
+
+        :return: generator of keys
+        """
+        self._expect(b'd')
+        while self._peek() != ord('e'):
+            key = self._string(force_utf8=True)
+            yield key
+        self._pos += 1
+
+    def _iter_list(self):
+        """
+        :return: generator of the values of a list
+        """
+        self._expect(b'l')
+        while self._peek() != ord('e'):
+            yield self.value()
+        self._pos += 1
+
+    def _available(self):
+        return len(self._buf) - self._pos
+
+    def _fill(self):
+        """
+        Appends the next chunk to the buffer
+
+        :return: False once the chunks are exhausted
+        """
+        if self._pos > COMPACT_THRESHOLD:
+            del self._buf[:self._pos]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            if chunk:
+                self._buf.extend(chunk)
+                return True
+
+        return False
+
+    def _need(self, size):
+        while self._available() < size:
+            if not self._fill():
+                raise BencodeDecodeError('not a valid bencoded string')
+
+    def _peek(self):
+        self._need(1)
+        return self._buf[self._pos]
+
+    def _expect(self, token):
+        if self._peek() != token[0]:
+            raise BencodeDecodeError('not a valid bencoded string')
+        self._pos += 1
+
+    def _read_until(self, token):
+        """
+        :return: bytes up to token, consuming the token
+        """
+        # Offset from _pos already searched, the buffer may be compacted
+        searched = 0
+        while True:
+            end = self._buf.find(token, self._pos + searched)
+            if end >= 0:
+                data = bytes(self._buf[self._pos:end])
+                self._pos = end + 1
+                return data
+            searched = self._available()
+            if not self._fill():
+                raise BencodeDecodeError('not a valid bencoded string')
+
+    def _int(self):
+        self._pos += 1
+        digits = self._read_until(b'e')
+        try:
+            number = int(digits)
+        except ValueError:
+            raise BencodeDecodeError('not a valid bencoded string')
+        if digits.startswith((b'-0', b'0')) and digits != b'0':
+            raise BencodeDecodeError('not a valid bencoded string')
+
+        return number
+
+    def _string(self, force_utf8=False):
+        length = self._read_until(b':')
+        if not length.isdigit() or (length[:1] == b'0' and length != b'0'):
+            raise BencodeDecodeError('not a valid bencoded string')
+
+        size = int(length)
+        self._need(size)
+        data = self._buf[self._pos:self._pos + size]
+        self._pos += size
+
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            if force_utf8:
+                raise BencodeDecodeError('not a valid bencoded string')
+            return bytes(data)
+
+
+def decode_chunks(chunks):
+    """
+    Decodes a single bencoded value from an iterable of chunks
+
+    :param chunks: iterable of bytes-like chunks
+    :return: decoded value
+    """
+    decoder = StreamDecoder(chunks)
+    value = decoder.value()
+    decoder.finish()
+
+    return value
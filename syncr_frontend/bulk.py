@@ -0,0 +1,171 @@
+"""Bulk actions over many drops, run in the background with progress"""
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# States of the drops of a bulk run
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+FINISHED_STATES = frozenset([DONE, FAILED, SKIPPED])
+
+
+class BulkRun:
+    """
+    One action performed for each of a list of drops, with the state of
+    every drop
+    """
+
+    def __init__(self, action, drop_ids):
+        """
+        :param action: name of the action
+        :param drop_ids: IDs of the drops to act on
+        """
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.started = time.time()
+        self.finished = None
+        self.drop_ids = list(dict.fromkeys(drop_ids))
+        self._items = {
+            drop_id: {'drop_id': drop_id, 'state': PENDING, 'message': None}
+            for drop_id in self.drop_ids
+        }
+        self._remaining = len(self.drop_ids)
+        self._lock = threading.Lock()
+        if not self._remaining:
+            self.finished = self.started
+
+    def update(self, drop_id, state, message=None):
+        """
+        :param drop_id: ID of a drop of the run
+        :param state: new state of the drop
+        :param message: message of the backend or reason for the state
+        """
+        with self._lock:
+            item = self._items[drop_id]
+            item['state'] = state
+            item['message'] = message
+            if state in FINISHED_STATES:
+                self._remaining -= 1
+                if not self._remaining:
+                    self.finished = time.time()
+
+    def progress(self):
+        """
+        :return: dictionary of the run, the number of finished drops and \
+                the state of every drop in order
+        """
+        with self._lock:
+            items = [dict(self._items[drop_id]) for drop_id in self.drop_ids]
+            return {
+                'id': self.id,
+                'action': self.action,
+                'started': self.started,
+                'total': len(items),
+                'finished': len(items) - self._remaining,
+                'failed': sum(item['state'] == FAILED for item in items),
+                'done': self.finished is not None,
+                'elapsed': (self.finished or time.time()) - self.started,
+                'items': items,
+            }
+
+
+class BulkRunner:
+    """
+    Runs bulk actions on a bounded thread pool. The progress of every run
+    is written to a store, so any worker process sharing the store can
+    report it while the process that started the run performs it.
+    """
+
+    def __init__(self, max_workers, store):
+        """
+        :param max_workers: drops acted on at the same time over all runs \
+                of this process
+        :param store: cache with the interface of TTLCache keeping the \
+                progress of the runs, finished runs stay available for its \
+                ttl
+        """
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='bulk',
+        )
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def start(self, action, drop_ids, perform):
+        """
+        Starts acting on the drops and returns at once
+
+        :param action: name of the action
+        :param drop_ids: IDs of the drops to act on
+        :param perform: function of a drop ID returning a tuple of the \
+                final state and a message
+        :return: the BulkRun
+        """
+        run = BulkRun(action, drop_ids)
+
+        with self._lock:
+            self._runs[run.id] = run
+            self._save(run)
+
+        for drop_id in run.drop_ids:
+            self._executor.submit(self._perform, run, drop_id, perform)
+
+        return run
+
+    def progress(self, run_id):
+        """
+        :param run_id: ID of a run started by any process sharing the store
+        :return: progress of the run like BulkRun.progress, or None if it \
+                is unknown or was forgotten
+        """
+        data = self.store.get(run_id)
+        if data is None:
+            return None
+
+        progress = json.loads(data)
+        if not progress['done']:
+            progress['elapsed'] = time.time() - progress['started']
+
+        return progress
+
+    def stats(self):
+        """
+        :return: dictionary of the number of runs of this process still \
+                running and of the runs kept in the store
+        """
+        with self._lock:
+            running = len(self._runs)
+
+        return {
+            'running': running,
+            'runs': self.store.stats()['size'],
+        }
+
+    def _save(self, run):
+        # Under the lock, so the last write has the latest progress
+        self.store.set(run.id, json.dumps(run.progress()))
+        if run.finished is not None:
+            self._runs.pop(run.id, None)
+
+    def _perform(self, run, drop_id, perform):
+        self._update(run, drop_id, RUNNING)
+        try:
+            state, message = perform(drop_id)
+        except Exception as e:
+            logger.exception('Bulk %s of drop %s failed', run.action, drop_id)
+            state, message = FAILED, str(e)
+        self._update(run, drop_id, state, message)
+
+    def _update(self, run, drop_id, state, message=None):
+        with self._lock:
+            run.update(drop_id, state, message)
+            self._save(run)
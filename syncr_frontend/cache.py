@@ -0,0 +1,93 @@
+"""In-process caches for backend responses"""
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Thread safe cache whose entries expire after a fixed time to live.
+    Keeps hit and miss counters so its effectiveness can be reported.
+    """
+
+    def __init__(self, ttl):
+        """
+        :param ttl: seconds an entry stays valid, 0 disables the cache
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        :param key: key of the entry
+        :param default: returned when the entry is missing or expired
+        :return: cached value or default
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+
+        return default
+
+    def set(self, key, value):
+        """
+        :param key: key of the entry
+        :param value: value to cache for ttl seconds
+        """
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def add(self, key, value):
+        """
+        Stores an entry only if the key has no valid entry yet
+
+        :param key: key of the entry
+        :param value: value to cache for ttl seconds
+        :return: False if the key already had a valid entry
+        """
+        if self.ttl <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._entries[key] = (now + self.ttl, value)
+
+        return True
+
+    def invalidate(self, key=None):
+        """
+        :param key: key of the entry to drop, or None to drop every entry
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        :return: dictionary of hit and miss counters and the current size
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'ttl': self.ttl,
+            }
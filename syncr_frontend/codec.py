@@ -0,0 +1,127 @@
+"""Wire codecs for messages exchanged with the backend"""
+from collections import OrderedDict
+
+import bencode
+
+from .bencode_stream import decode_chunks
+
+try:
+    import umsgpack
+except ImportError:
+    umsgpack = None
+
+
+class BencodeCodec:
+    """
+    Codec of the original protocol, understood by every backend
+    """
+
+    name = 'bencode'
+
+    def encode(self, value):
+        """
+        :param value: message to encode
+        :return: encoded bytes
+        """
+        return bencode.encode(value)
+
+    def decode_chunks(self, chunks):
+        """
+        :param chunks: iterable of bytes-like chunks of one message
+        :return: decoded message
+        """
+        return decode_chunks(chunks)
+
+
+class MsgpackCodec:
+    """
+    Binary codec using u-msgpack-python
+    """
+
+    name = 'msgpack'
+
+    def encode(self, value):
+        """
+        :param value: message to encode
+        :return: encoded bytes
+        """
+        return umsgpack.packb(value)
+
+    def decode_chunks(self, chunks):
+        """
+        Decodes while the chunks arrive, so only one chunk of the raw
+        message is held next to the decoded values
+
+        :param chunks: iterable of bytes-like chunks of one message, each \
+                only valid until the next one is requested
+        :return: decoded message
+        :raises umsgpack.UnpackException: if the message is truncated or \
+                data follows it
+        """
+        reader = _ChunkReader(chunks)
+        value = umsgpack.unpack(reader)
+        if reader.read(1):
+            raise umsgpack.UnpackException(
+                'invalid msgpack value (data after valid prefix)',
+            )
+
+        return value
+
+
+class _ChunkReader:
+    """
+    File-like reader over an iterable of chunks for umsgpack.unpack
+    """
+
+    def __init__(self, chunks):
+        """
+        :param chunks: iterable of bytes-like chunks
+        """
+        self._chunks = iter(chunks)
+        self._chunk = b''
+        self._pos = 0
+
+    def read(self, size):
+        """
+        :param size: number of bytes to read
+        :return: the next size bytes, fewer once the chunks are exhausted
+        """
+        end = self._pos + size
+        if end <= len(self._chunk):
+            data = self._chunk[self._pos:end]
+            self._pos = end
+            return data
+
+        parts = [self._chunk[self._pos:]]
+        missing = size - len(parts[0])
+        for chunk in self._chunks:
+            # The chunk may be a view of a buffer that is reused
+            chunk = bytes(chunk)
+            if len(chunk) >= missing:
+                parts.append(chunk[:missing])
+                self._chunk = chunk
+                self._pos = missing
+                return b''.join(parts)
+            parts.append(chunk)
+            missing -= len(chunk)
+
+        self._chunk = b''
+        self._pos = 0
+        return b''.join(parts)
+
+
+DEFAULT_CODEC = BencodeCodec()
+
+# Available codecs in order of preference
+CODECS = OrderedDict()
+if umsgpack is not None:
+    CODECS[MsgpackCodec.name] = MsgpackCodec()
+CODECS[BencodeCodec.name] = DEFAULT_CODEC
+
+
+def get_codec(name):
+    """
+    :param name: name of a codec
+    :return: the codec, or the default codec if name is unknown
+    """
+    return CODECS.get(name, DEFAULT_CODEC)
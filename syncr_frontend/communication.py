@@ -1,101 +1,1007 @@
+import asyncio
+import logging
 import os
 import platform
+import select
 import socket
+import struct
+import threading
+import time
+from collections import deque
 
 import bencode
 from syncr_backend.constants import FRONTEND_UNIX_ADDRESS
 from syncr_backend.init.node_init import get_full_init_directory
 
+from . import metrics
+from . import profiling
+from .bencode_stream import decode_chunks
+from .codec import CODECS
+from .codec import get_codec
+from .constants import ACTION_TIMEOUTS
+from .constants import BACKEND_SOCKET_ENV
+from .constants import BATCH_ACTION
+from .constants import BATCH_VERSION
+from .constants import BREAKER_FAILURE_THRESHOLD
 from .constants import BUFFER_SIZE
+from .constants import FRAME_MAGIC
+from .constants import FRAMING_HELLO_ACTION
+from .constants import FRAMING_PROBE_INTERVAL
+from .constants import FRAMING_PROBE_TIMEOUT
+from .constants import FRAMING_VERSION
+from .constants import HEALTH_PROBE_INTERVAL
+from .constants import HEALTH_PROBE_TIMEOUT
+from .constants import MAX_BUFFER_SIZE
+from .constants import MAX_RESPONSE_SIZE
+from .constants import POOL_IDLE_TIMEOUT
+from .constants import POOL_MAX_SIZE
+from .constants import READ_ONLY_ACTIONS
 from .constants import TCP_ADDRESS
 from .constants import TIMEOUT
 
+# Length prefix of every frame sent over a pooled connection
+FRAME_HEADER = struct.Struct('!I')
 
-def send_request(request):
+logger = logging.getLogger(__name__)
+
+
+class ResponseTooLarge(Exception):
+    """
+    Raised when a backend response exceeds MAX_RESPONSE_SIZE
+    """
+
+
+def send_request(request, timeout=None):
     """
-    Sends message to backend over socket connection and waits for a response
+    Sends message to backend over socket connection and waits for a
+    response. Fails fast without contacting the backend while the circuit
+    breaker considers it unhealthy.
 
     :param request: dictionary of info to be sent to backend
+    :param timeout: seconds to wait for the backend, defaults to the \
+            ACTION_TIMEOUTS entry of the action or TIMEOUT
+    """
+
+    if timeout is None:
+        timeout = action_timeout(request.get('action'))
+
+    measure = metrics.enabled
+    if measure:
+        _transfer.sent = _transfer.received = 0
+        start = time.perf_counter()
+
+    outcome = 'ok'
+    if not _breaker.allow():
+        outcome = 'circuit_open'
+        response = {
+            'status': 'error',
+            'message': 'Backend Communication Error',
+        }
+    else:
+        try:
+            with profiling.span('send_request', action=request.get('action')):
+                response = _send_message(request, timeout)
+        except socket.timeout:
+            _breaker.record_failure()
+            outcome = 'timeout'
+            response = {
+                'status': 'error',
+                'message': 'Connection Timeout. Check Backend Status',
+            }
+        except socket.error:
+            _breaker.record_failure()
+            outcome = 'error'
+            response = {
+                'status': 'error',
+                'message': 'Backend Communication Error',
+            }
+        except ResponseTooLarge:
+            _breaker.record_success()
+            outcome = 'too_large'
+            response = {
+                'status': 'error',
+                'message': 'Backend Response Too Large',
+            }
+        else:
+            _breaker.record_success()
+
+    if measure:
+        metrics.observe_backend_request(
+            request.get('action'),
+            time.perf_counter() - start,
+            _transfer.sent,
+            _transfer.received,
+            outcome,
+        )
+
+    return response
+
+
+# Bytes exchanged by the current request of each thread, counted while
+# metrics are enabled
+_transfer = threading.local()
+
+
+def _count_bytes(direction, size):
+    """
+    :param direction: 'sent' or 'received'
+    :param size: number of bytes transferred
+    """
+
+    if metrics.enabled:
+        setattr(_transfer, direction, getattr(_transfer, direction, 0) + size)
+
+
+def send_batch(requests, timeout=None):
+    """
+    Sends several requests to the backend in one batch envelope, which the
+    backend performs in order, replying to each. Backends that did not
+    agree to batching get the requests one at a time, in order, since
+    later requests may depend on earlier ones.
+
+    :param requests: list of request dictionaries
+    :param timeout: seconds to wait for the whole batch, defaults to the \
+            sum of the timeouts of its actions, at most TIMEOUT
+    :return: list of the responses to the requests, in order. If the \
+            batch failed as a whole, every response is its error.
+    """
+
+    requests = list(requests)
+    if not requests:
+        return []
+
+    if not _batching_supported():
+        return [send_request(request) for request in requests]
+
+    if timeout is None:
+        timeout = min(
+            sum(action_timeout(request.get('action')) for request in requests),
+            TIMEOUT,
+        )
+
+    response = send_request(
+        {'action': BATCH_ACTION, 'requests': requests},
+        timeout,
+    )
+    results = response.get('results')
+    if not isinstance(results, list) or len(results) != len(requests):
+        if response.get('status') != 'error':
+            response = {
+                'status': 'error',
+                'message': 'Invalid Batch Response',
+            }
+        return [dict(response) for _ in requests]
+
+    return results
+
+
+def action_timeout(action):
+    """
+    :param action: action of a request, as FrontendAction or its string
+    :return: seconds to wait for the backend's reply to the action
     """
 
+    return ACTION_TIMEOUTS.get(str(action).rpartition('.')[2], TIMEOUT)
+
+
+def _is_read_only(action):
+    """
+    :param action: action of a request, as FrontendAction or its string
+    :return: True if the action only reads the state of the backend
+    """
+
+    return str(action).rpartition('.')[2] in READ_ONLY_ACTIONS
+
+
+def _send_message(request, timeout=TIMEOUT):
+    """
+    Sends message over a pooled framed connection with the negotiated codec
+    when the backend supports framing, otherwise falls back to a bencoded
+    one-shot connection
+
+    :param request: dictionary of info to be sent to backend
+    :param timeout: socket timeout in seconds
+    :return: decoded response
+    """
+
+    codec = _framed_codec()
+    if codec is not None:
+        return _framed_send_message(codec, request, timeout)
+
     # Convert dictionary to send-able type
-    data_string = bencode.encode(request)
+    return _one_shot_send_message(bencode.encode(request), timeout)
+
+
+def _one_shot_send_message(msg, timeout=TIMEOUT):
+    """
+    Sends message to backend over a new connection that is closed once the
+    response has been read
+    """
+
+    if platform.system() == 'Windows':
+        return _tcp_send_message(msg, timeout)
+    else:
+        return _unix_send_message(msg, timeout)
 
-    op_sys = platform.system()
 
+def _tcp_connect(timeout=TIMEOUT):
+    """
+    Opens a tcp socket to the backend
+    """
+
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(TCP_ADDRESS)
+    except socket.error:
+        s.close()
+        raise
+
+    return s
+
+
+def _unix_connect(timeout=TIMEOUT):
+    """
+    Opens a unix socket to the backend
+    """
+
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
     try:
-        if op_sys == 'Windows':
-            response_string = _tcp_send_message(data_string)
+        s.connect(_unix_address())
+    except socket.error:
+        s.close()
+        raise
+
+    return s
+
+
+def _unix_address():
+    """
+    :return: path of the backend's unix socket, which the BACKEND_SOCKET_ENV \
+            environment variable overrides, e.g. for a stand-in backend
+    """
+
+    address = os.environ.get(BACKEND_SOCKET_ENV)
+    if address:
+        return address
+
+    return os.path.join(get_full_init_directory(), FRONTEND_UNIX_ADDRESS)
+
+
+def _connect(timeout=TIMEOUT):
+    """
+    Opens a socket to the backend using the transport for this platform
+    """
+
+    if platform.system() == 'Windows':
+        return _tcp_connect(timeout)
+    else:
+        return _unix_connect(timeout)
+
+
+def _tcp_send_message(msg, timeout=TIMEOUT):
+    """
+    Sends message to backend over tcp socket and awaits a response
+    """
+
+    with profiling.span('connect'):
+        s = _tcp_connect(timeout)
+
+    return _one_shot_exchange(s, msg)
+
+
+def _unix_send_message(msg, timeout=TIMEOUT):
+    """
+    Sends message to backend over unix socket and awaits a response
+    """
+
+    with profiling.span('connect'):
+        s = _unix_connect(timeout)
+
+    return _one_shot_exchange(s, msg)
+
+
+def _one_shot_exchange(s, msg):
+    """
+    Sends message over an open socket, half-closes it and reads the
+    response until the backend closes the connection
+
+    :param s: connected socket, closed before returning
+    :param msg: encoded request
+    :return: decoded response
+    """
+
+    try:
+        # Send request
+        with profiling.span('send'):
+            s.sendall(msg)
+            s.shutdown(socket.SHUT_WR)
+        _count_bytes('sent', len(msg))
+
+        # Decode response while it is read from backend
+        with profiling.span('receive') as phase:
+            response = decode_chunks(_recv_chunks(s, phase=phase))
+    finally:
+        s.close()
+
+    return response
+
+
+def _recv_chunks(s, size=None, phase=None):
+    """
+    Reads a response from a socket, yielding each chunk as it arrives.
+    Chunks are received into one reusable buffer whose size doubles from
+    BUFFER_SIZE up to MAX_BUFFER_SIZE while the backend keeps filling it, so
+    a yielded chunk is only valid until the next one is requested.
+
+    :param s: connected socket
+    :param size: exact number of bytes to read, or None to read until the \
+            backend closes the connection
+    :param phase: profiling Span accumulating the time spent waiting for \
+            the socket, or None
+    :return: generator of memoryview chunks
+    :raises ResponseTooLarge: if more than MAX_RESPONSE_SIZE bytes arrive
+    :raises ConnectionError: if the connection closes before size bytes
+    """
+
+    chunk = BUFFER_SIZE
+    buf = bytearray(chunk)
+    view = memoryview(buf)
+    total = 0
+
+    while size is None or total < size:
+        wanted = chunk if size is None else min(chunk, size - total)
+        if phase is None:
+            received = s.recv_into(view, wanted)
         else:
-            response_string = _unix_send_message(data_string)
-    except socket.timeout:
+            start = time.perf_counter()
+            received = s.recv_into(view, wanted)
+            phase.waited = (
+                (phase.waited or 0.0) + time.perf_counter() - start
+            )
+        if not received:
+            if size is not None:
+                raise ConnectionError('Backend closed framed connection')
+            return
+
+        total += received
+        _count_bytes('received', received)
+        if total > MAX_RESPONSE_SIZE:
+            raise ResponseTooLarge(
+                'Backend response exceeds {} bytes'.format(MAX_RESPONSE_SIZE),
+            )
+        yield view[:received]
+
+        if received == chunk and chunk < MAX_BUFFER_SIZE:
+            chunk *= 2
+            buf = bytearray(chunk)
+            view = memoryview(buf)
+
+
+# Framed Connections
+
+
+class ConnectionPool:
+    """
+    Pool of long-lived backend connections speaking the framed protocol.
+
+    A connection starts with FRAME_MAGIC, after which every request and
+    response is a FRAME_HEADER length prefix followed by the encoded message.
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size=POOL_MAX_SIZE,
+        idle_timeout=POOL_IDLE_TIMEOUT,
+    ):
+        """
+        :param connect: callable returning a new connected socket
+        :param max_size: maximum number of idle connections kept open
+        :param idle_timeout: seconds an idle connection is kept before \
+                it is evicted
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Gets a healthy connection from the pool or opens a new one
+
+        :return: tuple of (socket, whether the socket was reused)
+        """
+        self.evict_idle()
+
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                s, _ = self._idle.pop()
+
+            if _is_healthy(s):
+                return s, True
+            s.close()
+
+        return self.open(), False
+
+    def open(self):
+        """
+        Opens a new framed connection that bypasses the idle connections
+
+        :return: connected socket
+        """
+        s = self._connect()
+        try:
+            s.sendall(FRAME_MAGIC)
+        except socket.error:
+            s.close()
+            raise
+
+        return s
+
+    def release(self, s):
+        """
+        Returns a connection to the pool, closing it if the pool is full
+
+        :param s: socket previously returned by acquire
+        """
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((s, time.monotonic()))
+                return
+
+        s.close()
+
+    def evict_idle(self):
+        """
+        Closes connections that have been idle longer than idle_timeout
+        """
+        expired = []
+        cutoff = time.monotonic() - self.idle_timeout
+
+        with self._lock:
+            while self._idle and self._idle[0][1] < cutoff:
+                expired.append(self._idle.popleft()[0])
+
+        for s in expired:
+            s.close()
+
+    def close(self):
+        """
+        Closes every idle connection
+        """
+        with self._lock:
+            idle = [s for s, _ in self._idle]
+            self._idle.clear()
+
+        for s in idle:
+            s.close()
+
+
+def _is_healthy(s):
+    """
+    Checks that an idle pooled connection is still usable. An idle framed
+    connection never has anything to read, so a readable socket means the
+    backend closed it or the stream is out of sync.
+
+    :param s: idle socket
+    :return: True if the socket can be reused
+    """
+
+    try:
+        readable, _, _ = select.select([s], [], [], 0)
+    except (ValueError, OSError):
+        return False
+
+    return not readable
+
+
+def _recv_exact(s, size):
+    """
+    Reads exactly size bytes from a socket into a preallocated buffer
+
+    :raises ConnectionError: if the backend closes the connection early
+    """
+
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        data = s.recv_into(
+            view[received:],
+            min(size - received, MAX_BUFFER_SIZE),
+        )
+        if not data:
+            view.release()
+            raise ConnectionError('Backend closed framed connection')
+        received += data
+
+    view.release()
+    _count_bytes('received', size)
+
+    return bytes(buf)
+
+
+def _framed_send(s, msg, timeout=TIMEOUT):
+    """
+    Sends one framed request
+
+    :param s: socket speaking the framed protocol
+    :param msg: encoded request
+    :param timeout: socket timeout in seconds
+    """
+
+    s.settimeout(timeout)
+    with profiling.span('send'):
+        s.sendall(FRAME_HEADER.pack(len(msg)))
+        s.sendall(msg)
+    _count_bytes('sent', FRAME_HEADER.size + len(msg))
+
+
+def _framed_receive(s, codec):
+    """
+    Reads one framed response
+
+    :param s: socket speaking the framed protocol
+    :param codec: codec negotiated for framed connections
+    :return: decoded response
+    """
+
+    with profiling.span('receive') as phase:
+        (length,) = FRAME_HEADER.unpack(_recv_exact(s, FRAME_HEADER.size))
+        if length > MAX_RESPONSE_SIZE:
+            # The rest of the frame is never read, so the connection is
+            # unusable
+            s.close()
+            raise ResponseTooLarge(
+                'Backend response exceeds {} bytes'.format(
+                    MAX_RESPONSE_SIZE,
+                ),
+            )
+
+        return codec.decode_chunks(_recv_chunks(s, length, phase=phase))
+
+
+def _framed_send_message(codec, request, timeout=TIMEOUT):
+    """
+    Sends message to backend over a pooled connection. A reused connection
+    may turn out to be closed by the backend. The request is then sent
+    again on a fresh connection if sending it failed, or if its action only
+    reads state. Any other action may have been performed before the
+    connection closed, so its error is raised instead of running it twice.
+
+    :param codec: codec negotiated for framed connections
+    :param request: dictionary of info to be sent to backend
+    :param timeout: socket timeout in seconds
+    :return: decoded response
+    """
+
+    msg = codec.encode(request)
+    read_only = _is_read_only(request.get('action'))
+    with profiling.span('connect'):
+        s, reused = _pool.acquire()
+    sent = False
+    try:
+        try:
+            _framed_send(s, msg, timeout)
+            sent = True
+            response = _framed_receive(s, codec)
+        except ConnectionError:
+            if not reused or (sent and not read_only):
+                raise
+            s.close()
+            with profiling.span('connect'):
+                s = _pool.open()
+            _framed_send(s, msg, timeout)
+            response = _framed_receive(s, codec)
+    except BaseException:
+        s.close()
+        raise
+
+    _pool.release(s)
+    return response
+
+
+_framing = {
+    'codec': None,
+    'batch': False,
+    'checked_at': 0.0,
+}
+_framing_lock = threading.Lock()
+_framing_probe_lock = threading.Lock()
+
+
+def _framed_codec():
+    """
+    Checks whether the backend understands the framed protocol and which
+    codec it agreed to, probing it at most once every FRAMING_PROBE_INTERVAL
+    seconds
+
+    :return: codec to use on pooled framed connections, or None if one-shot \
+            connections should be used
+    """
+
+    codec = _cached_framing()
+    if codec is not None:
+        return codec or None
+
+    # Only one thread probes, the others wait for its answer
+    with _framing_probe_lock:
+        codec = _cached_framing()
+        if codec is not None:
+            return codec or None
+
+        codec, batch = _probe_framing()
+        if codec is None:
+            # Backend unreachable, let the caller report the error
+            return None
+
+        with _framing_lock:
+            _framing['codec'] = codec
+            _framing['batch'] = batch
+            _framing['checked_at'] = time.monotonic()
+
+    if not codec:
+        _pool.close()
+
+    return codec or None
+
+
+def _batching_supported():
+    """
+    :return: True if the backend agreed to batch envelopes
+    """
+
+    # Negotiating would wait for a backend that is known to be down
+    if _breaker.state()['state'] == 'closed':
+        _framed_codec()
+
+    with _framing_lock:
+        return _framing['batch']
+
+
+def _cached_framing():
+    """
+    :return: result of the last framing probe, or None if it is stale
+    """
+
+    with _framing_lock:
+        age = time.monotonic() - _framing['checked_at']
+        if age < FRAMING_PROBE_INTERVAL:
+            return _framing['codec']
+
+    return None
+
+
+def _probe_framing():
+    """
+    Sends a one-shot hello offering the framing version, the available
+    codecs and the batch version. Backends without framing support reply
+    with an error or without the framing version, and backends that do not
+    name a codec get bencode.
+
+    :return: tuple of (codec, batch). codec is the negotiated codec, False \
+            if framing is not supported, or None if the backend could not \
+            be reached. batch is True if the backend accepts batches.
+    """
+
+    hello = bencode.encode({
+        'action': FRAMING_HELLO_ACTION,
+        'framing': FRAMING_VERSION,
+        'codecs': list(CODECS),
+        'batch': BATCH_VERSION,
+    })
+
+    try:
+        reply = _one_shot_send_message(hello, FRAMING_PROBE_TIMEOUT)
+    except socket.error:
+        return None, False
+    except bencode.BencodeDecodeError:
+        return False, False
+
+    if not isinstance(reply, dict):
+        return False, False
+    if reply.get('framing') != FRAMING_VERSION:
+        return False, False
+
+    return get_codec(reply.get('codec')), reply.get('batch') == BATCH_VERSION
+
+
+def reset_connections():
+    """
+    Closes pooled connections and forgets the negotiated protocol and the
+    health of the backend, e.g. after the backend restarted
+    """
+
+    with _framing_lock:
+        _framing['codec'] = None
+        _framing['batch'] = False
+        _framing['checked_at'] = 0.0
+    _pool.close()
+    _breaker.reset()
+
+
+_pool = ConnectionPool(_connect)
+
+
+# Backend Health
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a backend that keeps failing, so they fail
+    fast instead of each waiting for its timeout.
+
+    The circuit opens after failure_threshold consecutive failures. While
+    it is open, one caller every probe_interval seconds probes the backend
+    and the others are turned away. If the probe succeeds, or the caller
+    skips probing, the circuit is half-open: that caller's request is the
+    trial, and its record_success or record_failure closes or reopens the
+    circuit. A trial that never reports is replaced by the next one after
+    probe_interval.
+    """
+
+    def __init__(self, probe, failure_threshold, probe_interval):
+        """
+        :param probe: callable returning True if the backend is healthy
+        :param failure_threshold: consecutive failures opening the circuit
+        :param probe_interval: seconds between probes of an open circuit
+        """
+        self._probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at = None
+        self.half_open = False
+        self._next_probe = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self, probe=True):
+        """
+        :param probe: probe the backend when a probe is due, otherwise the \
+                request that is let through is the only probe
+        :return: True if a request may be sent to the backend, whose \
+                outcome must then be recorded
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+
+            now = time.monotonic()
+            if now < self._next_probe:
+                self.rejected += 1
+                return False
+            # This caller tries, the others keep failing fast meanwhile
+            self._next_probe = now + self.probe_interval
+            self.half_open = False
+
+        if probe and not self._probe():
+            with self._lock:
+                self.rejected += 1
+            return False
+
+        with self._lock:
+            if self.opened_at is not None:
+                self.half_open = True
+
+        return True
+
+    def record_success(self):
+        """
+        Closes the circuit
+        """
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info('Backend is reachable again')
+            self.failures = 0
+            self.opened_at = None
+            self.half_open = False
+
+    def record_failure(self):
+        """
+        Counts a failed request, opening the circuit at the threshold and
+        reopening it if the request was the trial of a half-open circuit
+        """
+        with self._lock:
+            self.failures += 1
+            if self.half_open:
+                self.half_open = False
+                self._next_probe = time.monotonic() + self.probe_interval
+            elif (
+                self.opened_at is None and
+                self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._next_probe = self.opened_at + self.probe_interval
+                logger.warning(
+                    'Backend failed %d times, failing fast for %s seconds',
+                    self.failures, self.probe_interval,
+                )
+
+    def reset(self):
+        """
+        Closes the circuit and forgets the failures
+        """
+        with self._lock:
+            self.failures = 0
+            self.rejected = 0
+            self.opened_at = None
+            self.half_open = False
+            self._next_probe = 0.0
+
+    def state(self):
+        """
+        :return: dictionary of the circuit state, the consecutive failures, \
+                the requests turned away and how long the circuit is open
+        """
+        with self._lock:
+            is_open = self.opened_at is not None
+            if self.half_open:
+                state = 'half_open'
+            elif is_open:
+                state = 'open'
+            else:
+                state = 'closed'
+            return {
+                'state': state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'open_for': (
+                    time.monotonic() - self.opened_at if is_open else 0.0
+                ),
+            }
+
+
+def _probe_health():
+    """
+    Sends the framing hello, which every backend answers quickly, even
+    with an error
+
+    :return: True if the backend replied within HEALTH_PROBE_TIMEOUT
+    """
+
+    hello = bencode.encode({
+        'action': FRAMING_HELLO_ACTION,
+        'framing': FRAMING_VERSION,
+        'codecs': list(CODECS),
+    })
+
+    try:
+        _one_shot_send_message(hello, HEALTH_PROBE_TIMEOUT)
+    except socket.error:
+        return False
+    except (bencode.BencodeDecodeError, ResponseTooLarge):
+        pass
+
+    return True
+
+
+def backend_health():
+    """
+    :return: dictionary describing the circuit breaker of the backend
+    """
+
+    return _breaker.state()
+
+
+_breaker = CircuitBreaker(
+    _probe_health,
+    BREAKER_FAILURE_THRESHOLD,
+    HEALTH_PROBE_INTERVAL,
+)
+
+
+# Asyncio Client
+
+
+async def send_request_async(request, timeout=None):
+    """
+    Sends message to backend from a coroutine and waits for a response
+    without blocking the event loop. Cancelling the awaiting task closes
+    the connection.
+
+    :param request: dictionary of info to be sent to backend
+    :param timeout: deadline in seconds for the whole request, defaults \
+            to the ACTION_TIMEOUTS entry of the action or TIMEOUT
+    """
+
+    if timeout is None:
+        timeout = action_timeout(request.get('action'))
+
+    # Convert dictionary to send-able type
+    data_string = bencode.encode(request)
+
+    # Probing would block the event loop, so the request is the probe
+    if not _breaker.allow(probe=False):
+        response = {
+            'status': 'error',
+            'message': 'Backend Communication Error',
+        }
+        return response
+
+    try:
+        response_string = await asyncio.wait_for(
+            _async_send_message(data_string),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        _breaker.record_failure()
         response = {
             'status': 'error',
             'message': 'Connection Timeout. Check Backend Status',
         }
         return response
     except socket.error:
+        _breaker.record_failure()
         response = {
             'status': 'error',
             'message': 'Backend Communication Error',
         }
         return response
+    except ResponseTooLarge:
+        _breaker.record_success()
+        response = {
+            'status': 'error',
+            'message': 'Backend Response Too Large',
+        }
+        return response
+
+    _breaker.record_success()
 
     response = bencode.decode(response_string)
 
     return response
 
 
-def _tcp_send_message(msg):
-    """
-    Sends message to backend over tcp socket and awaits a response
+async def _async_open_connection():
     """
+    Opens a stream to the backend using the transport for this platform
 
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.settimeout(TIMEOUT)
-    s.connect(TCP_ADDRESS)
-
-    # Send request
-    s.sendall(msg)
-    s.shutdown(socket.SHUT_WR)
-
-    # Read response from backend
-    response = b''
-    while True:
-        data = s.recv(BUFFER_SIZE)
-        if not data:
-            break
-        else:
-            response += data
+    :return: tuple of (StreamReader, StreamWriter)
+    """
 
-    s.close()
-    return response
+    if platform.system() == 'Windows':
+        return await asyncio.open_connection(*TCP_ADDRESS)
+    else:
+        return await asyncio.open_unix_connection(_unix_address())
 
 
-def _unix_send_message(msg):
+async def _async_send_message(msg):
     """
-    Sends message to backend over unix socket and awaits a response
+    Sends message to backend over a one-shot stream and awaits a response
     """
 
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    s.settimeout(TIMEOUT)
-    s.connect(os.path.join(get_full_init_directory(), FRONTEND_UNIX_ADDRESS))
-
-    # Send request
-    s.sendall(msg)
-    s.shutdown(socket.SHUT_WR)
+    reader, writer = await _async_open_connection()
+    try:
+        # Send request
+        writer.write(msg)
+        writer.write_eof()
+        await writer.drain()
 
-    # Read response from backend
-    response = b''
-    while True:
-        data = s.recv(BUFFER_SIZE)
-        if not data:
-            break
-        else:
-            response += data
+        # Read response from backend
+        chunks = []
+        size = 0
+        while True:
+            data = await reader.read(MAX_BUFFER_SIZE)
+            if not data:
+                break
+            size += len(data)
+            if size > MAX_RESPONSE_SIZE:
+                raise ResponseTooLarge(
+                    'Backend response exceeds {} bytes'.format(
+                        MAX_RESPONSE_SIZE,
+                    ),
+                )
+            chunks.append(data)
 
-    s.close()
-    return response
+        return b''.join(chunks)
+    finally:
+        writer.close()
 
 
 if __name__ == '__main__':
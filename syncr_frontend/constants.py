@@ -4,3 +4,104 @@ TIMEOUT = 150
 UNIX_ADDRESS = './unix_socket'
 TCP_ADDRESS = ('localhost', 12345)
 BUFFER_SIZE = 4096
+MAX_BUFFER_SIZE = 1024 * 1024
+MAX_RESPONSE_SIZE = 512 * 1024 * 1024
+BACKEND_SOCKET_ENV = 'SYNCR_BACKEND_SOCKET'
+
+# Connection Pool Constants
+POOL_MAX_SIZE = 8
+POOL_IDLE_TIMEOUT = 30
+FRAMING_VERSION = 1
+FRAMING_HELLO_ACTION = 'FRAMING_HELLO'
+FRAMING_PROBE_TIMEOUT = 5
+FRAMING_PROBE_INTERVAL = 300
+FRAME_MAGIC = b'5YF1'
+BATCH_VERSION = 1
+BATCH_ACTION = 'BATCH'
+
+# Frontend Constants
+BACKEND_WORKERS = 16
+FAN_OUT_DEADLINE = TIMEOUT
+
+# Cache Constants
+DROP_LIST_CACHE_TTL = 30
+DROP_STATE_CACHE_TTL = 5
+# Seconds the stamp of a reply answers conditional API requests
+DROP_STAMP_TTL = 30
+FILE_INDEX_CACHE_TTL = 300
+
+# File Table Constants
+FILE_PAGE_SIZE = 200
+FILE_PAGE_MAX = 1000
+
+# Live Update Constants
+LIVE_POLL_INTERVAL = 2
+LIVE_QUEUE_SIZE = 16
+LIVE_KEEPALIVE = 15
+LIVE_STREAM_DURATION = 60
+# Event streams held open by one worker process, the others are refused.
+# None leaves LIVE_RESERVED_THREADS request threads of a gunicorn worker
+# to the pages, and sets no limit under the development server.
+LIVE_MAX_STREAMS = None
+# Request threads of a gunicorn worker kept free of event streams
+LIVE_RESERVED_THREADS = 2
+# Seconds a refused event stream waits before reconnecting
+LIVE_BUSY_RETRY = 10
+
+# Response Constants
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_CACHE_SIZE = 64
+
+# Directory Browser Constants
+DIRECTORY_CACHE_SIZE = 256
+DIRECTORY_PAGE_SIZE = 200
+DIRECTORY_PREFETCH = 32
+DIRECTORY_PREFETCH_WORKERS = 2
+
+# Bulk Action Constants
+BULK_WORKERS = 4
+BULK_KEEP = 60 * 60
+
+# Background Job Constants
+JOB_WORKERS = 2
+JOB_QUEUE_SIZE = 64
+# Seconds job states are kept after they last changed, longer than the
+# timeout of any action run as a job
+JOB_KEEP = 2 * 60 * 60
+
+# Prefetch Constants
+PREFETCH_WORKERS = 2
+PREFETCH_MIN_INTERVAL = 5
+PREFETCH_MAX_INTERVAL = 60
+PREFETCH_RECENT = 10 * 60
+
+# Profiling Constants
+PROFILE_INTERVAL = 0.001
+PROFILE_HEADER = 'X-Syncr-Profile'
+
+# Backend Health Constants
+BREAKER_FAILURE_THRESHOLD = 3
+HEALTH_PROBE_INTERVAL = 5
+HEALTH_PROBE_TIMEOUT = 2
+
+# Actions that only read state, safe to send again after a lost reply
+READ_ONLY_ACTIONS = frozenset([
+    'GET_OWNED_SUBSCRIBED_DROPS',
+    'GET_SELECTED_DROP',
+    'GET_PENDING_CHANGES',
+    'GET_PUBLIC_KEY',
+])
+
+# Seconds to wait for the reply to each action, others wait TIMEOUT. The
+# reads re-scan whole drops, so they keep TIMEOUT until they are measured.
+ACTION_TIMEOUTS = {
+    'ADD_OWNER': 30,
+    'REMOVE_OWNER': 30,
+    'UNSUBSCRIBE': 30,
+    'DELETE_DROP': 60,
+    # Run as background jobs, hashing or downloading a whole drop
+    'NEW_VERSION': 60 * 60,
+    'SYNC_UPDATE': 60 * 60,
+}
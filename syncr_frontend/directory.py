@@ -0,0 +1,135 @@
+"""Cached listings of the folders in local directories"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def scan_folders(path):
+    """
+    :param path: absolute path of a directory
+    :return: tuple of the names of its visible folders, sorted case \
+            insensitively
+    :raises OSError: if the directory cannot be read
+    """
+    folders = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # The type comes from the directory entry where the filesystem
+            # provides it, so this does not stat every entry
+            if entry.name[0] != '.' and entry.is_dir():
+                folders.append(entry.name)
+    folders.sort(key=str.casefold)
+
+    return tuple(folders)
+
+
+class DirectoryLister:
+    """
+    Lists the folders of directories, keeping the most recently used
+    listings until the modification time of their directory changes. Each
+    new listing starts scanning the first folders it contains in the
+    background, so stepping into one of them is served from the cache.
+    """
+
+    def __init__(self, size, prefetch=0, workers=2):
+        """
+        :param size: number of directory listings kept
+        :param prefetch: number of child folders scanned ahead
+        :param workers: threads scanning ahead
+        """
+        self.size = size
+        self.prefetch = prefetch
+        self.hits = 0
+        self.misses = 0
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._executor = None
+        if prefetch:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def folders(self, path):
+        """
+        :param path: absolute path of a directory
+        :return: tuple of the names of its visible folders, sorted case \
+                insensitively
+        :raises OSError: if the directory cannot be read
+        """
+        mtime = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is not None and listing[0] == mtime:
+                self._listings.move_to_end(path)
+                self.hits += 1
+                return listing[1]
+            self.misses += 1
+
+        folders = self._flight.do(path, lambda: self._scan(path, mtime))
+        self._prefetch(path, folders[:self.prefetch])
+
+        return folders
+
+    def page(self, path, offset, limit):
+        """
+        :param path: absolute path of a directory
+        :param offset: index of the first folder
+        :param limit: maximum number of folders
+        :return: tuple of (list of folder names, total number of folders)
+        :raises OSError: if the directory cannot be read
+        """
+        folders = self.folders(path)
+
+        return list(folders[offset:offset + limit]), len(folders)
+
+    def _scan(self, path, mtime):
+        folders = scan_folders(path)
+
+        with self._lock:
+            self._listings[path] = (mtime, folders)
+            self._listings.move_to_end(path)
+            while len(self._listings) > self.size:
+                self._listings.popitem(last=False)
+
+        return folders
+
+    def _prefetch(self, path, names):
+        """
+        Scans the given child folders of path that are not cached yet
+        """
+        if self._executor is None:
+            return
+
+        with self._lock:
+            paths = [
+                os.path.join(path, name) for name in names
+                if os.path.join(path, name) not in self._listings
+            ]
+
+        for child in paths:
+            self._executor.submit(self._prefetch_one, child)
+
+    def _prefetch_one(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            self._flight.do(path, lambda: self._scan(path, mtime))
+        except OSError as e:
+            logger.debug('Prefetching %s failed: %s', path, e)
+
+    def stats(self):
+        """
+        :return: dictionary of hit and miss counters and the number of \
+                cached listings
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._listings),
+            }
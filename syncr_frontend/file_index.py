@@ -0,0 +1,389 @@
+"""Merged file table of a drop"""
+import threading
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import OrderedDict
+
+# Fields of a file table row, in order
+ROW_FIELDS = ('name', 'remote_status', 'local_status', 'percent')
+
+# Status of a file on one side, indexed by status code
+STATUSES = (None, 'unchanged', 'changed', 'removed', 'added')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Orders the file table can be sorted in
+SORT_ORDERS = ('name', 'percent')
+
+# Number of query results kept per index, so paging through them is cheap
+QUERY_CACHE_SIZE = 16
+
+
+def _apply_statuses(codes, positions, names, pending_changes):
+    """
+    Records the status of every file named in pending changes, appending
+    records for added files that are not in the index yet
+
+    :param codes: status codes of this side, one per record
+    :param positions: dictionary of file name to record position
+    :param names: file names, one per record
+    :param pending_changes: dictionary of pending changes from the backend
+    :return: list of the positions of newly added records
+    """
+    for status in ('removed', 'changed', 'unchanged'):
+        code = STATUS_CODES[status]
+        for name in pending_changes.get(status, []):
+            position = positions.get(name)
+            if position is not None:
+                codes[position] = code
+
+    new = []
+    code = STATUS_CODES['added']
+    for name in pending_changes.get('added', []):
+        position = positions.get(name)
+        if position is None:
+            position = positions[name] = len(names)
+            names.append(name)
+            new.append(position)
+        codes[position] = code
+
+    return new
+
+
+class FileIndex:
+    """
+    Compact file table of a drop, built once per backend reply. Every path
+    has one record holding its remote and local status codes and its
+    percent. Records are the files of the drop followed by files only added
+    locally or remotely. Counts per status are kept so summaries are O(1).
+    """
+
+    def __init__(self, selected_drop_info):
+        """
+        :param selected_drop_info: requested drop dictionary from \
+                GET_PENDING_CHANGES or GET_SELECTED_DROP
+        """
+        drop = selected_drop_info.get('drop') or {}
+        pending_changes = selected_drop_info.get('pending_changes') or {}
+        remote_pending_changes = (
+            selected_drop_info.get('remote_pending_changes') or {}
+        )
+        files = drop.get('files', {})
+
+        names = list(files)
+        positions = {name: position for position, name in enumerate(names)}
+        self.percent = array('d', files.values())
+
+        # Added files grow the index, so size the code arrays generously
+        extra = (
+            len(pending_changes.get('added', [])) +
+            len(remote_pending_changes.get('added', []))
+        )
+        local = bytearray(len(names) + extra)
+        remote = bytearray(len(names) + extra)
+
+        added = _apply_statuses(local, positions, names, pending_changes)
+        added += _apply_statuses(
+            remote, positions, names, remote_pending_changes,
+        )
+        self.percent.extend(0 for _ in added)
+
+        self.names = names
+        self.local = local[:len(names)]
+        self.remote = remote[:len(names)]
+        self.positions = positions
+
+        self.local_counts = [self.local.count(code) for code in
+                             range(len(STATUSES))]
+        self.remote_counts = [self.remote.count(code) for code in
+                              range(len(STATUSES))]
+
+        # Search structures, built on first use
+        self._lock = threading.Lock()
+        self._keys = None
+        self._orders = {}
+        self._ranks = {}
+        self._blob = None
+        self._starts = None
+        self._queries = OrderedDict()
+
+    def __len__(self):
+        return len(self.names)
+
+    def count(self, side, status):
+        """
+        :param side: 'local' or 'remote'
+        :param status: status name, or None for files without a status
+        :return: number of files with that status on that side
+        """
+        counts = self.local_counts if side == 'local' else self.remote_counts
+
+        return counts[STATUS_CODES[status]]
+
+    def has_changes(self, side):
+        """
+        :param side: 'local' or 'remote'
+        :return: True if files were added, removed or changed on that side
+        """
+        return any(
+            self.count(side, status)
+            for status in ('added', 'removed', 'changed')
+        )
+
+    def summary(self):
+        """
+        :return: dictionary of the file count and, per side, the count of \
+                every status
+        """
+        return {
+            'files': len(self),
+            'local': {
+                status: self.local_counts[code]
+                for code, status in enumerate(STATUSES) if status
+            },
+            'remote': {
+                status: self.remote_counts[code]
+                for code, status in enumerate(STATUSES) if status
+            },
+        }
+
+    def row(self, position):
+        """
+        :param position: position of a record
+        :return: row dictionary of the record
+        """
+        percent = self.percent[position]
+        if percent.is_integer():
+            percent = int(percent)
+
+        return dict(zip(ROW_FIELDS, (
+            self.names[position],
+            STATUSES[self.remote[position]],
+            STATUSES[self.local[position]],
+            percent,
+        )))
+
+    def page(self, offset, limit):
+        """
+        :param offset: index of the first row
+        :param limit: maximum number of rows
+        :return: list of row dictionaries
+        """
+        end = min(offset + limit, len(self))
+
+        return [self.row(position) for position in range(offset, end)]
+
+    def changes_since(self, previous):
+        """
+        :param previous: earlier FileIndex of the same drop
+        :return: positions of the records whose status or percent changed, \
+                or None if records were added or removed
+        """
+        if self.names != previous.names:
+            return None
+
+        if (
+            self.percent == previous.percent and
+            self.local == previous.local and
+            self.remote == previous.remote
+        ):
+            return []
+
+        changed = []
+        rows = zip(
+            self.percent, previous.percent,
+            self.local, previous.local,
+            self.remote, previous.remote,
+        )
+        for position, (percent, old_percent, local, old_local,
+                       remote, old_remote) in enumerate(rows):
+            if (
+                percent != old_percent or local != old_local or
+                remote != old_remote
+            ):
+                changed.append(position)
+
+        return changed
+
+    def query(
+        self,
+        text='',
+        prefix=False,
+        local=None,
+        remote=None,
+        sort=None,
+        reverse=False,
+    ):
+        """
+        Searches, filters and sorts the records. Results are cached, so
+        paging through the same query does not repeat it.
+
+        :param text: case insensitive text paths must contain, or start \
+                with if prefix is True
+        :param prefix: match text as a path prefix instead of a substring
+        :param local: local status name records must have, or None
+        :param remote: remote status name records must have, or None
+        :param sort: one of SORT_ORDERS, or None for the index order
+        :param reverse: reverse the order
+        :return: list of matching record positions
+        :raises KeyError: if a status name is unknown
+        :raises ValueError: if sort is unknown
+        """
+        if sort is not None and sort not in SORT_ORDERS:
+            raise ValueError('Unknown sort order {}'.format(sort))
+        local_code = None if local is None else STATUS_CODES[local]
+        remote_code = None if remote is None else STATUS_CODES[remote]
+
+        key = (text.casefold(), prefix, local, remote, sort, reverse)
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+        text = key[0]
+        if not text:
+            positions = None
+        elif prefix:
+            positions = self._match_prefix(text)
+        else:
+            positions = self._match_substring(text)
+
+        if local_code is not None or remote_code is not None:
+            if positions is None:
+                positions = range(len(self))
+            positions = [
+                position for position in positions
+                if (local_code is None or
+                    self.local[position] == local_code) and
+                (remote_code is None or
+                 self.remote[position] == remote_code)
+            ]
+
+        if sort is None:
+            if positions is None:
+                positions = range(len(self))
+            positions = list(positions)
+        elif positions is None:
+            positions = list(self._order(sort))
+        else:
+            positions = sorted(positions, key=self._rank(sort).__getitem__)
+        if reverse:
+            positions.reverse()
+
+        with self._lock:
+            self._queries[key] = positions
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+
+        return positions
+
+    def rows(self, positions, offset, limit):
+        """
+        :param positions: record positions, e.g. from query
+        :param offset: index of the first row in positions
+        :param limit: maximum number of rows
+        :return: list of row dictionaries
+        """
+        return [
+            self.row(position)
+            for position in positions[offset:offset + limit]
+        ]
+
+    def _order(self, sort):
+        """
+        :return: record positions sorted by name or by percent then name
+        """
+        with self._lock:
+            order = self._orders.get(sort)
+        if order is not None:
+            return order
+
+        if sort == 'name':
+            order = self._name_order()
+        else:
+            # Stable sort keeps the name order among equal percents
+            order = sorted(self._name_order(), key=self.percent.__getitem__)
+
+        with self._lock:
+            self._orders[sort] = order
+
+        return order
+
+    def _rank(self, sort):
+        """
+        :return: array of the rank of every record in the sort order
+        """
+        with self._lock:
+            rank = self._ranks.get(sort)
+        if rank is not None:
+            return rank
+
+        rank = array('l', bytes(len(self) * array('l').itemsize))
+        for place, position in enumerate(self._order(sort)):
+            rank[position] = place
+
+        with self._lock:
+            self._ranks[sort] = rank
+
+        return rank
+
+    def _name_order(self):
+        """
+        :return: record positions sorted by case folded name, records whose \
+                names only differ in case stay in index order
+        """
+        if self._keys is None:
+            folded = [name.casefold() for name in self.names]
+            order = sorted(range(len(self)), key=folded.__getitem__)
+            keys = [folded[position] for position in order]
+            # The order is published before the keys that announce it
+            with self._lock:
+                self._orders['name'] = order
+            self._keys = keys
+
+        return self._orders['name']
+
+    def _match_prefix(self, text):
+        """
+        :return: positions of records whose case folded name starts with \
+                text, in name order
+        """
+        order = self._name_order()
+        first = bisect_left(self._keys, text)
+        last = bisect_right(self._keys, text + '\U0010ffff', first)
+
+        return order[first:last]
+
+    def _match_substring(self, text):
+        """
+        :return: positions of records whose case folded name contains text
+        """
+        if '\n' in text:
+            return []
+
+        if self._blob is None:
+            starts = array('l')
+            offset = 0
+            folded = []
+            for name in self.names:
+                starts.append(offset)
+                name = name.casefold()
+                folded.append(name)
+                offset += len(name) + 1
+            self._starts = starts
+            self._blob = '\n'.join(folded)
+
+        blob = self._blob
+        starts = self._starts
+        positions = []
+        found = blob.find(text)
+        while found >= 0:
+            position = bisect_right(starts, found) - 1
+            positions.append(position)
+            # Continue after the end of this name
+            end = blob.find('\n', found)
+            if end < 0:
+                break
+            found = blob.find(text, end + 1)
+
+        return positions
@@ -1,15 +1,92 @@
+import hashlib
+import hmac
+import json
+import logging
+import math
 import platform
+import queue
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import ExitStack
+from itertools import chain
 from os import path
-from os import scandir
 
+import bencode
 from flask import flash
 from flask import Flask
+from flask import g
+from flask import jsonify
+from flask import redirect
 from flask import render_template
 from flask import request
+from flask import Response
+from flask import url_for
 from syncr_backend.constants import FrontendAction
 
+from . import metrics
+from . import profiling
+from .bulk import BulkRunner
+from .bulk import DONE
+from .bulk import FAILED
+from .bulk import SKIPPED
+from .cache import TTLCache
+from .communication import backend_health
+from .communication import send_batch
 from .communication import send_request
+from .communication import send_request_async
+from .constants import BACKEND_WORKERS
+from .constants import BULK_KEEP
+from .constants import BULK_WORKERS
+from .constants import COMPRESS_LEVEL
+from .constants import COMPRESS_MIN_SIZE
+from .constants import DIRECTORY_CACHE_SIZE
+from .constants import DIRECTORY_PAGE_SIZE
+from .constants import DIRECTORY_PREFETCH
+from .constants import DIRECTORY_PREFETCH_WORKERS
+from .constants import DROP_LIST_CACHE_TTL
+from .constants import DROP_STAMP_TTL
+from .constants import DROP_STATE_CACHE_TTL
+from .constants import FAN_OUT_DEADLINE
+from .constants import FILE_INDEX_CACHE_TTL
+from .constants import FILE_PAGE_MAX
+from .constants import FILE_PAGE_SIZE
+from .constants import JOB_KEEP
+from .constants import JOB_QUEUE_SIZE
+from .constants import JOB_WORKERS
+from .constants import LIVE_BUSY_RETRY
+from .constants import LIVE_KEEPALIVE
+from .constants import LIVE_MAX_STREAMS
+from .constants import LIVE_POLL_INTERVAL
+from .constants import LIVE_QUEUE_SIZE
+from .constants import LIVE_STREAM_DURATION
+from .constants import PREFETCH_MAX_INTERVAL
+from .constants import PREFETCH_MIN_INTERVAL
+from .constants import PREFETCH_RECENT
+from .constants import PREFETCH_WORKERS
+from .constants import PROFILE_HEADER
+from .constants import PROFILE_INTERVAL
+from .constants import STATIC_CACHE_SIZE
+from .constants import STATIC_MAX_AGE
+from .directory import DirectoryLister
+from .file_index import FileIndex
+from .jobs import CANCELLED
+from .jobs import JobQueue
+from .jobs import QueueFull
+from .live import LiveUpdates
+from .live import StreamLimit
+from .prefetch import Prefetcher
+from .responses import choose_encoding
+from .responses import compress_response
+from .responses import CompressedCache
+from .responses import content_etag
+from .responses import Fingerprints
+from .responses import is_compressible
+from .responses import tag_encoding
+from .shared_cache import SharedCache
+from .singleflight import SingleFlight
 
 app = Flask(__name__)  # create the application instance
 app.config.from_object(__name__)  # load config from this file , frontend.py
@@ -18,34 +95,259 @@ app.config.from_object(__name__)  # load config from this file , frontend.py
 app.config.update(dict(
     SECRET_KEY='development key',
     TEMPLATES_AUTO_RELOAD=True,
+    DROP_LIST_CACHE_TTL=DROP_LIST_CACHE_TTL,
+    DROP_STATE_CACHE_TTL=DROP_STATE_CACHE_TTL,
+    DROP_STAMP_TTL=DROP_STAMP_TTL,
+    FILE_INDEX_CACHE_TTL=FILE_INDEX_CACHE_TTL,
+    FILE_PAGE_SIZE=FILE_PAGE_SIZE,
+    FILE_PAGE_MAX=FILE_PAGE_MAX,
+    DIRECTORY_PAGE_SIZE=DIRECTORY_PAGE_SIZE,
+    LIVE_POLL_INTERVAL=LIVE_POLL_INTERVAL,
+    LIVE_KEEPALIVE=LIVE_KEEPALIVE,
+    LIVE_STREAM_DURATION=LIVE_STREAM_DURATION,
+    LIVE_MAX_STREAMS=LIVE_MAX_STREAMS,
+    LIVE_BUSY_RETRY=LIVE_BUSY_RETRY,
+    COMPRESS=True,
+    COMPRESS_MIN_SIZE=COMPRESS_MIN_SIZE,
+    COMPRESS_LEVEL=COMPRESS_LEVEL,
+    STATIC_MAX_AGE=STATIC_MAX_AGE,
+    METRICS=True,
+    PREFETCH=True,
+    PREFETCH_PINNED=[],
+    PROFILING=False,
+    PROFILING_TOKEN=None,
+    PROFILE_DIR=path.join(tempfile.gettempdir(), 'syncr-profiles'),
+    CACHE_DIR=None,
 ))
 app.config.from_envvar('SYNCR_SETTINGS', silent=True)
 
 # Global Variables
-curr_action = ''
-current_drop_path = ''
-testing = False
 home_path = path.expanduser('~')[1:]
 
+# Read-only requests whose concurrent duplicates are coalesced
+COALESCED_ACTIONS = frozenset([
+    FrontendAction.GET_OWNED_SUBSCRIBED_DROPS,
+    FrontendAction.GET_SELECTED_DROP,
+    FrontendAction.GET_PENDING_CHANGES,
+    FrontendAction.GET_PUBLIC_KEY,
+])
+
+logger = logging.getLogger(__name__)
+backend_executor = ThreadPoolExecutor(max_workers=BACKEND_WORKERS)
+backend_flight = SingleFlight()
+file_index_cache = TTLCache(app.config['FILE_INDEX_CACHE_TTL'])
+directory_lister = DirectoryLister(
+    DIRECTORY_CACHE_SIZE,
+    prefetch=DIRECTORY_PREFETCH,
+    workers=DIRECTORY_PREFETCH_WORKERS,
+)
+static_fingerprints = Fingerprints(app.static_folder)
+static_bodies = CompressedCache(STATIC_CACHE_SIZE)
+bulk_runner = BulkRunner(BULK_WORKERS, TTLCache(BULK_KEEP))
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_SIZE, TTLCache(JOB_KEEP))
+drop_list_cache = None
+drop_state_cache = None
+drop_stamp_cache = None
+drop_invalidation_cache = None
+
+
+def make_cache(namespace, ttl):
+    """
+    :param namespace: name of the cache
+    :param ttl: seconds an entry stays valid
+    :return: cache shared by all worker processes if CACHE_DIR is \
+            configured, otherwise an in-process cache
+    """
+    if app.config['CACHE_DIR']:
+        return SharedCache(app.config['CACHE_DIR'], namespace, ttl)
+
+    return TTLCache(ttl)
+
+
+def configure_caches():
+    """
+    Creates the frontend caches from the app config, and the stores of
+    the background work that every worker process reports. Call again
+    after changing the cache settings.
+    """
+    global drop_list_cache, drop_state_cache, drop_stamp_cache
+    global drop_invalidation_cache
+
+    drop_list_cache = make_cache(
+        'drop_list', app.config['DROP_LIST_CACHE_TTL'],
+    )
+    drop_state_cache = make_cache(
+        'drop_state', app.config['DROP_STATE_CACHE_TTL'],
+    )
+    # Outlives the replies, so unchanged API polls skip the backend
+    drop_stamp_cache = make_cache(
+        'drop_stamp', app.config['DROP_STAMP_TTL'],
+    )
+    # Kept as long as a warm state of the prefetcher may be served
+    drop_invalidation_cache = make_cache(
+        'drop_invalidation', 2 * PREFETCH_MAX_INTERVAL,
+    )
+    bulk_runner.store = make_cache('bulk', BULK_KEEP)
+    job_queue.store = make_cache('jobs', JOB_KEEP)
+
+
+configure_caches()
+
+
+def configure_metrics():
+    """
+    Turns the recording of metrics on or off from the app config
+    """
+    metrics.enabled = app.config['METRICS']
+
+
+configure_metrics()
+
 # Backend Access Functions
 
 
 def send_message(message):
     """
     Sends given message to backend. Waits for a response
-    or until TIMEOUT
+    or until TIMEOUT. Identical read-only requests that are in flight at the
+    same time share one backend round trip and its response.
 
     :param message: message sent to backend
     :return: response from server
     """
 
+    coalesce = message['action'] in COALESCED_ACTIONS
     message['action'] = str(message['action'])
 
-    response = send_request(message)
+    if coalesce:
+        key = bencode.encode(message)
+        response = backend_flight.do(key, lambda: send_request(message))
+    else:
+        response = send_request(message)
 
     return response
 
 
+def send_messages(messages):
+    """
+    Sends several messages to backend in one batch and waits for the
+    responses. Backends without batch support get the messages one at a
+    time, in order.
+
+    :param messages: list of messages sent to backend
+    :return: list of responses from server, in order
+    """
+
+    for message in messages:
+        message['action'] = str(message['action'])
+
+    return send_batch(messages)
+
+
+def report_batch(items, responses, done, failed):
+    """
+    Records the outcome of each item of a batch for FrontendHook and
+    summarizes them for the page
+
+    :param items: IDs the batch acted on
+    :param responses: backend response for each item
+    :param done: message for a batch without errors, formatted with the \
+            number of items
+    :param failed: prefix of the message listing the failed items
+    :return: message describing the result
+    """
+
+    results = [
+        {
+            'id': item,
+            'success': bool(response.get('success')),
+            'message': response.get('message'),
+        }
+        for item, response in zip(items, responses)
+    ]
+    g.batch_results = results
+
+    errors = [result for result in results if not result['success']]
+    if not errors:
+        return done.format(len(results))
+
+    return '{} of {} failed. {}: {}'.format(
+        len(errors),
+        len(results),
+        failed,
+        '; '.join(
+            '{} ({})'.format(result['id'], result['message'])
+            for result in errors
+        ),
+    )
+
+
+def split_ids(text):
+    """
+    :param text: IDs separated by commas or whitespace
+    :return: list of the IDs without duplicates, in order
+    """
+
+    return list(dict.fromkeys(text.replace(',', ' ').split()))
+
+
+async def send_message_async(message, timeout=None):
+    """
+    Sends given message to backend from a coroutine, e.g. an async view of
+    an ASGI deployment. Waits for a response or until timeout.
+
+    :param message: message sent to backend
+    :param timeout: deadline in seconds for this request, defaults to the \
+            timeout of the action
+    :return: response from server
+    """
+
+    message['action'] = str(message['action'])
+
+    response = await send_request_async(message, timeout)
+
+    return response
+
+
+def fetch_concurrently(calls, deadline=FAN_OUT_DEADLINE):
+    """
+    Issues independent backend calls concurrently with one combined deadline
+
+    :param calls: dictionary of name to tuple of (function, *args)
+    :param deadline: seconds to wait for all of the calls together
+    :return: tuple of (results, timings) dictionaries keyed by call name. \
+            Calls that miss the deadline have a result and timing of None.
+    """
+
+    profile = profiling.current()
+
+    def timed(func, *args):
+        with profiling.attached(profile, 'backend'):
+            start = time.perf_counter()
+            result = func(*args)
+            return result, time.perf_counter() - start
+
+    futures = {
+        name: backend_executor.submit(timed, *call)
+        for name, call in calls.items()
+    }
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    timings = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name], timings[name] = future.result()
+        else:
+            future.cancel()
+            results[name], timings[name] = None, None
+            logger.warning('Backend call %s missed the deadline', name)
+
+    logger.debug('Backend call timings: %s', timings)
+
+    return results, timings
+
+
 def open_file_location(file_path):
     """
     Opens the location of the file
@@ -64,18 +366,70 @@ def open_file_location(file_path):
         subprocess.Popen(['open', file_path])
 
 
+def reply_stamp(reply):
+    """
+    :param reply: bencodable backend reply
+    :return: digest of the reply, equal for replies of the same content
+    """
+    return hashlib.blake2b(bencode.encode(reply), digest_size=16).hexdigest()
+
+
 def get_owned_subscribed_drops():
     """
+    Served from drop_list_cache while it is fresh
+
     :return: Gets a tuple of of dictionaries in format (owned drop dict, \
             subscribed drop dict)
     """
+
+    return get_stamped_drop_lists()[0]
+
+
+def get_stamped_drop_lists():
+    """
+    Like get_owned_subscribed_drops, with the stamp of the reply
+
+    :return: tuple of the drop lists and their stamp, both None if the \
+            backend did not provide them
+    """
+    entry = drop_list_cache.get('requested_drops_tuple')
+    if entry is not None:
+        return entry['drops'], entry['stamp']
+
     message = {
         'action': FrontendAction.GET_OWNED_SUBSCRIBED_DROPS,
     }
 
     response = send_message(message)
+    drops = response.get('requested_drops_tuple')
+    if drops is None:
+        return None, None
+
+    stamp = reply_stamp(drops)
+    drop_list_cache.set(
+        'requested_drops_tuple', {'drops': drops, 'stamp': stamp},
+    )
+    drop_stamp_cache.set('requested_drops_tuple', stamp)
+
+    return drops, stamp
+
+
+def get_drop_list_stamp():
+    """
+    :return: stamp of the last drop lists fetched by any worker process \
+            in the last DROP_STAMP_TTL seconds, or None
+    """
 
-    return response.get('requested_drops_tuple')
+    return drop_stamp_cache.get('requested_drops_tuple')
+
+
+def invalidate_drop_list():
+    """
+    Drops the cached owned/subscribed drop lists after an action that
+    changes them
+    """
+    drop_list_cache.invalidate()
+    drop_stamp_cache.invalidate('requested_drops_tuple')
 
 
 # Return dictionary for selected drop
@@ -84,29 +438,465 @@ def get_selected_drop(drop_id):
     :param drop_id: Selected drop
     :return: Dictionary for selected drop
     """
+
+    return get_drop_state(drop_id, FrontendAction.GET_SELECTED_DROP)
+
+
+def get_pending_changes(drop_id):
+    """
+    :param drop_id: Selected drop
+    :return: Dictionary for selected drop with its local and remote \
+            pending changes
+    """
+
+    return get_drop_state(drop_id, FrontendAction.GET_PENDING_CHANGES)
+
+
+def get_drop_state(drop_id, action, refresh=False):
+    """
+    Requests a drop from the backend, served from drop_state_cache while
+    it is fresh
+
+    :param drop_id: Selected drop
+    :param action: GET_SELECTED_DROP or GET_PENDING_CHANGES
+    :param refresh: ask the backend even if the cached drop is fresh
+    :return: requested drop dictionary from the backend
+    """
+
+    return get_stamped_drop_state(drop_id, action, refresh)[0]
+
+
+def get_stamped_drop_state(drop_id, action, refresh=False):
+    """
+    Like get_drop_state, with the stamp of the reply. The stamp is kept
+    with the reply in drop_state_cache, so every worker process reading
+    the cached reply sees the same stamp.
+
+    :param drop_id: Selected drop
+    :param action: GET_SELECTED_DROP or GET_PENDING_CHANGES
+    :param refresh: ask the backend even if the cached drop is fresh
+    :return: tuple of the requested drop dictionary and its stamp, both \
+            None if the backend did not provide it
+    """
+    key = '{}:{}'.format(action, drop_id)
+    entry = None if refresh else drop_state_cache.get(key)
+    if entry is not None:
+        return entry['drop'], entry['stamp']
+
     message = {
         'drop_id': drop_id,
-        'action': FrontendAction.GET_SELECTED_DROP,
+        'action': action,
     }
 
     response = send_message(message)
 
     drop = response.get('requested_drops')
+    if drop is None:
+        return None, None
 
-    return drop
+    stamp = reply_stamp(drop)
+    drop_state_cache.set(key, {'drop': drop, 'stamp': stamp})
+    drop_stamp_cache.set(key, stamp)
 
+    return drop, stamp
 
-def get_pending_changes(drop_id):
-    message = {
+
+def get_drop_stamp(drop_id, action):
+    """
+    :param drop_id: Selected drop
+    :param action: GET_SELECTED_DROP or GET_PENDING_CHANGES
+    :return: stamp of the last reply to the action fetched by any worker \
+            process in the last DROP_STAMP_TTL seconds, or None
+    """
+
+    return drop_stamp_cache.get('{}:{}'.format(action, drop_id))
+
+
+def invalidate_drop(drop_id):
+    """
+    Drops the cached state of a drop after an action that changes it
+
+    :param drop_id: ID of the changed drop
+    """
+    for action in (
+        FrontendAction.GET_SELECTED_DROP,
+        FrontendAction.GET_PENDING_CHANGES,
+    ):
+        drop_state_cache.invalidate('{}:{}'.format(action, drop_id))
+        drop_stamp_cache.invalidate('{}:{}'.format(action, drop_id))
+    file_index_cache.invalidate(drop_id)
+    # Milliseconds as the shared cache does not store floats, rounded up
+    # so warm states fetched before are never taken as newer
+    drop_invalidation_cache.set(drop_id, math.ceil(time.time() * 1000))
+    prefetcher.invalidate(drop_id)
+
+
+def drop_invalidated_at(drop_id):
+    """
+    :param drop_id: ID of the drop
+    :return: time.time() any worker process last invalidated the drop, \
+            or None
+    """
+    invalidated = drop_invalidation_cache.get(drop_id)
+    if invalidated is None:
+        return None
+
+    return invalidated / 1000
+
+
+def get_file_index(drop_id, selected_drop_info=None, stamp=None):
+    """
+    Gets the merged file table of a drop. It is built once per backend
+    reply and kept in file_index_cache under the stamp of the reply, so
+    pages of it are cheap slices.
+
+    :param drop_id: ID of the drop
+    :param selected_drop_info: reply the caller already fetched, or None \
+            to reuse the cached index or fetch the pending changes
+    :param stamp: stamp of selected_drop_info. The index of a reply \
+            without one, such as from GET_SELECTED_DROP, which has no \
+            pending changes, is not kept.
+    :return: FileIndex of the drop, or None if the pending changes could \
+            not be fetched
+    """
+    entry = file_index_cache.get(drop_id)
+
+    if selected_drop_info is None:
+        if entry is not None:
+            return entry[1]
+        selected_drop_info, stamp = get_stamped_drop_state(
+            drop_id, FrontendAction.GET_PENDING_CHANGES,
+        )
+        if selected_drop_info is None:
+            # Not cached, so the next request asks the backend again
+            return None
+    elif entry is not None and stamp is not None and entry[0] == stamp:
+        return entry[1]
+
+    file_index = FileIndex(selected_drop_info)
+    if stamp is not None:
+        file_index_cache.set(drop_id, (stamp, file_index))
+
+    return file_index
+
+
+def poll_file_index(drop_id):
+    """
+    Gets the file index of a drop for the live update pollers. Going
+    through the drop state cache bounds the backend load to one request
+    per cache TTL, shared by all worker processes if the cache is.
+
+    :param drop_id: ID of the drop
+    :return: FileIndex of the drop, or None if the backend has no state \
+            for it
+    """
+    selected_drop_info, stamp = get_stamped_drop_state(
+        drop_id, FrontendAction.GET_PENDING_CHANGES,
+    )
+    if selected_drop_info is None:
+        return None
+
+    return get_file_index(drop_id, selected_drop_info, stamp)
+
+
+def prefetch_drop_state(drop_id):
+    """
+    Fetches the pending changes of a drop for the prefetcher, refreshing
+    the drop state cache and the file index on the way
+
+    :param drop_id: ID of the drop
+    :return: tuple of the pending changes, their stamp and their \
+            FileIndex, or None if the backend has no state for the drop
+    """
+    selected_drop_info, stamp = get_stamped_drop_state(
+        drop_id, FrontendAction.GET_PENDING_CHANGES, refresh=True,
+    )
+    if selected_drop_info is None:
+        return None
+
+    return (
+        selected_drop_info,
+        stamp,
+        get_file_index(drop_id, selected_drop_info, stamp),
+    )
+
+
+def drop_state_changed(previous, current):
+    """
+    :param previous: earlier result of prefetch_drop_state
+    :param current: later result of prefetch_drop_state
+    :return: True if files were added or removed or their status changed
+    """
+    positions = current[2].changes_since(previous[2])
+
+    return positions is None or bool(positions)
+
+
+def list_drop_ids():
+    """
+    :return: IDs of the owned and subscribed drops
+    """
+    drops = get_owned_subscribed_drops() or ([], [])
+
+    return [drop['drop_id'] for drop in chain(*drops)]
+
+
+prefetcher = Prefetcher(
+    prefetch_drop_state,
+    drop_state_changed,
+    list_drop_ids,
+    drop_invalidated_at,
+    PREFETCH_WORKERS,
+    PREFETCH_MIN_INTERVAL,
+    PREFETCH_MAX_INTERVAL,
+    PREFETCH_RECENT,
+)
+for pinned_drop_id in app.config['PREFETCH_PINNED']:
+    prefetcher.pin(pinned_drop_id)
+
+
+def get_warm_pending_changes(drop_id):
+    """
+    Gets the pending changes of a viewed drop, served by the prefetcher
+    while it keeps the drop warm
+
+    :param drop_id: ID of the drop
+    :return: tuple of the pending changes, their stamp and the time they \
+            were fetched, None unless the prefetcher keeps them
+    """
+    if app.config['PREFETCH']:
+        prefetcher.touch(drop_id)
+        warm = prefetcher.get(drop_id)
+        if warm is not None:
+            (selected_drop_info, stamp, _), fetched_at = warm
+            return selected_drop_info, stamp, fetched_at
+
+    selected_drop_info, stamp = get_stamped_drop_state(
+        drop_id, FrontendAction.GET_PENDING_CHANGES,
+    )
+    fetched_at = None
+    if app.config['PREFETCH'] and selected_drop_info is not None:
+        fetched_at = prefetcher.put(drop_id, (
+            selected_drop_info,
+            stamp,
+            get_file_index(drop_id, selected_drop_info, stamp),
+        ))
+
+    return selected_drop_info, stamp, fetched_at
+
+
+live_updates = LiveUpdates(
+    poll_file_index,
+    app.config['LIVE_POLL_INTERVAL'],
+    queue_size=LIVE_QUEUE_SIZE,
+    max_delta=FILE_PAGE_MAX,
+)
+live_streams = StreamLimit()
+
+
+def backend_outcome(response):
+    """
+    :param response: response of the backend to an action
+    :return: tuple of the bulk state and the message of the response
+    """
+
+    if response.get('status') == 'error' or response.get('success') is False:
+        return FAILED, response.get('message')
+
+    return DONE, response.get('message')
+
+
+def job_new_version(drop_id):
+    """
+    Tells backend to create new version from changed files, run as a job
+
+    :param drop_id: drop to create new version for
+    :return: tuple of the job state and the message of the backend
+    """
+    response = send_message({
+        'action': FrontendAction.NEW_VERSION,
         'drop_id': drop_id,
-        'action': FrontendAction.GET_PENDING_CHANGES,
+    })
+    invalidate_drop(drop_id)
+
+    return backend_outcome(response)
+
+
+def job_sync_update(drop_id):
+    """
+    Tells backend to sync updates from changed remote files, run as a job
+
+    :param drop_id: drop to sync updates for
+    :return: tuple of the job state and the message of the backend
+    """
+    response = send_message({
+        'action': FrontendAction.SYNC_UPDATE,
+        'drop_id': drop_id,
+    })
+    invalidate_drop(drop_id)
+
+    return backend_outcome(response)
+
+
+# Actions run as background jobs by name
+JOB_ACTIONS = {
+    'new_version': job_new_version,
+    'sync_update': job_sync_update,
+}
+
+
+def submit_job(action, drop_id):
+    """
+    :param action: name of the action in JOB_ACTIONS
+    :param drop_id: ID of the drop
+    :return: tuple of the status of the job, or None if the queue is \
+            full, and a message. The job is the previous one of the action \
+            if it has not released the drop yet, and may have finished.
+    """
+    try:
+        job = job_queue.submit(action, drop_id, JOB_ACTIONS[action])
+    except QueueFull:
+        return None, 'Too many actions are waiting, try again later'
+
+    if job['state'] == CANCELLED:
+        return job, job['message']
+    if job['state'] == DONE:
+        return job, 'Just finished: {}'.format(job['message'] or 'Done')
+    if job['state'] == FAILED:
+        return job, 'Just failed: {}'.format(job['message'] or 'Failed')
+
+    return job, 'Started in the background'
+
+
+def run_job(action, drop_id):
+    """
+    Runs an action as a job and waits for it, so it is never performed
+    twice at the same time
+
+    :param action: name of the action in JOB_ACTIONS
+    :param drop_id: ID of the drop
+    :return: tuple of the bulk state and a message
+    """
+    job, message = submit_job(action, drop_id)
+    if job is None:
+        return FAILED, message
+
+    status = job_queue.wait(job['id'])
+    if status is None:
+        return FAILED, 'Job was forgotten'
+    if status['state'] == CANCELLED:
+        return SKIPPED, status['message']
+
+    return status['state'], status['message']
+
+
+def bulk_new_version(drop_id):
+    """
+    Creates a new version of a drop with local changes
+
+    :param drop_id: ID of an owned drop
+    :return: tuple of the bulk state and a message
+    """
+    file_index = poll_file_index(drop_id)
+    if file_index is None:
+        return FAILED, 'Drop state unavailable'
+    if not file_index.has_changes('local'):
+        return SKIPPED, 'No local changes'
+
+    return run_job('new_version', drop_id)
+
+
+def bulk_sync_update(drop_id):
+    """
+    Downloads the remote updates of a drop
+
+    :param drop_id: ID of the drop
+    :return: tuple of the bulk state and a message
+    """
+    file_index = poll_file_index(drop_id)
+    if file_index is None:
+        return FAILED, 'Drop state unavailable'
+    if not file_index.has_changes('remote'):
+        return SKIPPED, 'No remote updates'
+
+    return run_job('sync_update', drop_id)
+
+
+def bulk_unsubscribe(drop_id):
+    """
+    :param drop_id: ID of a subscribed drop
+    :return: tuple of the bulk state and a message
+    """
+    response = send_message({
+        'action': FrontendAction.UNSUBSCRIBE,
+        'drop_id': drop_id,
+    })
+    invalidate_drop_list()
+    invalidate_drop(drop_id)
+
+    return backend_outcome(response)
+
+
+def bulk_share(drop_id):
+    """
+    :param drop_id: ID of the drop
+    :return: tuple of the bulk state and the download code
+    """
+
+    return DONE, 'Download Code: ' + drop_id
+
+
+# Bulk actions by name: title, function, drops it applies to, and whether
+# it applies to all of them if none are selected
+BULK_ACTIONS = {
+    'new_version': ('New Version', bulk_new_version, 'owned', True),
+    'sync_update': ('Download Updates', bulk_sync_update, 'all', True),
+    'share': ('Share', bulk_share, 'all', True),
+    'unsubscribe': ('Unsubscribe', bulk_unsubscribe, 'subscribed', False),
+}
+
+
+def query_file_table(file_index, args):
+    """
+    :param file_index: FileIndex of a drop
+    :param args: request arguments offset, limit, q, match, local, remote, \
+            sort and order
+    :return: dictionary of the total row count of the query, the offset and \
+            the rows of the page
+    :raises KeyError: if a status is unknown
+    :raises ValueError: if the sort order is unknown
+    """
+    offset = max(args.get('offset', 0, type=int), 0)
+    limit = args.get('limit', app.config['FILE_PAGE_SIZE'], type=int)
+    limit = min(max(limit, 0), app.config['FILE_PAGE_MAX'])
+
+    positions = file_index.query(
+        text=args.get('q', ''),
+        prefix=args.get('match') == 'prefix',
+        local=args.get('local') or None,
+        remote=args.get('remote') or None,
+        sort=args.get('sort') or None,
+        reverse=args.get('order') == 'desc',
+    )
+
+    return {
+        'total': len(positions),
+        'offset': offset,
+        'rows': file_index.rows(positions, offset, limit),
     }
 
-    response = send_message(message)
 
-    drop = response.get('requested_drops')
+def warm_up():
+    """
+    Fills the caches with the drop lists and the pending changes of every
+    drop, e.g. before a server starts taking requests
+    """
+    drops = get_owned_subscribed_drops()
+    if drops is None:
+        return
 
-    return drop
+    for drop in chain(*drops):
+        get_pending_changes(drop.get('drop_id'))
 
 
 def is_in_drop_list(drop_id, drop_list):
@@ -167,14 +957,29 @@ def get_file_name(file_path):
 
 def set_curr_action(action_update):
     """
-    Sets the global variable to the current pressed
-    button
+    Sets the current pressed button for this request
 
     :param action_update: name of action
     """
 
-    global curr_action
-    curr_action = action_update
+    g.curr_action = action_update
+
+
+def get_curr_action():
+    """
+    :return: name of the action set for this request, if any
+    """
+
+    return g.get('curr_action', '')
+
+
+def is_testing():
+    """
+    :return: True if this request was made through FrontendHook and should \
+            return data instead of a rendered page
+    """
+
+    return g.get('testing', False)
 
 
 @app.route('/create_drop/<path:current_path>')
@@ -246,6 +1051,7 @@ def initialize_drop(drop_path):
         }
 
         response = send_message(message)
+        invalidate_drop_list()
         message = response.get('message')
 
         if response.get('success'):
@@ -281,12 +1087,51 @@ def input_drop_to_subscribe(drop_code=None, drop_path=None):
     }
 
     response = send_message(message)
+    invalidate_drop_list()
+    invalidate_drop(result)
     return show_drops(
         result,
         response.get('message'),
     )
 
 
+@app.route('/subscribe_many', methods=['POST'])
+def input_drops_to_subscribe(drop_codes=None, drop_path=None):
+    """
+    Subscribes to several drops in one batch, saving them in the same
+    directory
+
+    :param drop_codes: list of drop IDs, read from the form if None
+    :param drop_path: directory to save the drops in
+    :return: Message sent to frontend.
+    """
+    if drop_codes is None:
+        drop_codes = split_ids(request.form.get('drops_to_subscribe_to', ''))
+        drop_path = request.form['drop_path']
+
+    responses = send_messages([
+        {
+            'action': FrontendAction.INPUT_DROP_TO_SUBSCRIBE_TO,
+            'drop_id': drop_code,
+            'directory': '/' + drop_path,
+        }
+        for drop_code in drop_codes
+    ])
+    invalidate_drop_list()
+    for drop_code in drop_codes:
+        invalidate_drop(drop_code)
+
+    return show_drops(
+        None,
+        report_batch(
+            drop_codes,
+            responses,
+            'Subscribed to {} drops',
+            'Error subscribing to',
+        ),
+    )
+
+
 @app.route('/share_drop/<drop_id>')
 def share_drop(drop_id):
     """
@@ -324,6 +1169,7 @@ def add_owner(drop_id, owner_id=None):
     }
 
     response = send_message(message)
+    invalidate_drop(drop_id)
     message = response.get('message')
 
     if response.get('success'):
@@ -350,6 +1196,7 @@ def remove_owner(drop_id, owner_id):
     }
 
     response = send_message(message)
+    invalidate_drop(drop_id)
     message = response.get('message')
 
     if response.get('success'):
@@ -360,6 +1207,72 @@ def remove_owner(drop_id, owner_id):
     return view_owners(drop_id, message)
 
 
+@app.route('/view_owners/<drop_id>/add_many', methods=['POST'])
+def add_owners(drop_id, owner_ids=None):
+    """
+    Communicate with backend to add several owners to specified drop in
+    one batch
+
+    :param drop_id: ID of drop
+    :param owner_ids: list of owner IDs, read from the form if None
+    """
+    if owner_ids is None:
+        owner_ids = split_ids(request.form.get('owner_ids', ''))
+
+    responses = send_messages([
+        {
+            'drop_id': drop_id,
+            'owner_id': owner_id,
+            'action': FrontendAction.ADD_OWNER,
+        }
+        for owner_id in owner_ids
+    ])
+    invalidate_drop(drop_id)
+
+    return view_owners(
+        drop_id,
+        report_batch(
+            owner_ids,
+            responses,
+            'Successfully added {} owners',
+            'Error adding owners',
+        ),
+    )
+
+
+@app.route('/view_owners/<drop_id>/remove_many', methods=['POST'])
+def remove_owners(drop_id, owner_ids=None):
+    """
+    Communicate with backend to remove several owners from specified drop
+    in one batch
+
+    :param drop_id: ID of drop
+    :param owner_ids: list of owner IDs, read from the form if None
+    """
+    if owner_ids is None:
+        owner_ids = request.form.getlist('owner_id')
+
+    responses = send_messages([
+        {
+            'drop_id': drop_id,
+            'owner_id': owner_id,
+            'action': FrontendAction.REMOVE_OWNER,
+        }
+        for owner_id in owner_ids
+    ])
+    invalidate_drop(drop_id)
+
+    return view_owners(
+        drop_id,
+        report_batch(
+            owner_ids,
+            responses,
+            'Successfully removed {} owners',
+            'Error removing owners',
+        ),
+    )
+
+
 @app.route('/view_owners/<drop_id>')
 def view_owners(drop_id, message=None):
     """
@@ -403,6 +1316,8 @@ def delete_drop(drop_id):
     }
 
     response = send_message(message)
+    invalidate_drop_list()
+    invalidate_drop(drop_id)
     result = response.get('message')
 
     if response.get('success') is True:
@@ -411,6 +1326,120 @@ def delete_drop(drop_id):
         return show_drop(drop_id, result)
 
 
+@app.route('/delete_drops', methods=['POST'])
+def delete_drops(drop_ids=None):
+    """
+    Sends the 'delete drop' message for several drops to backend in one
+    batch
+
+    :param drop_ids: list of drop IDs, read from the form if None
+    :return: drops are removed from backend and frontend
+    """
+
+    set_curr_action('delete drop')
+
+    if drop_ids is None:
+        drop_ids = request.form.getlist('drop_id')
+
+    responses = send_messages([
+        {
+            'drop_id': drop_id,
+            'action': FrontendAction.DELETE_DROP,
+        }
+        for drop_id in drop_ids
+    ])
+    invalidate_drop_list()
+    for drop_id in drop_ids:
+        invalidate_drop(drop_id)
+
+    return show_drop(
+        None,
+        report_batch(
+            drop_ids,
+            responses,
+            'Deleted {} drops',
+            'Error deleting',
+        ),
+    )
+
+
+@app.route('/bulk/<action>', methods=['POST'])
+def start_bulk(action):
+    """
+    Starts a bulk action over the selected drops in the background and
+    shows its progress
+
+    :param action: name of the action in BULK_ACTIONS
+    :return: redirect to the progress page
+    """
+    if action not in BULK_ACTIONS:
+        return show_drop(None, 'Unknown bulk action')
+    title, perform, applies_to, default_all = BULK_ACTIONS[action]
+
+    owned, subscribed = get_owned_subscribed_drops() or ([], [])
+    if applies_to == 'owned':
+        drops = owned
+    elif applies_to == 'subscribed':
+        drops = subscribed
+    else:
+        drops = owned + subscribed
+    drop_ids = [drop['drop_id'] for drop in drops]
+
+    selected = set(request.form.getlist('drop_id'))
+    if selected:
+        drop_ids = [drop_id for drop_id in drop_ids if drop_id in selected]
+    elif not default_all:
+        drop_ids = []
+
+    if not drop_ids:
+        return show_drop(None, 'No drops selected for ' + title)
+
+    run = bulk_runner.start(action, drop_ids, perform)
+
+    return redirect(url_for('show_bulk', run_id=run.id))
+
+
+@app.route('/bulk/run/<run_id>')
+def show_bulk(run_id):
+    """
+    Shows the progress of a bulk action, updated while it runs
+
+    :param run_id: ID of the bulk run
+    """
+    progress = bulk_runner.progress(run_id)
+    if progress is None:
+        return show_drop(None, 'Bulk action not found')
+
+    drop_tups = get_owned_subscribed_drops() or ([], [])
+    names = {
+        drop['drop_id']: drop.get('name', drop['drop_id'])
+        for drop in chain(*drop_tups)
+    }
+
+    return render_template(
+        'bulk.html',
+        owned=drop_tups[0],
+        subscribed=drop_tups[1],
+        directory=home_path,
+        title=BULK_ACTIONS[progress['action']][0],
+        progress=progress,
+        names=names,
+    )
+
+
+@app.route('/bulk/run/<run_id>/status')
+def bulk_status(run_id):
+    """
+    :param run_id: ID of the bulk run
+    :return: progress of the bulk run as JSON
+    """
+    progress = bulk_runner.progress(run_id)
+    if progress is None:
+        return jsonify(message='Bulk action not found'), 404
+
+    return jsonify(progress)
+
+
 @app.route('/unsubscribe/<drop_id>')
 def unsubscribe(drop_id):
     """
@@ -428,6 +1457,8 @@ def unsubscribe(drop_id):
     }
 
     response = send_message(message)
+    invalidate_drop_list()
+    invalidate_drop(drop_id)
     result = response.get('message')
 
     if response.get('success') is True:
@@ -440,22 +1471,18 @@ def unsubscribe(drop_id):
 def new_version(drop_id):
     """
     Tells backend to create new version from
-    changed files for specified drop
+    changed files for specified drop. Runs as a background job, so the
+    page returns before the backend finished.
 
     :param drop_id: drop to create new version for
-    :return: renders web page based off backend response
+    :return: renders web page showing the job
     """
 
-    message = {
-        'action': FrontendAction.NEW_VERSION,
-        'drop_id': drop_id,
-    }
-
-    response = send_message(message)
+    _, message = submit_job('new_version', drop_id)
 
     return show_drop(
         drop_id,
-        response.get('message'),
+        message,
     )
 
 
@@ -463,19 +1490,14 @@ def new_version(drop_id):
 def sync_update(drop_id):
     """
     Tells backend to sync updates from
-    changed remote files
+    changed remote files. Runs as a background job, so the page returns
+    before the backend finished.
 
     :param drop_id: drop to sync updates for
-    :return: renders web page based off backend response
+    :return: renders web page showing the job
     """
 
-    message = {
-        'action': FrontendAction.SYNC_UPDATE,
-        'drop_id': drop_id,
-    }
-
-    response = send_message(message)
-    message = response.get('message')
+    _, message = submit_job('sync_update', drop_id)
 
     return show_drop(
         drop_id,
@@ -483,6 +1505,78 @@ def sync_update(drop_id):
     )
 
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    :param job_id: ID of a background job
+    :return: state of the job as JSON
+    """
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify(message='Job not found'), 404
+
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancels a background job
+
+    :param job_id: ID of a background job
+    :return: renders the page of the job's drop
+    """
+    status = job_queue.cancel(job_id)
+    if status is None:
+        return show_drop(None, 'Job not found')
+
+    return show_drop(status['drop_id'], status['message'])
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Streams the state of a background job as server-sent events until it
+    finished
+
+    :param job_id: ID of a background job
+    :return: text/event-stream response, or 503 if too many streams are \
+            open
+    """
+    if job_queue.status(job_id) is None:
+        return jsonify(message='Job not found'), 404
+
+    keepalive = app.config['LIVE_KEEPALIVE']
+    duration = app.config['LIVE_STREAM_DURATION']
+
+    def stream():
+        end = time.monotonic() + duration
+        version = None
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            if version is None:
+                status = job_queue.status(job_id)
+            else:
+                status = job_queue.wait(
+                    job_id, version, min(keepalive, remaining),
+                )
+            if status is None:
+                return
+            if status['version'] == version:
+                yield ': keepalive\n\n'
+                continue
+            version = status['version']
+            yield 'id: {}\nevent: state\ndata: {}\n\n'.format(
+                version, json.dumps(status),
+            )
+            if status['finished'] is not None:
+                return
+
+    return event_stream(stream())
+
+
 @app.route('/get_ID/', defaults={'drop_id': None})
 @app.route('/get_ID/drop/<drop_id>')
 def get_node_id(drop_id=None):
@@ -505,6 +1599,165 @@ def get_node_id(drop_id=None):
     )
 
 
+@app.route('/cache_stats')
+def cache_stats():
+    """
+    Reports hit and miss counters of the frontend caches and how many
+    backend requests were coalesced
+    """
+
+    return jsonify(
+        drop_list=drop_list_cache.stats(),
+        drop_state=drop_state_cache.stats(),
+        drop_stamp=drop_stamp_cache.stats(),
+        backend_requests=backend_flight.stats(),
+        directories=directory_lister.stats(),
+        live_updates=live_updates.stats(),
+        live_streams=live_streams.stats(),
+        bulk=bulk_runner.stats(),
+        jobs=job_queue.stats(),
+        prefetch=prefetcher.stats(),
+    )
+
+
+@app.route('/health')
+def health():
+    """
+    Reports whether the backend is considered reachable, with status 503
+    while requests to it fail fast
+
+    :return: state of the backend circuit breaker
+    """
+
+    state = backend_health()
+    status = 200 if state['state'] == 'closed' else 503
+
+    return jsonify(backend=state), status
+
+
+@app.route('/drop/<drop_id>/files')
+def drop_files(drop_id):
+    """
+    Returns a page of the merged file table of a drop as JSON. The table
+    can be searched with q (a substring of the path, or a prefix if match
+    is 'prefix'), filtered by local and remote status and sorted by name
+    or percent in asc or desc order.
+
+    :param drop_id: ID of the drop
+    :return: total row count of the query, offset and rows of the page, \
+            or an error if the backend has no state for the drop
+    """
+
+    file_index = get_file_index(drop_id)
+    if file_index is None:
+        return jsonify(message='Drop state unavailable'), 502
+
+    try:
+        page = query_file_table(file_index, request.args)
+    except (KeyError, ValueError):
+        return jsonify(message='Invalid file query'), 400
+
+    return jsonify(page)
+
+
+@app.route('/directory/<path:current_path>')
+def list_directory(current_path):
+    """
+    Returns a page of the folders of a directory as JSON, for browsing
+    directories too large to list at once
+
+    :param current_path: directory path without its leading slash
+    :return: total folder count, offset and folder names of the page
+    """
+
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get(
+        'limit', app.config['DIRECTORY_PAGE_SIZE'], type=int,
+    )
+    limit = min(max(limit, 0), app.config['FILE_PAGE_MAX'])
+
+    try:
+        folders, total = directory_lister.page(
+            '/' + current_path, offset, limit,
+        )
+    except OSError as e:
+        return jsonify(message=str(e)), 404
+
+    return jsonify(total=total, offset=offset, folders=folders)
+
+
+def event_stream(events):
+    """
+    Sends server-sent events over a response that holds a request thread
+    until it ends. Beyond LIVE_MAX_STREAMS open streams in this process the
+    stream is refused, and the browser is told when to try again. The
+    streams of drops and of jobs count against the same limit.
+
+    :param events: generator of server-sent event strings
+    :return: text/event-stream response, or 503 if too many are open
+    """
+    if not live_streams.acquire(app.config['LIVE_MAX_STREAMS']):
+        retry = app.config['LIVE_BUSY_RETRY']
+        return Response(
+            'retry: {}\n\n'.format(retry * 1000),
+            status=503,
+            mimetype='text/event-stream',
+            headers={'Retry-After': str(retry), 'Cache-Control': 'no-cache'},
+        )
+
+    response = Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Called by the server even if the stream was never started
+    response.call_on_close(live_streams.release)
+
+    return response
+
+
+@app.route('/drop/<drop_id>/events')
+def drop_events(drop_id):
+    """
+    Streams changes of the file table of a drop as server-sent events.
+    Every open stream of a drop is fed by the same backend poller. The
+    stream ends after LIVE_STREAM_DURATION seconds so its thread is
+    returned to the server, and the browser reconnects on its own.
+
+    :param drop_id: ID of the drop
+    :return: text/event-stream response, or 503 if too many streams are \
+            open
+    """
+    keepalive = app.config['LIVE_KEEPALIVE']
+    duration = app.config['LIVE_STREAM_DURATION']
+
+    def stream():
+        subscriber = live_updates.subscribe(drop_id)
+        end = time.monotonic() + duration
+        try:
+            yield 'retry: {}\n\n'.format(
+                int(live_updates.interval * 1000),
+            )
+            while True:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event_id, name, data = subscriber.get(
+                        timeout=min(keepalive, remaining),
+                    )
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield 'id: {}\nevent: {}\ndata: {}\n\n'.format(
+                    event_id, name, json.dumps(data),
+                )
+        finally:
+            live_updates.unsubscribe(drop_id, subscriber)
+
+    return event_stream(stream())
+
+
 @app.route('/')
 def startup():
     set_curr_action(None)
@@ -526,9 +1779,24 @@ def show_drop(drop_id=None, message=None, current_path=None):
     :param current_path: current directory recognized
     :return: renders web page based off of drop and action.
     """
-    global testing
+    curr_action = get_curr_action()
+    testing = is_testing()
 
-    drop_tups = get_owned_subscribed_drops()
+    calls = {'drops': (get_owned_subscribed_drops,)}
+    if drop_id is not None:
+        if curr_action:
+            calls['selected'] = (get_selected_drop, drop_id)
+        else:
+            calls['selected'] = (get_warm_pending_changes, drop_id)
+    start = time.perf_counter()
+    results, timings = fetch_concurrently(calls)
+    g.backend_timings = timings
+    if metrics.enabled:
+        metrics.page_phase_seconds.observe(
+            time.perf_counter() - start, 'backend',
+        )
+
+    drop_tups = results['drops']
     if drop_tups is not None:
         owned_drops = drop_tups[0]
         subscribed_drops = drop_tups[1]
@@ -541,58 +1809,40 @@ def show_drop(drop_id=None, message=None, current_path=None):
     new_updates = None
     permission = None
 
-    file_status = {}
-    remote_file_status = {}
-    added = []
-    remote_added = []
+    file_rows = []
+    file_count = 0
+    file_summary = None
+    fetched_at = None
+    jobs = []
 
     if drop_id is not None:
 
-        if curr_action:
-            selected_drop_info = get_selected_drop(drop_id) or {}
-        else:
-            selected_drop_info = get_pending_changes(drop_id) or {}
+        selected_drop_info = results['selected']
+        stamp = None
+        if selected_drop_info is not None and not curr_action:
+            selected_drop_info, stamp, fetched_at = selected_drop_info
+        selected_drop_info = selected_drop_info or {}
         selected_drop = selected_drop_info.get('drop')
         if selected_drop is not None:
 
+            file_index = get_file_index(drop_id, selected_drop_info, stamp)
+            file_rows = file_index.page(0, app.config['FILE_PAGE_SIZE'])
+            file_count = len(file_index)
+            file_summary = file_index.summary()
+            jobs = job_queue.for_drop(drop_id, JOB_ACTIONS)
+
             if is_in_drop_list(drop_id, owned_drops):
                 permission = "owned"
             else:
                 permission = "subscribed"
 
             # Check if new version can be created
-            pending_changes = selected_drop_info.get('pending_changes', {})
-            added = pending_changes.get('added', [])
-            removed = pending_changes.get('removed', [])
-            changed = pending_changes.get('changed', [])
-            unchanged = pending_changes.get('unchanged', [])
-            for f in removed:
-                file_status[f] = 'removed'
-            for f in changed:
-                file_status[f] = 'changed'
-            for f in unchanged:
-                file_status[f] = 'unchanged'
-            version_update = any([added, removed, changed])
-            if version_update and is_in_drop_list(drop_id, owned_drops):
+            if file_index.has_changes('local') and permission == 'owned':
                 new_ver = True
                 flash('Local changes present. Select NEW VERSION.')
 
             # Check if new updates are available
-            remote_pending_changes = selected_drop_info.get(
-                'remote_pending_changes', {},
-            )
-            remote_added = remote_pending_changes.get('added', [])
-            remote_removed = remote_pending_changes.get('removed', [])
-            remote_changed = remote_pending_changes.get('changed', [])
-            remote_unchanged = remote_pending_changes.get('unchanged', [])
-            for f in remote_removed:
-                remote_file_status[f] = 'removed'
-            for f in remote_changed:
-                remote_file_status[f] = 'changed'
-            for f in remote_unchanged:
-                remote_file_status[f] = 'unchanged'
-            remote_update = any([remote_added, remote_removed, remote_changed])
-            if remote_update:
+            if file_index.has_changes('remote'):
                 new_updates = True
                 flash('Remote updates available. Select DOWNLOAD UPDATES.')
 
@@ -607,20 +1857,20 @@ def show_drop(drop_id=None, message=None, current_path=None):
 
     # Directory Stepping
     folders = []
+    folder_count = 0
     if current_path:
         try:
-            with scandir('/' + current_path) as entries:
-                for entry in entries:
-                    if not entry.is_file() and entry.name[0] != '.':
-                        folders.append(entry.name)
-        except Exception as e:
+            folders, folder_count = directory_lister.page(
+                '/' + current_path, 0, app.config['DIRECTORY_PAGE_SIZE'],
+            )
+        except OSError as e:
             flash(e)
-            folders = []
     else:
         current_path = home_path
 
     if not testing:
-        return render_template(
+        start = time.perf_counter()
+        page = render_template(
             'show_drops.html',
             selected=selected_drop,
             subscribed=subscribed_drops,
@@ -631,11 +1881,21 @@ def show_drop(drop_id=None, message=None, current_path=None):
             permission=permission,
             directory=current_path,
             directory_folders=folders,
-            file_status=file_status,
-            remote_file_status=remote_file_status,
-            added=added,
-            remote_added=remote_added,
+            directory_count=folder_count,
+            directory_page_size=app.config['DIRECTORY_PAGE_SIZE'],
+            file_rows=file_rows,
+            file_count=file_count,
+            file_summary=file_summary,
+            file_page_size=app.config['FILE_PAGE_SIZE'],
+            # The age is shown by the page, so it does not change the ETag
+            fetched_at=None if fetched_at is None else int(fetched_at),
+            jobs=jobs,
         )
+        if metrics.enabled:
+            metrics.page_phase_seconds.observe(
+                time.perf_counter() - start, 'render',
+            )
+        return page
     else:
         return {
             'selected_drop': selected_drop,
@@ -644,21 +1904,215 @@ def show_drop(drop_id=None, message=None, current_path=None):
             'curr_action': curr_action,
             'new_version': new_ver,
             'permission': permission,
+            'timings': timings,
+            'batch_results': g.get('batch_results'),
+            'jobs': jobs,
+            'fetched_at': fetched_at,
         }
 
 
+@app.route('/metrics')
+def show_metrics():
+    """
+    Exposes the metrics of this worker process in the Prometheus text
+    format, unless METRICS is disabled
+    """
+
+    if not metrics.enabled:
+        return jsonify(message='Metrics are disabled'), 404
+
+    return Response(
+        metrics.expose(metrics.METRICS),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+        headers={'Cache-Control': 'no-store'},
+    )
+
+
+@app.before_request
+def start_timer():
+    """
+    Notes when a request started, for its latency metric
+    """
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+
+
+@app.before_request
+def start_prefetcher():
+    """
+    Starts refreshing the pinned drops in the worker process. Not done
+    at import, as the threads would stay in the gunicorn master.
+    """
+    if app.config['PREFETCH']:
+        prefetcher.start()
+
+
+def profiling_requested():
+    """
+    :return: True if PROFILING is enabled and the request asks to be \
+            profiled with the PROFILE_HEADER header or the profile query \
+            argument, carrying PROFILING_TOKEN if one is configured
+    """
+    if not app.config['PROFILING']:
+        return False
+
+    value = request.headers.get(PROFILE_HEADER) or request.args.get('profile')
+    if not value:
+        return False
+
+    token = app.config['PROFILING_TOKEN']
+    # compare_digest only takes ASCII strings, so compare bytes
+    return token is None or hmac.compare_digest(
+        value.encode(), token.encode(),
+    )
+
+
+@app.before_request
+def start_profile():
+    """
+    Starts sampling the request if it asks to be profiled
+    """
+    if not profiling_requested():
+        return
+
+    profile = profiling.Profile(PROFILE_INTERVAL)
+    g.profile = profile
+    g.profile_context = ExitStack()
+    g.profile_context.enter_context(profiling.attached(profile))
+    profile.begin()
+
+
+@app.after_request
+def dump_profile(response):
+    """
+    Writes the profile of a profiled request to PROFILE_DIR and reports its
+    spans in a Server-Timing header
+    """
+    profile = g.get('profile')
+    if profile is None:
+        return response
+
+    profile.stop()
+    response.headers[PROFILE_HEADER] = profile.dump(
+        app.config['PROFILE_DIR'], request.endpoint or 'unknown',
+    )
+    response.headers.add('Server-Timing', ', '.join(
+        '{};dur={:.1f}'.format(name, elapsed * 1000)
+        for name, elapsed in profile.timings()
+    ))
+
+    return response
+
+
+@app.teardown_request
+def detach_profile(exception):
+    """
+    Detaches the profile of a profiled request from its thread
+    """
+    context = g.pop('profile_context', None)
+    if context is not None:
+        context.close()
+
+
+@app.after_request
+def add_server_timing(response):
+    """
+    Reports the backend call timings of show_drop in a Server-Timing header
+    and records the latency of the request
+    """
+    start = g.get('request_start')
+    if start is not None:
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - start,
+            request.endpoint or 'unknown',
+            response.status_code,
+        )
+
+    timings = g.get('backend_timings')
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(
+            '{};dur={:.1f}'.format(name, elapsed * 1000)
+            for name, elapsed in timings.items()
+            if elapsed is not None
+        )
+
+    return response
+
+
+@app.url_defaults
+def fingerprint_static(endpoint, values):
+    """
+    Adds the content digest of static files to their URLs, so browsers can
+    cache them for good and still fetch a new version after a change
+    """
+    if endpoint == 'static' and 'v' not in values:
+        digest = static_fingerprints.get(values.get('filename', ''))
+        if digest is not None:
+            values['v'] = digest
+
+
+@app.after_request
+def cache_and_compress(response):
+    """
+    Tags rendered pages with an ETag of their content, answers requests
+    for a representation the client already has with a 304 and compresses
+    text bodies the client accepts compressed
+    """
+    if request.endpoint == 'static':
+        if request.args.get('v'):
+            response.headers['Cache-Control'] = (
+                'public, max-age={}, immutable'.format(
+                    app.config['STATIC_MAX_AGE'],
+                )
+            )
+    elif (
+        request.method == 'GET' and response.status_code == 200 and
+        response.mimetype == 'text/html' and not response.is_streamed
+    ):
+        response.set_etag(content_etag(response.get_data()))
+        response.headers['Cache-Control'] = 'no-cache'
+
+    encoding = None
+    if app.config['COMPRESS'] and is_compressible(
+        response, app.config['COMPRESS_MIN_SIZE'],
+    ):
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is not None:
+            tag_encoding(response, encoding)
+
+    if request.method in ('GET', 'HEAD') and response.get_etag()[0]:
+        response.make_conditional(request)
+
+    if encoding is not None and response.status_code == 200:
+        compress_response(
+            response, encoding, app.config['COMPRESS_LEVEL'], static_bodies,
+        )
+
+    return response
+
+
 class FrontendHook:
 
     def __init__(self):
         """
         Enable Testing Mode and pull default drop data from backend
         """
-        global testing
-        testing = True
-
-        backend_data = startup()
+        backend_data = self._call(startup)
         self.update_hook(backend_data)
 
+    def _call(self, route, **kwargs):
+        """
+        Calls a route in its own request context with testing mode enabled,
+        so it returns the drop data instead of a rendered page
+
+        :param route: route function to call
+        :return: data returned by show_drop
+        """
+        with app.test_request_context():
+            g.testing = True
+            return route(**kwargs)
+
     def update_hook(self, backend_data):
         self.selected_drop = backend_data.get('selected_drop')
         self.subscribed_drops = backend_data.get('subscribed_drops')
@@ -666,6 +2120,8 @@ class FrontendHook:
         self.action = backend_data.get('performed_action')
         self.selected_action = backend_data.get('curr_action')
         self.versions = backend_data.get('file_versions')
+        self.batch_results = backend_data.get('batch_results')
+        self.jobs = backend_data.get('jobs')
 
     def send_message(self, message):
         return send_message(message=message)
@@ -677,22 +2133,48 @@ class FrontendHook:
         return get_selected_drop(drop_id=drop_id)
 
     def initialize_drop(self, drop_path):
-        self.update_hook(initialize_drop(drop_path=drop_path))
+        self.update_hook(self._call(initialize_drop, drop_path=drop_path))
 
     def input_drop_to_subscribe(self, drop_code):
-        self.update_hook(input_drop_to_subscribe(drop_code=drop_code))
+        self.update_hook(
+            self._call(input_drop_to_subscribe, drop_code=drop_code),
+        )
 
     def share_drop(self, drop_id):
-        self.update_hook(share_drop(drop_id=drop_id))
+        self.update_hook(self._call(share_drop, drop_id=drop_id))
 
     def add_owner(self, drop_id, owner_id):
-        self.update_hook(add_owner(drop_id=drop_id, owner_id=owner_id))
+        self.update_hook(
+            self._call(add_owner, drop_id=drop_id, owner_id=owner_id),
+        )
 
     def remove_owner(self, drop_id, owner_id):
-        self.update_hook(remove_owner(drop_id=drop_id, owner_id=owner_id))
+        self.update_hook(
+            self._call(remove_owner, drop_id=drop_id, owner_id=owner_id),
+        )
 
     def delete_drop(self, drop_id):
-        self.update_hook(delete_drop(drop_id=drop_id))
+        self.update_hook(self._call(delete_drop, drop_id=drop_id))
+
+    def input_drops_to_subscribe(self, drop_codes, drop_path):
+        self.update_hook(self._call(
+            input_drops_to_subscribe,
+            drop_codes=drop_codes,
+            drop_path=drop_path,
+        ))
+
+    def add_owners(self, drop_id, owner_ids):
+        self.update_hook(
+            self._call(add_owners, drop_id=drop_id, owner_ids=owner_ids),
+        )
+
+    def remove_owners(self, drop_id, owner_ids):
+        self.update_hook(
+            self._call(remove_owners, drop_id=drop_id, owner_ids=owner_ids),
+        )
+
+    def delete_drops(self, drop_ids):
+        self.update_hook(self._call(delete_drops, drop_ids=drop_ids))
 
     def unsubscribe(self, drop_id):
-        self.update_hook(unsubscribe(drop_id=drop_id))
+        self.update_hook(self._call(unsubscribe, drop_id=drop_id))
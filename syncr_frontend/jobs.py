@@ -0,0 +1,398 @@
+"""
+Background jobs for long-running backend actions.
+
+Creating a new version hashes the whole drop and downloading updates
+transfers them, both of which can take minutes. A JobQueue runs such
+actions on a few worker threads, so the request submitting one returns
+at once, and keeps the state of every job for polling and streaming.
+
+The states are kept in a store that every worker process can share, so
+a job can be followed and cancelled through any of them, while only the
+process that accepted it runs it.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .bulk import DONE
+from .bulk import FAILED
+
+logger = logging.getLogger(__name__)
+
+# States of a job besides DONE and FAILED
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = frozenset([DONE, FAILED, CANCELLED])
+
+CANCELLED_QUEUED = 'Cancelled before it started'
+CANCELLED_RUNNING = 'Cancelled, the backend may still finish it'
+
+# Seconds between checks of the store while waiting for a job that runs
+# in another process
+POLL_INTERVAL = 0.5
+
+
+class QueueFull(Exception):
+    """
+    Raised when too many jobs are waiting to run
+    """
+
+
+class Job:
+    """
+    One action for one drop, run in the background
+    """
+
+    def __init__(self, action, drop_id):
+        """
+        :param action: name of the action
+        :param drop_id: ID of the drop to act on
+        """
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.drop_id = drop_id
+        self.state = QUEUED
+        self.message = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        # Incremented on every change, so streams can wait for the next one
+        self.version = 0
+        self.future = None
+        self._changed = threading.Condition()
+
+    def update(self, state, message=None):
+        """
+        :param state: new state of the job
+        :param message: message of the backend or reason for the state
+        :return: False if the job had already finished, e.g. because it \
+                was cancelled while running
+        """
+        with self._changed:
+            if self.state in FINISHED_STATES:
+                return False
+            self.state = state
+            self.message = message
+            if state == RUNNING:
+                self.started = time.time()
+            elif state in FINISHED_STATES:
+                self.finished = time.time()
+            self.version += 1
+            self._changed.notify_all()
+
+        return True
+
+    def wait(self, version=None, timeout=None):
+        """
+        Waits until the job changes or finishes
+
+        :param version: version of the job the caller has seen, or None \
+                to wait until the job finished
+        :param timeout: seconds to wait at most
+        :return: status of the job
+        """
+        with self._changed:
+            if version is None:
+                self._changed.wait_for(
+                    lambda: self.state in FINISHED_STATES, timeout,
+                )
+            elif self.version == version:
+                self._changed.wait(timeout)
+            return self._status()
+
+    def status(self):
+        """
+        :return: dictionary of the action, drop, state, message, times and \
+                version of the job
+        """
+        with self._changed:
+            return self._status()
+
+    def _status(self):
+        return {
+            'id': self.id,
+            'action': self.action,
+            'drop_id': self.drop_id,
+            'state': self.state,
+            'message': self.message,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'version': self.version,
+        }
+
+
+class JobQueue:
+    """
+    Runs jobs on a bounded thread pool and keeps their states in a store
+    until its ttl after they last changed. Submitting an action for a drop
+    whose previous job is still waiting for the backend, in any process
+    sharing the store, returns that job instead of a second one. A job
+    cancelled while the backend performs it keeps blocking new ones until
+    the backend returns.
+    """
+
+    def __init__(self, workers, max_queued, store):
+        """
+        :param workers: jobs run at the same time by this process
+        :param max_queued: jobs waiting to run in this process at most
+        :param store: cache with the interface of TTLCache and its add \
+                method keeping the states of the jobs, finished jobs stay \
+                available for its ttl. The ttl must be longer than a job \
+                may run, or its state and claim expire while it runs.
+        """
+        self.max_queued = max_queued
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='job',
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, action, drop_id, perform):
+        """
+        :param action: name of the action
+        :param drop_id: ID of the drop to act on
+        :param perform: function of the drop ID returning a tuple of the \
+                final state, DONE or FAILED, and a message
+        :return: status of the job, see Job.status
+        :raises QueueFull: if max_queued jobs are waiting in this process
+        """
+        claim = _claim_key(action, drop_id)
+        job = Job(action, drop_id)
+
+        with self._lock:
+            queued = sum(
+                other.state == QUEUED for other in self._jobs.values()
+            )
+            self._save(job)
+            while not self.store.add(claim, job.id):
+                status = self._claimed(claim)
+                if status is not None:
+                    self.store.invalidate(_job_key(job.id))
+                    return status
+
+            if queued >= self.max_queued:
+                self.store.invalidate(claim)
+                self.store.invalidate(_job_key(job.id))
+                raise QueueFull()
+
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, perform)
+
+            return job.status()
+
+    def status(self, job_id):
+        """
+        :param job_id: ID of a job accepted by any process sharing the store
+        :return: status of the job, see Job.status, or None if it is \
+                unknown or was forgotten
+        """
+        data = self.store.get(_job_key(job_id))
+        if data is None:
+            return None
+
+        return json.loads(data)
+
+    def wait(self, job_id, version=None, timeout=None):
+        """
+        Waits until the job changes or finishes
+
+        :param job_id: ID of a job
+        :param version: version of the job the caller has seen, or None \
+                to wait until the job finished
+        :param timeout: seconds to wait at most, or None to wait as long \
+                as it takes
+        :return: status of the job, or None if it is unknown
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if (
+                status is None or status['state'] in FINISHED_STATES or
+                (version is not None and status['version'] != version)
+            ):
+                return status
+
+            remaining = POLL_INTERVAL
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+                if remaining <= 0:
+                    return status
+
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None:
+                time.sleep(remaining)
+            else:
+                # Wakes up at once when this process changes the job
+                job.wait(status['version'], remaining)
+
+    def for_drop(self, drop_id, actions):
+        """
+        :param drop_id: ID of a drop
+        :param actions: names of the actions that may run as jobs
+        :return: list of the statuses of the jobs of the drop that have \
+                not finished
+        """
+        statuses = []
+        for action in actions:
+            status = self._claimed(_claim_key(action, drop_id))
+            if status is not None and status['state'] not in FINISHED_STATES:
+                statuses.append(status)
+
+        return statuses
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. A queued job never runs. The backend cannot be
+        interrupted, so a running job is only marked as cancelled and its
+        result is ignored when the backend finishes it.
+
+        :param job_id: ID of a job accepted by any process sharing the store
+        :return: status of the job, or None if it is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            return self._cancel_elsewhere(job_id)
+
+        if job.future.cancel():
+            with self._lock:
+                if job.update(CANCELLED, CANCELLED_QUEUED):
+                    self._save(job)
+                    self._release(job)
+        else:
+            self._update(job, CANCELLED, CANCELLED_RUNNING)
+
+        return job.status()
+
+    def stats(self):
+        """
+        :return: dictionary of the number of queued and running jobs of \
+                this process and of the entries in the store, which holds \
+                the jobs and their claims and cancel requests
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+
+        return {
+            'queued': sum(job.state == QUEUED for job in jobs),
+            'running': sum(job.state == RUNNING for job in jobs),
+            'stored': self.store.stats()['size'],
+        }
+
+    def _claimed(self, claim):
+        """
+        :param claim: key of the claim of an action on a drop
+        :return: status of the job holding the claim, or None if there is \
+                none
+        """
+        job_id = self.store.get(claim)
+        if job_id is None:
+            return None
+
+        status = self.status(job_id)
+        if status is None:
+            # The job was forgotten, e.g. its process died
+            self.store.invalidate(claim)
+
+        return status
+
+    def _cancel_elsewhere(self, job_id):
+        """
+        Cancels a job of another process, which reads the request before
+        running the job and when the backend finished it
+
+        :param job_id: ID of a job
+        :return: status of the job, or None if it is unknown
+        """
+        status = self.status(job_id)
+        if status is None or status['state'] in FINISHED_STATES:
+            return status
+
+        self.store.set(_cancel_key(job_id), 1)
+        status.update(
+            state=CANCELLED,
+            message=(
+                CANCELLED_QUEUED if status['state'] == QUEUED
+                else CANCELLED_RUNNING
+            ),
+            finished=time.time(),
+            version=status['version'] + 1,
+        )
+        self.store.set(_job_key(job_id), json.dumps(status))
+
+        return status
+
+    def _cancel_requested(self, job):
+        return self.store.get(_cancel_key(job.id)) is not None
+
+    def _save(self, job):
+        # Under the lock, so the last write has the latest status
+        self.store.set(_job_key(job.id), json.dumps(job.status()))
+        if job.state == RUNNING:
+            # Renewed at the start, so the claim outlasts the backend
+            # however long the job was queued
+            claim = _claim_key(job.action, job.drop_id)
+            if self.store.get(claim) == job.id:
+                self.store.set(claim, job.id)
+
+    def _update(self, job, state, message=None):
+        with self._lock:
+            changed = job.update(state, message)
+            if changed:
+                self._save(job)
+
+        return changed
+
+    def _release(self, job):
+        """
+        Lets the action be submitted again and forgets the job in this
+        process, its status stays in the store
+        """
+        claim = _claim_key(job.action, job.drop_id)
+        if self.store.get(claim) == job.id:
+            self.store.invalidate(claim)
+        self._jobs.pop(job.id, None)
+
+    def _run(self, job, perform):
+        try:
+            if self._cancel_requested(job):
+                self._update(job, CANCELLED, CANCELLED_QUEUED)
+                return
+            if not self._update(job, RUNNING):
+                return
+
+            try:
+                state, message = perform(job.drop_id)
+            except Exception as e:
+                logger.exception(
+                    'Job %s of drop %s failed', job.action, job.drop_id,
+                )
+                state, message = FAILED, str(e)
+
+            if self._cancel_requested(job):
+                state, message = CANCELLED, CANCELLED_RUNNING
+            self._update(job, state, message)
+        finally:
+            with self._lock:
+                self._release(job)
+
+
+def _job_key(job_id):
+    return 'job:' + job_id
+
+
+def _claim_key(action, drop_id):
+    return 'claim:{}:{}'.format(action, drop_id)
+
+
+def _cancel_key(job_id):
+    return 'cancel:' + job_id
@@ -0,0 +1,204 @@
+"""Live file table updates pushed to the browser"""
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Poller(threading.Thread):
+    """
+    Thread polling the file index of one drop and publishing what changed
+    to every subscriber of the drop
+    """
+
+    def __init__(self, drop_id, fetch, interval, max_delta):
+        super().__init__(name='live-{}'.format(drop_id), daemon=True)
+        self.drop_id = drop_id
+        self.subscribers = set()
+        self.stopped = threading.Event()
+        self._fetch = fetch
+        self._interval = interval
+        self._max_delta = max_delta
+        self._index = None
+        self._event_id = 0
+
+    def run(self):
+        self._index = self._poll()
+        while not self.stopped.wait(self._interval):
+            file_index = self._poll()
+            if file_index is None or file_index is self._index:
+                continue
+
+            previous, self._index = self._index, file_index
+            event = self._delta(previous, file_index)
+            if event is not None:
+                self._publish(*event)
+
+    def _poll(self):
+        try:
+            return self._fetch(self.drop_id)
+        except Exception:
+            logger.exception('Polling drop %s failed', self.drop_id)
+            return None
+
+    def _delta(self, previous, file_index):
+        """
+        :return: tuple of event name and data, or None if nothing changed
+        """
+        data = {
+            'summary': file_index.summary(),
+            'local_changes': file_index.has_changes('local'),
+            'remote_changes': file_index.has_changes('remote'),
+        }
+
+        positions = None
+        if previous is not None:
+            positions = file_index.changes_since(previous)
+        if positions is None or len(positions) > self._max_delta:
+            # Files were added or removed, or too many changed to patch
+            return 'reset', data
+        if not positions:
+            return None
+
+        data['rows'] = [file_index.row(position) for position in positions]
+
+        return 'delta', data
+
+    def _publish(self, name, data):
+        self._event_id += 1
+        event = (self._event_id, name, data)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A subscriber that fell behind starts over from a reset
+                _drain(subscriber)
+                subscriber.put_nowait((self._event_id, 'reset', data))
+
+
+def _drain(subscriber):
+    """
+    :param subscriber: queue to empty
+    """
+    try:
+        while True:
+            subscriber.get_nowait()
+    except queue.Empty:
+        pass
+
+
+class LiveUpdates:
+    """
+    Publishes changes of the file tables of drops. Each drop with at least
+    one subscriber has one poller thread, however many subscribers it has,
+    and the poller stops when the last subscriber leaves.
+
+    Subscribers receive tuples of (event id, event name, data). A 'delta'
+    event has the rows whose status or percent changed, a 'reset' event
+    means files were added or removed and the table must be reloaded. Both
+    carry the new summary and whether there are local and remote changes.
+    """
+
+    def __init__(self, fetch, interval, queue_size=16, max_delta=1000):
+        """
+        :param fetch: function of a drop ID returning its current \
+                FileIndex, or None if it is unavailable. It should return \
+                the same object while the drop is unchanged.
+        :param interval: seconds between polls of a drop
+        :param queue_size: events kept for a subscriber before it is reset
+        :param max_delta: most rows sent in a delta, larger changes are \
+                sent as a reset
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_delta = max_delta
+        self._pollers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, drop_id):
+        """
+        :param drop_id: ID of the drop
+        :return: queue receiving the events of the drop
+        """
+        subscriber = queue.Queue(self.queue_size)
+
+        with self._lock:
+            poller = self._pollers.get(drop_id)
+            if poller is None:
+                poller = self._pollers[drop_id] = _Poller(
+                    drop_id, self.fetch, self.interval, self.max_delta,
+                )
+                poller.start()
+            poller.subscribers.add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, drop_id, subscriber):
+        """
+        :param drop_id: ID of the drop
+        :param subscriber: queue returned by subscribe
+        """
+        with self._lock:
+            poller = self._pollers.get(drop_id)
+            if poller is None:
+                return
+            poller.subscribers.discard(subscriber)
+            if not poller.subscribers:
+                poller.stopped.set()
+                del self._pollers[drop_id]
+
+    def stats(self):
+        """
+        :return: dictionary of the number of polled drops and subscribers
+        """
+        with self._lock:
+            return {
+                'drops': len(self._pollers),
+                'subscribers': sum(
+                    len(poller.subscribers)
+                    for poller in self._pollers.values()
+                ),
+            }
+
+
+class StreamLimit:
+    """
+    Counts the event streams this process holds open. Every stream keeps
+    a request thread busy, so they are capped to leave threads for the
+    other requests.
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, limit):
+        """
+        :param limit: streams allowed open at the same time, None for no \
+                limit
+        :return: True if a stream may be opened, it must be released when \
+                it closes
+        """
+        with self._lock:
+            if limit is not None and self.open >= limit:
+                self.refused += 1
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        """
+        Counts a stream as closed
+        """
+        with self._lock:
+            self.open -= 1
+
+    def stats(self):
+        """
+        :return: dictionary of the open and refused stream counters
+        """
+        with self._lock:
+            return {'open': self.open, 'refused': self.refused}
@@ -0,0 +1,215 @@
+"""
+Instrumentation of the frontend in the Prometheus text format.
+
+Metrics are only recorded while enabled is True, so they cost one
+attribute lookup per instrumented call when they are turned off. Every
+worker process keeps its own metrics.
+"""
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    30, 60, 150,
+)
+
+enabled = False
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_sample(name, labels, value):
+    """
+    :param name: metric name
+    :param labels: list of (label name, value) tuples
+    :param value: sample value
+    :return: line of the text format
+    """
+    if labels:
+        name += '{{{}}}'.format(','.join(
+            '{}="{}"'.format(label, _escape(label_value))
+            for label, label_value in labels
+        ))
+
+    return '{} {}'.format(name, repr(float(value)))
+
+
+class Counter:
+    """
+    Monotonic counter per combination of label values
+    """
+
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        """
+        :param name: metric name
+        :param help: description of the metric
+        :param labels: label names
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """
+        :param label_values: values of the labels, in order
+        :param amount: amount to add
+        """
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def samples(self):
+        """
+        :return: lines of the text format
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+
+        return [
+            format_sample(self.name, list(zip(self.labels, key)), value)
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """
+    Cumulative histogram per combination of label values
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        :param name: metric name
+        :param help: description of the metric
+        :param labels: label names
+        :param buckets: sorted upper bounds of the buckets
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """
+        :param value: observed value
+        :param label_values: values of the labels, in order
+        """
+        bucket = bisect_left(self.buckets, value)
+
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0.0,
+                ]
+            entry[0][bucket] += 1
+            entry[1] += value
+
+    def samples(self):
+        """
+        :return: lines of the text format
+        """
+        with self._lock:
+            values = sorted(
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            )
+
+        lines = []
+        for key, counts, total in values:
+            labels = list(zip(self.labels, key))
+            count = 0
+            for bound, observed in zip(self.buckets + ('+Inf',), counts):
+                count += observed
+                lines.append(format_sample(
+                    self.name + '_bucket', labels + [('le', bound)], count,
+                ))
+            lines.append(format_sample(self.name + '_sum', labels, total))
+            lines.append(format_sample(self.name + '_count', labels, count))
+
+        return lines
+
+
+def expose(metrics):
+    """
+    :param metrics: iterable of Counter and Histogram
+    :return: the metrics in the text format
+    """
+    lines = []
+    for metric in metrics:
+        lines.append('# HELP {} {}'.format(metric.name, metric.help))
+        lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+        lines.extend(metric.samples())
+
+    return '\n'.join(lines) + '\n'
+
+
+backend_request_seconds = Histogram(
+    'syncr_backend_request_seconds',
+    'Latency of backend requests',
+    ('action', 'outcome'),
+)
+backend_sent_bytes = Counter(
+    'syncr_backend_sent_bytes_total',
+    'Bytes sent to the backend',
+    ('action',),
+)
+backend_received_bytes = Counter(
+    'syncr_backend_received_bytes_total',
+    'Bytes received from the backend',
+    ('action',),
+)
+backend_errors = Counter(
+    'syncr_backend_errors_total',
+    'Backend requests that failed',
+    ('action', 'outcome'),
+)
+page_phase_seconds = Histogram(
+    'syncr_page_phase_seconds',
+    'Time spent by pages waiting for the backend and rendering',
+    ('phase',),
+)
+http_request_seconds = Histogram(
+    'syncr_http_request_seconds',
+    'Latency of frontend requests',
+    ('endpoint', 'status'),
+)
+
+METRICS = (
+    backend_request_seconds,
+    backend_sent_bytes,
+    backend_received_bytes,
+    backend_errors,
+    page_phase_seconds,
+    http_request_seconds,
+)
+
+
+def observe_backend_request(action, elapsed, sent, received, outcome):
+    """
+    :param action: action of the request
+    :param elapsed: seconds the request took
+    :param sent: bytes sent
+    :param received: bytes received
+    :param outcome: 'ok', or the kind of error
+    """
+    action = str(action).rpartition('.')[2]
+    backend_request_seconds.observe(elapsed, action, outcome)
+    backend_sent_bytes.inc(action, amount=sent)
+    backend_received_bytes.inc(action, amount=received)
+    if outcome != 'ok':
+        backend_errors.inc(action, outcome)
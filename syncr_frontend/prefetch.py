@@ -0,0 +1,301 @@
+"""
+Background refresh of the state of the drops a user is likely to open.
+
+The Prefetcher keeps the state of recently viewed and pinned drops warm,
+so their pages do not wait on the backend. A drop whose state changed is
+refreshed again after min_interval, and every refresh without a change
+doubles its interval up to max_interval. Drops missing from the drop
+list are not refreshed, and drops not viewed for a while are dropped.
+
+Each worker process keeps its own warm states and threads, which start
+with its first viewed drop or its first call of start. An invalidation
+in one worker reaches the others through the invalidated function.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for drops that are due
+TICK = 1
+
+
+class Prefetcher:
+    """
+    Refreshes drop states on a bounded thread pool, scheduled by one
+    thread per process that starts with the first viewed drop or with
+    start
+    """
+
+    def __init__(
+        self,
+        fetch,
+        changed,
+        list_drops,
+        invalidated,
+        workers,
+        min_interval,
+        max_interval,
+        recent,
+    ):
+        """
+        :param fetch: function of a drop ID returning its current state, \
+                or None if the backend could not provide it
+        :param changed: function of the previous and the current state \
+                returning True if the drop changed
+        :param list_drops: function returning the IDs of the drops that \
+                may be refreshed
+        :param invalidated: function of a drop ID returning the time.time() \
+                any worker process last invalidated it, or None
+        :param workers: drops refreshed at the same time
+        :param min_interval: seconds between refreshes of a changing drop
+        :param max_interval: seconds between refreshes of a quiet drop
+        :param recent: seconds a viewed drop is kept warm
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.recent = recent
+        # Warm states older than this are not served
+        self.max_age = 2 * max_interval
+        self.refreshes = 0
+        self.hits = 0
+        self.misses = 0
+        self._fetch = fetch
+        self._changed = changed
+        self._list_drops = list_drops
+        self._invalidated = invalidated
+        self._workers = workers
+        self._executor = None
+        self._entries = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # Process the threads were started in, none survive a fork
+        self._pid = None
+
+    def touch(self, drop_id):
+        """
+        Keeps a drop warm for the next recent seconds
+
+        :param drop_id: ID of a viewed drop
+        """
+        with self._lock:
+            self._entry(drop_id)['viewed'] = time.monotonic()
+        self.start()
+
+    def pin(self, drop_id):
+        """
+        Keeps a drop warm until it is unpinned, once the prefetcher started
+
+        :param drop_id: ID of the drop
+        """
+        with self._lock:
+            self._pinned.add(drop_id)
+            self._entry(drop_id)
+
+    def unpin(self, drop_id):
+        """
+        :param drop_id: ID of a pinned drop
+        """
+        with self._lock:
+            self._pinned.discard(drop_id)
+
+    def get(self, drop_id):
+        """
+        :param drop_id: ID of the drop
+        :return: tuple of the warm state and the time it was fetched, or \
+                None if there is none younger than max_age and than the \
+                last invalidation
+        """
+        invalidated = self._invalidated(drop_id)
+
+        with self._lock:
+            entry = self._entries.get(drop_id)
+            if (
+                entry is not None and invalidated is not None and
+                entry['state'] is not None and
+                entry['fetched_at'] <= invalidated
+            ):
+                # Invalidated by another worker process
+                self._forget(entry)
+            if (
+                entry is None or entry['state'] is None or
+                time.monotonic() - entry['refreshed'] > self.max_age
+            ):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry['state'], entry['fetched_at']
+
+    def put(self, drop_id, state):
+        """
+        Stores a state the caller fetched itself, postponing the next
+        refresh of a warm drop
+
+        :param drop_id: ID of the drop
+        :param state: current state of the drop
+        :return: time the state is kept as fetched at, or None if the drop \
+                is not watched
+        """
+        with self._lock:
+            entry = self._entries.get(drop_id)
+            if entry is None:
+                return None
+            entry['state'] = state
+            entry['fetched_at'] = time.time()
+            entry['refreshed'] = time.monotonic()
+            entry['due'] = entry['refreshed'] + entry['interval']
+            return entry['fetched_at']
+
+    def invalidate(self, drop_id):
+        """
+        Forgets the state of a drop after an action that changes it and
+        refreshes it soon. Other worker processes learn of the change from
+        the invalidated function.
+
+        :param drop_id: ID of the changed drop
+        """
+        with self._lock:
+            entry = self._entries.get(drop_id)
+            if entry is not None:
+                self._forget(entry)
+
+    def stats(self):
+        """
+        :return: dictionary of the number of warm drops, refreshes, and \
+                hits and misses of get
+        """
+        with self._lock:
+            return {
+                'drops': len(self._entries),
+                'pinned': len(self._pinned),
+                'refreshes': self.refreshes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def start(self):
+        """
+        Starts refreshing in the calling process, again after a fork as
+        the threads of the parent process are gone
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for entry in self._entries.values():
+                # Refreshes running in the parent never finish here
+                entry['running'] = False
+                entry['generation'] += 1
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix='prefetch',
+            )
+            threading.Thread(
+                target=self._run, name='prefetch-scheduler', daemon=True,
+            ).start()
+
+    def stop(self):
+        """
+        Stops scheduling refreshes
+        """
+        self._stopped.set()
+
+    def _entry(self, drop_id):
+        entry = self._entries.get(drop_id)
+        if entry is None:
+            entry = self._entries[drop_id] = {
+                'state': None,
+                'fetched_at': None,
+                'refreshed': 0.0,
+                'interval': self.min_interval,
+                'due': 0.0,
+                'viewed': 0.0,
+                'running': False,
+                'generation': 0,
+            }
+        return entry
+
+    def _forget(self, entry):
+        entry['state'] = None
+        entry['interval'] = self.min_interval
+        entry['due'] = 0.0
+        # A refresh already running may return the old state
+        entry['generation'] += 1
+
+    def _run(self):
+        while not self._stopped.wait(TICK):
+            try:
+                self._schedule()
+            except Exception:
+                logger.exception('Scheduling drop refreshes failed')
+
+    def _schedule(self):
+        with self._lock:
+            if not self._entries:
+                return
+        listed = set(self._list_drops() or ())
+        now = time.monotonic()
+
+        due = []
+        with self._lock:
+            for drop_id, entry in list(self._entries.items()):
+                if (
+                    drop_id not in self._pinned and
+                    now - entry['viewed'] > self.recent
+                ):
+                    del self._entries[drop_id]
+                elif (
+                    drop_id in listed and not entry['running'] and
+                    entry['due'] <= now
+                ):
+                    entry['running'] = True
+                    due.append((drop_id, entry['generation']))
+
+        for drop_id, generation in due:
+            self._executor.submit(self._refresh, drop_id, generation)
+
+    def _refresh(self, drop_id, generation):
+        # Compared with invalidations, which the fetch may have missed
+        started = time.time()
+        try:
+            state = self._fetch(drop_id)
+        except Exception:
+            logger.exception('Refreshing drop %s failed', drop_id)
+            state = None
+
+        with self._lock:
+            entry = self._entries.get(drop_id)
+            previous = entry and entry['state']
+
+        changed = True
+        if state is not None and previous is not None:
+            changed = self._changed(previous, state)
+
+        with self._lock:
+            self.refreshes += 1
+            entry = self._entries.get(drop_id)
+            if entry is None:
+                return
+            entry['running'] = False
+            if entry['generation'] != generation:
+                return
+            if state is None:
+                # Backend failing, try again at the slowest pace
+                entry['interval'] = self.max_interval
+            else:
+                if changed:
+                    entry['interval'] = self.min_interval
+                else:
+                    entry['interval'] = min(
+                        entry['interval'] * 2, self.max_interval,
+                    )
+                entry['state'] = state
+                entry['fetched_at'] = started
+                entry['refreshed'] = time.monotonic()
+            entry['due'] = time.monotonic() + entry['interval']
@@ -0,0 +1,226 @@
+"""
+Profiling of single requests.
+
+A Profile samples the stacks of the threads working on a request and
+records spans of the phases of its backend requests. Stacks are written in
+the collapsed format read by flamegraph.pl and speedscope, one file per
+route, and spans as one JSON line per request.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_active = threading.local()
+
+
+def current():
+    """
+    :return: Profile attached to this thread, or None
+    """
+    return getattr(_active, 'profile', None)
+
+
+@contextmanager
+def attached(profile, label='request'):
+    """
+    Attaches a profile to this thread, so its stacks are sampled and its
+    spans recorded, e.g. for work done on behalf of a profiled request
+
+    :param profile: Profile, or None to do nothing
+    :param label: root frame of the stacks sampled on this thread
+    """
+    if profile is None:
+        yield
+        return
+
+    previous = current()
+    _active.profile = profile
+    profile.attach(threading.get_ident(), label)
+    try:
+        yield
+    finally:
+        profile.detach(threading.get_ident())
+        _active.profile = previous
+
+
+class Span:
+    """
+    Timed phase of a profiled request
+    """
+
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+        self.start = time.perf_counter()
+        self.duration = None
+        # Part of the duration spent waiting for the socket
+        self.waited = None
+
+    def timings(self):
+        """
+        :return: list of (name, seconds) tuples. A span that waited on the \
+                socket is split into 'recv' and 'decode'.
+        """
+        if self.waited is None:
+            return [(self.name, self.duration)]
+
+        return [
+            ('recv', self.waited),
+            ('decode', max(self.duration - self.waited, 0.0)),
+        ]
+
+
+@contextmanager
+def span(name, **info):
+    """
+    Records the time spent in the block as a span of the profile attached
+    to this thread. Does nothing but yield None if there is none.
+
+    :param name: name of the phase
+    :param info: details stored with the span
+    :return: context manager yielding the Span or None
+    """
+    profile = current()
+    if profile is None:
+        yield None
+        return
+
+    record = Span(name, info)
+    try:
+        yield record
+    finally:
+        record.duration = time.perf_counter() - record.start
+        profile.add_span(record)
+
+
+class Profile:
+    """
+    Sampling profile of the threads attached to it
+    """
+
+    def __init__(self, interval):
+        """
+        :param interval: seconds between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.spans = []
+        self.samples = 0
+        self.start = time.perf_counter()
+        self.duration = None
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, name='profile-sampler', daemon=True,
+        )
+
+    def attach(self, ident, label):
+        """
+        :param ident: identifier of a thread to sample
+        :param label: root frame of its stacks
+        """
+        with self._lock:
+            self._threads[ident] = label
+
+    def detach(self, ident):
+        """
+        :param ident: identifier of a thread to stop sampling
+        """
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def add_span(self, record):
+        """
+        :param record: finished Span
+        """
+        with self._lock:
+            self.spans.append(record)
+
+    def begin(self):
+        """
+        Starts sampling
+        """
+        self._sampler.start()
+
+    def stop(self):
+        """
+        Stops sampling and waits for the sampler to finish
+        """
+        self.duration = time.perf_counter() - self.start
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+
+            for ident, label in threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append('{}:{}'.format(
+                        os.path.basename(code.co_filename), code.co_name,
+                    ))
+                    frame = frame.f_back
+                stack.append(label)
+                stack.reverse()
+                self.stacks[';'.join(stack)] += 1
+                self.samples += 1
+
+    def timings(self):
+        """
+        :return: list of (name, seconds) tuples of the recorded spans
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        return [timing for record in spans for timing in record.timings()]
+
+    def dump(self, directory, route):
+        """
+        Appends the sampled stacks to the collapsed stack file of the route
+        and the spans to its span log
+
+        :param directory: directory of the profile files, created if needed
+        :param route: name of the profiled route
+        :return: path of the collapsed stack file
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r'[^\w.-]', '_', route)
+        path = os.path.join(directory, name + '.folded')
+
+        with open(path, 'a') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write('{} {}\n'.format(stack, count))
+
+        with self._lock:
+            spans = [
+                {
+                    'name': record.name,
+                    'start': record.start - self.start,
+                    'duration': record.duration,
+                    'waited': record.waited,
+                    'info': record.info,
+                }
+                for record in self.spans
+            ]
+        with open(os.path.join(directory, name + '.spans.jsonl'), 'a') as f:
+            f.write(json.dumps({
+                'time': time.time(),
+                'duration': self.duration,
+                'samples': self.samples,
+                'spans': spans,
+            }, default=str) + '\n')
+
+        return path
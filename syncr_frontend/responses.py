@@ -0,0 +1,208 @@
+"""Compression, validators and fingerprints for HTTP responses"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from itertools import chain
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content encodings in order of preference
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Media types worth compressing
+COMPRESSIBLE_TYPES = frozenset([
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+])
+
+
+def choose_encoding(accept_encodings):
+    """
+    :param accept_encodings: Accept-Encoding header of the request, as \
+            parsed by werkzeug
+    :return: preferred content encoding the client accepts, or None
+    """
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding]:
+            return encoding
+
+    return None
+
+
+def compress(data, encoding, level):
+    """
+    :param data: bytes to compress
+    :param encoding: 'br' or 'gzip'
+    :param level: compression level from 1 to 9
+    :return: compressed bytes
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level + 2, 11))
+
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def is_compressible(response, min_size):
+    """
+    :param response: response of the app
+    :param min_size: bytes below which compression does not pay off
+    :return: True if the response body should be compressed
+    """
+    if response.status_code != 200:
+        return False
+    # Files are passed through, other bodies of unknown length are streams
+    if response.is_streamed and not response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return False
+
+    length = response.content_length
+    return length is None or length >= min_size
+
+
+def content_etag(data):
+    """
+    :param data: body of a response
+    :return: strong ETag of the body
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def etag_matches(etag, if_none_match):
+    """
+    :param etag: ETag of the uncompressed representation
+    :param if_none_match: If-None-Match header as parsed by werkzeug
+    :return: True if the client has the representation in any encoding
+    """
+    return any(
+        tag in if_none_match
+        for tag in chain((etag,), (
+            '{}-{}'.format(etag, encoding) for encoding in ENCODINGS
+        ))
+    )
+
+
+def tag_encoding(response, encoding):
+    """
+    Gives the ETag of a response the encoding as suffix, since the
+    compressed body is a different representation
+
+    :param response: response about to be compressed
+    :param encoding: content encoding of the body
+    """
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag('{}-{}'.format(etag, encoding), weak)
+
+
+def compress_response(response, encoding, level, cache):
+    """
+    Replaces the body of a response by its compressed form
+
+    :param response: compressible response, see is_compressible
+    :param encoding: content encoding to use
+    :param level: compression level from 1 to 9
+    :param cache: CompressedCache for files, which are compressed once \
+            per ETag
+    """
+    def compress_body():
+        response.direct_passthrough = False
+        return compress(response.get_data(), encoding, level)
+
+    etag = response.get_etag()[0]
+    if etag and response.direct_passthrough:
+        body = cache.get(etag, compress_body)
+    else:
+        body = compress_body()
+
+    # The file of a cached body was not read
+    if hasattr(response.response, 'close'):
+        response.response.close()
+    response.direct_passthrough = False
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+
+class CompressedCache:
+    """
+    Bounded cache of compressed bodies keyed by their ETag, which includes
+    the encoding, so the static assets are only compressed once
+    """
+
+    def __init__(self, size):
+        """
+        :param size: maximum number of bodies kept
+        """
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compress_body):
+        """
+        :param key: ETag of the compressed body
+        :param compress_body: function returning the compressed body
+        :return: cached or newly compressed body
+        """
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+
+        body = compress_body()
+        with self._lock:
+            self._entries[key] = body
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+        return body
+
+
+class Fingerprints:
+    """
+    Content digests of the files of a static folder, recomputed when a
+    file's modification time changes
+    """
+
+    def __init__(self, folder):
+        """
+        :param folder: static folder of the app
+        """
+        self.folder = folder
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """
+        :param filename: path of a file relative to the folder
+        :return: short digest of the file content, or None if it is missing
+        """
+        path = os.path.join(self.folder, filename)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._digests.get(filename)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+        with self._lock:
+            self._digests[filename] = (mtime, digest)
+
+        return digest
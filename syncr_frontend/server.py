@@ -0,0 +1,161 @@
+"""
+Production server for the frontend.
+
+Runs the app in pre-forked gunicorn worker processes, each serving requests
+on several threads. The workers share their backend response caches on
+disk. Send SIGHUP to the master process for a graceful reload.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from . import frontend
+from .communication import reset_connections
+from .constants import LIVE_RESERVED_THREADS
+from .constants import TIMEOUT
+
+
+def parse_args(argv=None):
+    """
+    :param argv: command line arguments, defaults to sys.argv
+    :return: parsed options
+    """
+    parser = argparse.ArgumentParser(
+        description='Serve the 5yncr frontend with multiple workers',
+    )
+    parser.add_argument(
+        '--bind', default='127.0.0.1:5000',
+        help='address to listen on (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=multiprocessing.cpu_count() * 2 + 1,
+        help='number of worker processes (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--threads', type=int, default=8,
+        help='request threads per worker (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--live-streams', type=int, default=None,
+        help='event streams each worker holds open, each takes a request '
+        'thread (default: THREADS - {}, at least 1)'.format(
+            LIVE_RESERVED_THREADS,
+        ),
+    )
+    parser.add_argument(
+        '--timeout', type=int, default=TIMEOUT + 30,
+        help='seconds before a silent worker is restarted '
+        '(default: %(default)s)',
+    )
+    parser.add_argument(
+        '--graceful-timeout', type=int, default=30,
+        help='seconds workers get to finish requests on reload or shutdown '
+        '(default: %(default)s)',
+    )
+    parser.add_argument(
+        '--max-requests', type=int, default=0,
+        help='restart a worker after this many requests, 0 disables '
+        '(default: %(default)s)',
+    )
+    parser.add_argument(
+        '--pid', default=None,
+        help='file to write the master pid to, for sending SIGHUP',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=os.path.join(tempfile.gettempdir(), 'syncr-frontend-cache'),
+        help='directory of the cache shared by the workers '
+        '(default: %(default)s)',
+    )
+    parser.add_argument(
+        '--no-warm-up', dest='warm_up', action='store_false',
+        help='do not fill the cache before accepting requests',
+    )
+
+    return parser.parse_args(argv)
+
+
+def live_stream_limit(args):
+    """
+    :param args: parsed options
+    :return: event streams a worker may hold open, keeping threads free \
+            for the pages unless set explicitly
+    """
+    if args.live_streams is not None:
+        return args.live_streams
+    if frontend.app.config['LIVE_MAX_STREAMS'] is not None:
+        return frontend.app.config['LIVE_MAX_STREAMS']
+
+    return max(args.threads - LIVE_RESERVED_THREADS, 1)
+
+
+def _post_fork(server, worker):
+    """
+    Gunicorn hook: connections opened by the master must not be shared,
+    and the threads of the prefetcher run in the workers only
+    """
+    reset_connections()
+    if frontend.app.config['PREFETCH']:
+        frontend.prefetcher.start()
+
+
+def _make_application(options):
+    """
+    :param options: gunicorn settings
+    :return: gunicorn application serving frontend.app
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class FrontendApplication(BaseApplication):
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return frontend.app
+
+    return FrontendApplication()
+
+
+def main(argv=None):
+    """
+    Entry point of the syncr-frontend command
+    """
+    args = parse_args(argv)
+
+    try:
+        import gunicorn  # noqa
+    except ImportError:
+        sys.exit(
+            'The production server requires gunicorn, install it with '
+            'pip install "5yncr Frontend[server]"',
+        )
+
+    frontend.app.config['CACHE_DIR'] = args.cache_dir
+    frontend.app.config['LIVE_MAX_STREAMS'] = live_stream_limit(args)
+    frontend.configure_caches()
+    if args.warm_up:
+        frontend.warm_up()
+        # Forked workers open their own connections
+        reset_connections()
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'pidfile': args.pid,
+        'preload_app': True,
+        'post_fork': _post_fork,
+    }
+    _make_application(options).run()
+
+
+if __name__ == '__main__':
+    main()
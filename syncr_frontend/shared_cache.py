@@ -0,0 +1,188 @@
+"""On-disk cache shared by every worker process of the frontend"""
+import os
+import sqlite3
+import threading
+import time
+
+import bencode
+
+# Seconds between deletions of the expired entries by each process
+PURGE_INTERVAL = 60
+
+
+class SharedCache:
+    """
+    Cache with the interface of TTLCache that stores bencoded entries in a
+    sqlite database, so all worker processes on the machine share them.
+    Every process keeps its own hit and miss counters. Expired entries of
+    every namespace are deleted while storing, at most once every
+    PURGE_INTERVAL seconds.
+    """
+
+    def __init__(self, directory, namespace, ttl):
+        """
+        :param directory: directory of the cache database, created if needed
+        :param namespace: prefix separating this cache from others \
+                stored in the same database
+        :param ttl: seconds an entry stays valid, 0 disables the cache
+        """
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._purged = time.monotonic()
+
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, expires REAL, value BLOB)',
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS entries_expires '
+                'ON entries (expires)',
+            )
+
+    def _connection(self):
+        """
+        :return: sqlite connection of this thread, reopened after a fork
+        """
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+
+        return db
+
+    def _key(self, key):
+        return '{}:{}'.format(self.namespace, key)
+
+    def _range(self):
+        """
+        :return: bounds of the keys in this namespace
+        """
+        return self.namespace + ':', self.namespace + ';'
+
+    def _purge(self, db, now):
+        """
+        Deletes the expired entries of every namespace if PURGE_INTERVAL
+        passed since the last time
+
+        :param db: connection in the transaction of a write
+        :param now: current time.time()
+        """
+        with self._lock:
+            if time.monotonic() - self._purged < PURGE_INTERVAL:
+                return
+            self._purged = time.monotonic()
+
+        db.execute('DELETE FROM entries WHERE expires <= ?', (now,))
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """
+        :param key: key of the entry
+        :param default: returned when the entry is missing or expired
+        :return: cached value or default
+        """
+        row = self._connection().execute(
+            'SELECT value FROM entries WHERE key = ? AND expires > ?',
+            (self._key(key), time.time()),
+        ).fetchone()
+
+        self._count(row is not None)
+        if row is None:
+            return default
+
+        return bencode.decode(bytes(row[0]))
+
+    def set(self, key, value):
+        """
+        :param key: key of the entry
+        :param value: bencodable value to cache for ttl seconds
+        """
+        if self.ttl <= 0:
+            return
+
+        now = time.time()
+        with self._connection() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?)',
+                (self._key(key), now + self.ttl, bencode.encode(value)),
+            )
+            self._purge(db, now)
+
+    def add(self, key, value):
+        """
+        Stores an entry only if the key has no valid entry yet, atomically
+        across the processes sharing the database
+
+        :param key: key of the entry
+        :param value: bencodable value to cache for ttl seconds
+        :return: False if the key already had a valid entry
+        """
+        if self.ttl <= 0:
+            return True
+
+        now = time.time()
+        with self._connection() as db:
+            # One transaction, the first write locks the database
+            db.execute(
+                'DELETE FROM entries WHERE key = ? AND expires <= ?',
+                (self._key(key), now),
+            )
+            cursor = db.execute(
+                'INSERT OR IGNORE INTO entries VALUES (?, ?, ?)',
+                (self._key(key), now + self.ttl, bencode.encode(value)),
+            )
+            added = cursor.rowcount == 1
+            self._purge(db, now)
+
+        return added
+
+    def invalidate(self, key=None):
+        """
+        :param key: key of the entry to drop, or None to drop every entry \
+                of this namespace
+        """
+        with self._connection() as db:
+            if key is None:
+                db.execute(
+                    'DELETE FROM entries WHERE key > ? AND key < ?',
+                    self._range(),
+                )
+            else:
+                db.execute(
+                    'DELETE FROM entries WHERE key = ?',
+                    (self._key(key),),
+                )
+
+    def stats(self):
+        """
+        :return: dictionary of this process's hit and miss counters and the \
+                number of live entries
+        """
+        size = self._connection().execute(
+            'SELECT COUNT(*) FROM entries '
+            'WHERE key > ? AND key < ? AND expires > ?',
+            self._range() + (time.time(),),
+        ).fetchone()[0]
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': size,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,39 @@
+// Polls the progress of a bulk action and updates the state of every drop
+// until all of them finished.
+(function () {
+  var body = document.getElementById('bulk-rows');
+  if (!body || body.dataset.done === 'true') {
+    return;
+  }
+
+  var summary = document.getElementById('bulk-summary');
+
+  function update(progress) {
+    progress.items.forEach(function (item, index) {
+      var row = body.rows[index];
+      if (!row || row.dataset.drop !== item.drop_id) {
+        return;
+      }
+      var state = row.querySelector('.bulk-state');
+      state.textContent = item.state;
+      state.className = 'bulk-state ' + item.state;
+      row.querySelector('.bulk-message').textContent = item.message || '';
+    });
+    summary.textContent = progress.finished + ' of ' + progress.total +
+      ' drops finished';
+  }
+
+  function poll() {
+    fetch(body.dataset.url)
+      .then(function (response) { return response.json(); })
+      .then(function (progress) {
+        update(progress);
+        if (!progress.done) {
+          setTimeout(poll, 1000);
+        }
+      })
+      .catch(function () { setTimeout(poll, 5000); });
+  }
+
+  setTimeout(poll, 500);
+})();
@@ -0,0 +1,56 @@
+// Loads further folders of a large directory from the JSON endpoint while
+// the user scrolls towards the end of the list.
+(function () {
+  var body = document.getElementById('directory-rows');
+  if (!body) {
+    return;
+  }
+
+  var url = body.dataset.url;
+  var link = body.dataset.link;
+  var total = parseInt(body.dataset.total, 10);
+  var pageSize = parseInt(body.dataset.pageSize, 10);
+  var loading = false;
+
+  function appendFolders(folders) {
+    var fragment = document.createDocumentFragment();
+    folders.forEach(function (name) {
+      var tr = document.createElement('tr');
+      var th = document.createElement('th');
+      var a = document.createElement('a');
+      tr.className = 'file-info-row';
+      th.className = 'file-name';
+      a.href = link + '/' + encodeURIComponent(name);
+      a.textContent = name;
+      th.appendChild(a);
+      tr.appendChild(th);
+      fragment.appendChild(tr);
+    });
+    body.appendChild(fragment);
+  }
+
+  function loadMore() {
+    var loaded = body.rows.length;
+    if (loading || loaded >= total) {
+      return;
+    }
+    if (body.getBoundingClientRect().bottom > window.innerHeight * 2) {
+      return;
+    }
+
+    loading = true;
+    fetch(url + '?offset=' + loaded + '&limit=' + pageSize)
+      .then(function (response) { return response.json(); })
+      .then(function (page) {
+        loading = false;
+        total = page.total;
+        appendFolders(page.folders);
+        loadMore();
+      })
+      .catch(function () { loading = false; });
+  }
+
+  window.addEventListener('scroll', loadMore, {passive: true});
+  window.addEventListener('resize', loadMore);
+  loadMore();
+})();
@@ -0,0 +1,98 @@
+// Loads further pages of the file table from the JSON endpoint while the
+// user scrolls towards its end, and reloads it when the search form changes.
+(function () {
+  var body = document.getElementById('file-rows');
+  if (!body) {
+    return;
+  }
+
+  var form = document.getElementById('file-query');
+  var url = body.dataset.url;
+  var total = parseInt(body.dataset.total, 10);
+  var pageSize = parseInt(body.dataset.pageSize, 10);
+  var query = '';
+  var generation = 0;
+  var loading = false;
+  var timer = null;
+
+  function cell(className, text) {
+    var th = document.createElement('th');
+    th.className = className;
+    th.textContent = text;
+    return th;
+  }
+
+  function appendRows(rows) {
+    var fragment = document.createDocumentFragment();
+    rows.forEach(function (row) {
+      var tr = document.createElement('tr');
+      tr.className = 'file-info-row';
+      tr.appendChild(cell('file-name', row.name));
+      tr.appendChild(cell('remote-file-status', row.remote_status || ''));
+      tr.appendChild(cell('file-status', row.local_status || ''));
+      tr.appendChild(cell('file-percent', row.percent + '%'));
+      fragment.appendChild(tr);
+    });
+    body.appendChild(fragment);
+  }
+
+  function loadMore() {
+    var loaded = body.rows.length;
+    if (loading || loaded >= total) {
+      return;
+    }
+    var bottom = body.getBoundingClientRect().bottom;
+    if (loaded && bottom > window.innerHeight * 2) {
+      return;
+    }
+
+    loading = true;
+    var requested = generation;
+    fetch(url + '?offset=' + loaded + '&limit=' + pageSize + query)
+      .then(function (response) {
+        if (!response.ok) {
+          // Backend unavailable, the next scroll tries again
+          throw new Error(response.statusText);
+        }
+        return response.json();
+      })
+      .then(function (page) {
+        loading = false;
+        if (requested !== generation) {
+          loadMore();
+          return;
+        }
+        total = page.total;
+        appendRows(page.rows);
+        loadMore();
+      })
+      .catch(function () { loading = false; });
+  }
+
+  function search() {
+    if (form) {
+      query = '&' + new URLSearchParams(new FormData(form)).toString();
+    }
+    generation += 1;
+    total = Infinity;
+    while (body.firstChild) {
+      body.removeChild(body.firstChild);
+    }
+    loadMore();
+  }
+
+  if (form) {
+    form.addEventListener('submit', function (event) {
+      event.preventDefault();
+    });
+    form.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(search, 200);
+    });
+  }
+  // Sent by live_updates.js when files were added or removed
+  body.addEventListener('file-table-reload', search);
+  window.addEventListener('scroll', loadMore, {passive: true});
+  window.addEventListener('resize', loadMore);
+  loadMore();
+})();
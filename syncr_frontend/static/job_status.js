@@ -0,0 +1,34 @@
+// Follows the background jobs shown on the page through their event
+// streams until they finished.
+(function () {
+  var jobs = document.querySelectorAll('.job[data-events]');
+
+  function follow(element) {
+    var source = new EventSource(element.dataset.events);
+    var finished = false;
+
+    source.addEventListener('state', function (event) {
+      var job = JSON.parse(event.data);
+      element.querySelector('.job-state').textContent = job.state;
+      element.querySelector('.job-message').textContent = job.message || '';
+      if (job.finished !== null) {
+        finished = true;
+        source.close();
+        element.querySelector('.job-cancel').hidden = true;
+        element.querySelector('.job-reload').hidden = false;
+      }
+    });
+
+    // Refused while the server is busy, the browser does not retry that
+    source.addEventListener('error', function () {
+      if (!finished && source.readyState === EventSource.CLOSED) {
+        var retry = parseInt(element.dataset.retry, 10) * 1000;
+        setTimeout(function () {
+          follow(element);
+        }, retry * (1 + Math.random()));
+      }
+    });
+  }
+
+  Array.prototype.forEach.call(jobs, follow);
+})();
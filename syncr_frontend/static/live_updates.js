@@ -0,0 +1,97 @@
+// Applies the file table changes streamed by the server to the rows on
+// the page, instead of reloading the whole page.
+(function () {
+  var freshness = document.getElementById('file-freshness');
+
+  // The page carries when its state was fetched, the age is counted here
+  function showAge() {
+    var fetchedAt = parseInt(freshness.dataset.fetchedAt, 10) * 1000;
+    var age = Math.max(Math.floor((Date.now() - fetchedAt) / 1000), 0);
+    freshness.textContent = age < 2 ?
+      'Updated just now' : 'Updated ' + age + ' seconds ago';
+  }
+
+  if (freshness) {
+    showAge();
+    setInterval(showAge, 1000);
+  }
+
+  var body = document.getElementById('file-rows');
+  if (!body || !window.EventSource) {
+    return;
+  }
+
+  var summary = document.getElementById('file-summary');
+  var notice = document.getElementById('live-notice');
+  var owned = Boolean(body.dataset.owned);
+  var newVersion = Boolean(body.dataset.newVersion);
+  var newUpdates = Boolean(body.dataset.newUpdates);
+
+  function updateSummary(data) {
+    var files = data.summary;
+    if (freshness) {
+      freshness.dataset.fetchedAt = Math.floor(Date.now() / 1000);
+      showAge();
+    }
+    if (summary) {
+      summary.textContent = files.files + ' files. ' +
+        'Local: ' + files.local.added + ' added, ' +
+        files.local.changed + ' changed, ' +
+        files.local.removed + ' removed. ' +
+        'Remote: ' + files.remote.added + ' added, ' +
+        files.remote.changed + ' changed, ' +
+        files.remote.removed + ' removed.';
+    }
+
+    // The actions offered in the toolbar only change on reload
+    var actionsChanged = (
+      (owned && data.local_changes !== newVersion) ||
+      data.remote_changes !== newUpdates
+    );
+    if (notice) {
+      notice.hidden = !actionsChanged;
+    }
+  }
+
+  function updateRows(rows) {
+    var changed = {};
+    rows.forEach(function (row) {
+      changed[row.name] = row;
+    });
+
+    Array.prototype.forEach.call(body.rows, function (tr) {
+      var row = changed[tr.cells[0].textContent];
+      if (row) {
+        tr.cells[1].textContent = row.remote_status || '';
+        tr.cells[2].textContent = row.local_status || '';
+        tr.cells[3].textContent = row.percent + '%';
+      }
+    });
+  }
+
+  function connect() {
+    var events = new EventSource(body.dataset.events);
+
+    events.addEventListener('delta', function (event) {
+      var data = JSON.parse(event.data);
+      updateSummary(data);
+      updateRows(data.rows);
+    });
+
+    events.addEventListener('reset', function (event) {
+      updateSummary(JSON.parse(event.data));
+      body.dispatchEvent(new CustomEvent('file-table-reload'));
+    });
+
+    // A stream refused while the server is busy is not retried by the
+    // browser, so reconnect later, spread out over the open pages
+    events.addEventListener('error', function () {
+      if (events.readyState === EventSource.CLOSED) {
+        var retry = parseInt(body.dataset.retry, 10) * 1000;
+        setTimeout(connect, retry * (1 + Math.random()));
+      }
+    });
+  }
+
+  connect();
+})();
@@ -0,0 +1,78 @@
+import pytest
+
+
+class Clock:
+    """
+    Clock moved by hand, to patch over time.monotonic or time.time
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+class Backend:
+    """
+    Stand-in for send_request answering from canned drop states, counting
+    the requests of each action
+    """
+
+    def __init__(self):
+        self.drops = {}
+        self.requests = {}
+
+    def add_drop(self, drop_id, files, pending_changes=None, owned=True):
+        self.drops[drop_id] = {
+            'owned': owned,
+            'drop': {'drop_id': drop_id, 'name': drop_id, 'files': files},
+            'pending_changes': pending_changes or {},
+        }
+
+    def __call__(self, message, timeout=None):
+        action = message['action'].rpartition('.')[2]
+        self.requests[action] = self.requests.get(action, 0) + 1
+
+        if action == 'GET_OWNED_SUBSCRIBED_DROPS':
+            owned = [
+                {'drop_id': drop_id, 'name': drop_id}
+                for drop_id, drop in sorted(self.drops.items())
+                if drop['owned']
+            ]
+            subscribed = [
+                {'drop_id': drop_id, 'name': drop_id}
+                for drop_id, drop in sorted(self.drops.items())
+                if not drop['owned']
+            ]
+            return {'requested_drops_tuple': (owned, subscribed)}
+
+        drop = self.drops.get(message.get('drop_id'))
+        if action == 'GET_SELECTED_DROP':
+            return {'requested_drops': drop and {'drop': drop['drop']}}
+        if action == 'GET_PENDING_CHANGES':
+            return {'requested_drops': drop and {
+                'drop': drop['drop'],
+                'pending_changes': drop['pending_changes'],
+            }}
+
+        return {'success': True, 'message': 'Done'}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    from syncr_frontend import frontend
+
+    backend = Backend()
+    monkeypatch.setattr('syncr_frontend.frontend.send_request', backend)
+    monkeypatch.setitem(frontend.app.config, 'PREFETCH', False)
+    frontend.configure_caches()
+    frontend.file_index_cache.invalidate()
+    yield backend
+    frontend.configure_caches()
+    frontend.file_index_cache.invalidate()
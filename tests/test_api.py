@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from syncr_frontend import frontend
+from syncr_frontend.bulk import DONE
+from syncr_frontend.frontend import app
+
+
+@pytest.mark.parametrize('url, actions', (
+    ('/api/v1/drops', ('GET_OWNED_SUBSCRIBED_DROPS',)),
+    (
+        '/api/v1/drops/d1',
+        ('GET_OWNED_SUBSCRIBED_DROPS', 'GET_PENDING_CHANGES'),
+    ),
+    ('/api/v1/drops/d1/files', ('GET_PENDING_CHANGES',)),
+    ('/api/v1/drops/d1/owners', ('GET_SELECTED_DROP',)),
+))
+def test_not_modified_without_backend_request(backend, url, actions):
+    backend.add_drop('d1', {'a.txt': 100})
+    client = app.test_client()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    requests = dict(backend.requests)
+
+    # The replies expired, the stamps still answer
+    frontend.drop_list_cache.invalidate()
+    frontend.drop_state_cache.invalidate()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert backend.requests == requests
+
+    frontend.invalidate_drop_list()
+    frontend.invalidate_drop('d1')
+    backend.add_drop('d1', {'a.txt': 100, 'b.txt': 50})
+    backend.add_drop('d2', {})
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    for action in actions:
+        assert backend.requests[action] == requests[action] + 1
+
+
+def test_etag_is_unchanged_when_the_reply_is(backend):
+    backend.add_drop('d1', {'a.txt': 100})
+    client = app.test_client()
+
+    etag = client.get('/api/v1/drops/d1/files').headers['ETag']
+    frontend.invalidate_drop('d1')
+    response = client.get(
+        '/api/v1/drops/d1/files', headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+    assert backend.requests['GET_PENDING_CHANGES'] == 2
+
+
+def test_submit_reports_a_cancelled_job(backend, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def perform(drop_id):
+        started.set()
+        release.wait(5)
+        return DONE, 'Done'
+
+    monkeypatch.setitem(frontend.JOB_ACTIONS, 'new_version', perform)
+    client = app.test_client()
+
+    response = client.post('/api/v1/drops/d1/new_version')
+    assert response.status_code == 202
+    job = response.get_json()
+    assert started.wait(5)
+    frontend.job_queue.cancel(job['id'])
+
+    # The backend still works on it, so it is returned as it is
+    response = client.post('/api/v1/drops/d1/new_version')
+    assert response.status_code == 200
+    assert response.get_json()['id'] == job['id']
+    assert frontend.submit_job('new_version', 'd1') == (
+        frontend.job_queue.status(job['id']),
+        'Cancelled, the backend may still finish it',
+    )
+
+    release.set()
+    frontend.job_queue.wait(job['id'], timeout=5)
@@ -0,0 +1,101 @@
+import bencode
+import pytest
+from bencode import BencodeDecodeError
+
+from syncr_frontend.bencode_stream import decode_chunks
+
+VALUES = [
+    0,
+    -42,
+    12345678901234567890,
+    '',
+    'text',
+    'ünïcödé',
+    b'\xff\x00\xfe',
+    [],
+    [1, 'two', [3, b'\x80']],
+    {},
+    {
+        'drop': {'name': 'Drop', 'version': 3},
+        'files': {'a.txt': ['local', 10], 'b/c.bin': ['remote', 2]},
+        'owners': ['key1', 'key2'],
+    },
+]
+
+
+def split_at(data, *positions):
+    """
+    :return: list of the chunks of data cut at the positions
+    """
+    bounds = [0] + list(positions) + [len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_decode_chunks_matches_bencode_at_every_split(value):
+    data = bencode.encode(value)
+    expected = bencode.decode(data)
+
+    assert decode_chunks([data]) == expected
+    for position in range(len(data) + 1):
+        assert decode_chunks(split_at(data, position)) == expected
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_decode_chunks_one_byte_at_a_time(value):
+    data = bencode.encode(value)
+
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert decode_chunks(chunks) == bencode.decode(data)
+
+
+def test_decode_chunks_memoryview_chunks():
+    data = bencode.encode(VALUES[-1])
+    view = memoryview(bytearray(data))
+
+    assert decode_chunks([view[:7], view[7:]]) == bencode.decode(data)
+
+
+def test_decode_chunks_compacts_buffer(monkeypatch):
+    monkeypatch.setattr('syncr_frontend.bencode_stream.COMPACT_THRESHOLD', 4)
+    value = {'files': [str(i) * 10 for i in range(50)]}
+    data = bencode.encode(value)
+
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    assert decode_chunks(chunks) == value
+
+
+@pytest.mark.parametrize('data', [
+    b'i1ei2e',
+    b'le0:',
+    b'4:spamx',
+])
+def test_decode_chunks_rejects_trailing_data(data):
+    with pytest.raises(BencodeDecodeError):
+        decode_chunks([data])
+    with pytest.raises(BencodeDecodeError):
+        decode_chunks(split_at(data, len(data) - 1))
+
+
+@pytest.mark.parametrize('data', [
+    b'5:spam',
+    b'05:spams',
+    b'-1:x',
+    b'x:spam',
+    b'4spam',
+    b'i01e',
+    b'i-0e',
+    b'ie',
+    b'i12',
+    b'l1:a',
+    b'd1:ai1e',
+    b'di1ei2ee',
+    b'',
+    b'x',
+])
+def test_decode_chunks_rejects_invalid_data(data):
+    with pytest.raises(BencodeDecodeError):
+        bencode.decode(data)
+    for position in range(len(data) + 1):
+        with pytest.raises(BencodeDecodeError):
+            decode_chunks(split_at(data, position))
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from syncr_frontend.bulk import BulkRunner
+from syncr_frontend.bulk import DONE
+from syncr_frontend.bulk import FAILED
+from syncr_frontend.bulk import RUNNING
+from syncr_frontend.cache import TTLCache
+from syncr_frontend.shared_cache import SharedCache
+
+
+def wait_done(runner, run_id):
+    for _ in range(500):
+        progress = runner.progress(run_id)
+        if progress['done']:
+            return progress
+        time.sleep(0.01)
+    raise AssertionError('bulk run did not finish')
+
+
+def test_run_reports_every_drop_in_order():
+    runner = BulkRunner(2, TTLCache(60))
+
+    def perform(drop_id):
+        if drop_id == 'b':
+            raise ValueError('backend error')
+        return DONE, 'ok ' + drop_id
+
+    run = runner.start('action', ['a', 'b', 'a', 'c'], perform)
+    progress = wait_done(runner, run.id)
+
+    assert progress['total'] == 3
+    assert progress['finished'] == 3
+    assert progress['failed'] == 1
+    assert progress['items'] == [
+        {'drop_id': 'a', 'state': DONE, 'message': 'ok a'},
+        {'drop_id': 'b', 'state': FAILED, 'message': 'backend error'},
+        {'drop_id': 'c', 'state': DONE, 'message': 'ok c'},
+    ]
+    assert runner.stats() == {'running': 0, 'runs': 1}
+    assert runner.progress('unknown') is None
+
+
+def test_progress_is_shared_through_the_store(tmpdir):
+    owner = BulkRunner(2, SharedCache(str(tmpdir), 'bulk', 60))
+    other = BulkRunner(2, SharedCache(str(tmpdir), 'bulk', 60))
+    release = threading.Event()
+
+    def perform(drop_id):
+        release.wait(5)
+        return DONE, None
+
+    run = owner.start('action', ['a'], perform)
+    for _ in range(500):
+        if other.progress(run.id)['items'][0]['state'] == RUNNING:
+            break
+        time.sleep(0.01)
+    progress = other.progress(run.id)
+    assert progress['items'][0]['state'] == RUNNING
+    assert not progress['done']
+    assert other.stats()['running'] == 0
+    assert owner.stats()['running'] == 1
+
+    release.set()
+    assert wait_done(other, run.id)['items'][0]['state'] == DONE
@@ -0,0 +1,69 @@
+import threading
+
+from syncr_frontend.cache import TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.cache.time.monotonic', clock)
+    cache = TTLCache(10)
+
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    clock.now += 9.9
+    assert cache.get('key') == 'value'
+    clock.now += 0.1
+    assert cache.get('key', 'default') == 'default'
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 0, 'ttl': 10}
+
+
+def test_set_refreshes_the_ttl(monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.cache.time.monotonic', clock)
+    cache = TTLCache(10)
+
+    cache.set('key', 1)
+    clock.now += 8
+    cache.set('key', 2)
+    clock.now += 8
+    assert cache.get('key') == 2
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = TTLCache(0)
+
+    cache.set('key', 'value')
+    assert cache.get('key') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_invalidate():
+    cache = TTLCache(10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    cache.invalidate('a')
+    cache.invalidate('missing')
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+    cache.invalidate()
+    assert cache.get('b') is None
+
+
+def test_concurrent_use():
+    cache = TTLCache(10)
+
+    def work(offset):
+        for i in range(1000):
+            cache.set(offset + i, i)
+            assert cache.get(offset + i) == i
+
+    threads = [
+        threading.Thread(target=work, args=(n * 1000,)) for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats()['size'] == 4000
+    assert cache.stats()['hits'] == 4000
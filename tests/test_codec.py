@@ -0,0 +1,44 @@
+import pytest
+
+from syncr_frontend.codec import CODECS
+
+REPLY = {
+    'drop': {'name': 'Drop', 'version': 3},
+    'files': {'a.txt': ['local', 10], 'b/c.bin': ['remote', 2]},
+    'owners': ['key1', 'key2'],
+}
+
+
+@pytest.mark.parametrize('codec', CODECS.values(), ids=list(CODECS))
+def test_decode_chunks_at_every_split(codec):
+    data = codec.encode(REPLY)
+
+    for position in range(len(data) + 1):
+        chunks = [data[:position], data[position:]]
+        assert codec.decode_chunks(chunks) == REPLY
+
+
+@pytest.mark.parametrize('codec', CODECS.values(), ids=list(CODECS))
+def test_decode_chunks_reused_buffer(codec):
+    data = codec.encode(REPLY)
+
+    def chunks():
+        # Like _recv_chunks, every chunk overwrites the previous one
+        buf = bytearray(4)
+        view = memoryview(buf)
+        for start in range(0, len(data), len(buf)):
+            part = data[start:start + len(buf)]
+            view[:len(part)] = part
+            yield view[:len(part)]
+
+    assert codec.decode_chunks(chunks()) == REPLY
+
+
+@pytest.mark.parametrize('codec', CODECS.values(), ids=list(CODECS))
+def test_decode_chunks_rejects_truncated_and_trailing_data(codec):
+    data = codec.encode(REPLY)
+
+    with pytest.raises(Exception):
+        codec.decode_chunks([data[:-1]])
+    with pytest.raises(Exception):
+        codec.decode_chunks([data, b'\x00'])
@@ -0,0 +1,401 @@
+import socket
+import threading
+import time
+
+import bencode
+import pytest
+
+from syncr_frontend import communication
+from syncr_frontend.communication import action_timeout
+from syncr_frontend.communication import CircuitBreaker
+from syncr_frontend.communication import ConnectionPool
+from syncr_frontend.communication import FRAME_HEADER
+from syncr_frontend.communication import send_request
+from syncr_frontend.constants import BACKEND_SOCKET_ENV
+from syncr_frontend.constants import FRAME_MAGIC
+from syncr_frontend.constants import FRAMING_HELLO_ACTION
+from syncr_frontend.constants import FRAMING_VERSION
+from syncr_frontend.constants import TIMEOUT
+
+
+class Probe:
+    """
+    Health probe with a scripted answer that counts its calls
+    """
+
+    def __init__(self, healthy=False):
+        self.healthy = healthy
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.healthy
+
+
+def make_breaker(monkeypatch, clock, healthy=False):
+    monkeypatch.setattr('syncr_frontend.communication.time.monotonic', clock)
+    probe = Probe(healthy)
+
+    return CircuitBreaker(probe, 3, 5), probe
+
+
+def test_opens_after_consecutive_failures(monkeypatch, clock):
+    breaker, probe = make_breaker(monkeypatch, clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert probe.calls == 0
+    state = breaker.state()
+    assert state['state'] == 'open'
+    assert state['failures'] == 3
+    assert state['rejected'] == 2
+
+
+def test_success_resets_the_failure_count(monkeypatch, clock):
+    breaker, _ = make_breaker(monkeypatch, clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert breaker.state()['state'] == 'closed'
+
+
+def test_failed_probe_keeps_the_circuit_open(monkeypatch, clock):
+    breaker, probe = make_breaker(monkeypatch, clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 5
+    assert not breaker.allow()
+    assert probe.calls == 1
+    # The next probe waits for another interval
+    assert not breaker.allow()
+    assert probe.calls == 1
+    clock.now += 5
+    assert not breaker.allow()
+    assert probe.calls == 2
+
+
+def test_successful_probe_lets_a_trial_through(monkeypatch, clock):
+    breaker, probe = make_breaker(monkeypatch, clock, healthy=True)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 5
+    assert breaker.allow()
+    assert probe.calls == 1
+    assert breaker.state()['state'] == 'half_open'
+    # Other callers wait for the trial
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state()['state'] == 'closed'
+    assert breaker.allow()
+    assert probe.calls == 1
+
+
+@pytest.mark.parametrize('probe_first', [True, False])
+def test_failed_trial_reopens_the_circuit(monkeypatch, clock, probe_first):
+    breaker, probe = make_breaker(monkeypatch, clock, healthy=True)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow(probe=probe_first)
+    assert probe.calls == int(probe_first)
+    assert breaker.state()['state'] == 'half_open'
+
+    breaker.record_failure()
+    assert breaker.state()['state'] == 'open'
+    assert not breaker.allow(probe=probe_first)
+    clock.now += 4.9
+    assert not breaker.allow(probe=probe_first)
+    clock.now += 0.1
+    assert breaker.allow(probe=probe_first)
+
+
+def test_trial_without_probe_closes_only_on_success(monkeypatch, clock):
+    breaker, probe = make_breaker(monkeypatch, clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow(probe=False)
+    assert probe.calls == 0
+    assert breaker.state()['state'] == 'half_open'
+    assert not breaker.allow(probe=False)
+
+    breaker.record_success()
+    assert breaker.state()['state'] == 'closed'
+
+
+def test_trial_that_never_reports_is_replaced(monkeypatch, clock):
+    breaker, _ = make_breaker(monkeypatch, clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow(probe=False)
+
+    clock.now += 4
+    assert not breaker.allow(probe=False)
+    clock.now += 1
+    assert breaker.allow(probe=False)
+    assert breaker.state()['state'] == 'half_open'
+
+
+def test_reset(monkeypatch, clock):
+    breaker, _ = make_breaker(monkeypatch, clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    breaker.reset()
+    assert breaker.allow()
+    assert breaker.state() == {
+        'state': 'closed', 'failures': 0, 'rejected': 0, 'open_for': 0.0,
+    }
+
+
+@pytest.mark.parametrize('action, timeout', [
+    ('FrontendAction.GET_PENDING_CHANGES', TIMEOUT),
+    ('FrontendAction.GET_SELECTED_DROP', TIMEOUT),
+    ('FrontendAction.ADD_OWNER', 30),
+    ('NEW_VERSION', 60 * 60),
+])
+def test_action_timeout(action, timeout):
+    assert action_timeout(action) == timeout
+
+
+def recv_exact(conn, size):
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class Backend:
+    """
+    Unix socket backend answering every action with its name, over framed
+    connections if framing is True. An action in drop_reply is performed
+    once without a reply, closing its connection.
+    """
+
+    def __init__(self, path, framing=True):
+        self.framing = framing
+        self.connections = 0
+        self.actions = []
+        self.drop_reply = set()
+        self.framed = []
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen(8)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close_idle(self):
+        for conn in self.framed:
+            conn.close()
+
+    def close(self):
+        self._server.close()
+        self.close_idle()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(
+                target=self._serve, args=(conn,), daemon=True,
+            ).start()
+
+    def _reply(self, request):
+        action = request['action'].rpartition('.')[2]
+        if action == FRAMING_HELLO_ACTION:
+            if not self.framing:
+                return {'status': 'error', 'message': 'Unknown action'}
+            return {'framing': FRAMING_VERSION, 'codec': 'bencode'}
+        self.actions.append(action)
+        if action in self.drop_reply:
+            self.drop_reply.discard(action)
+            return None
+        return {'action': action}
+
+    def _serve(self, conn):
+        with conn:
+            start = recv_exact(conn, len(FRAME_MAGIC))
+            if start == FRAME_MAGIC and self.framing:
+                self.framed.append(conn)
+                self._serve_framed(conn)
+                return
+
+            data = start or b''
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            conn.sendall(bencode.encode(self._reply(bencode.decode(data))))
+
+    def _serve_framed(self, conn):
+        while True:
+            try:
+                header = recv_exact(conn, FRAME_HEADER.size)
+                if header is None:
+                    return
+                (length,) = FRAME_HEADER.unpack(header)
+                request = bencode.decode(recv_exact(conn, length))
+            except OSError:
+                # Closed by close_idle
+                return
+            reply = self._reply(request)
+            if reply is None:
+                return
+            msg = bencode.encode(reply)
+            conn.sendall(FRAME_HEADER.pack(len(msg)) + msg)
+
+
+@pytest.fixture
+def start_backend(monkeypatch, tmpdir):
+    path = str(tmpdir.join('backend.sock'))
+    monkeypatch.setenv(BACKEND_SOCKET_ENV, path)
+    communication.reset_connections()
+    backends = []
+
+    def start(framing):
+        backends.append(Backend(path, framing))
+        return backends[-1]
+
+    yield start
+    for backend in backends:
+        backend.close()
+    communication.reset_connections()
+
+
+@pytest.fixture(params=[True, False], ids=['framed', 'one_shot'])
+def backend(request, start_backend):
+    return start_backend(request.param)
+
+
+@pytest.fixture
+def framed_backend(start_backend):
+    return start_backend(True)
+
+
+def test_send_request(backend):
+    for _ in range(3):
+        response = send_request({'action': 'GET_PUBLIC_KEY'})
+        assert response == {'action': 'GET_PUBLIC_KEY'}
+
+    assert backend.actions == ['GET_PUBLIC_KEY'] * 3
+    if backend.framing:
+        # The hello, then one pooled connection for every request
+        assert backend.connections == 2
+    else:
+        assert backend.connections == 4
+
+
+def test_connection_closed_by_the_backend_is_replaced(framed_backend):
+    send_request({'action': 'GET_PUBLIC_KEY'})
+    framed_backend.close_idle()
+    time.sleep(0.05)
+
+    assert send_request({'action': 'GET_PUBLIC_KEY'}) == {
+        'action': 'GET_PUBLIC_KEY',
+    }
+    assert framed_backend.connections == 3
+
+
+def test_read_only_action_is_sent_again_after_a_lost_reply(framed_backend):
+    send_request({'action': 'GET_PUBLIC_KEY'})
+    framed_backend.drop_reply.add('GET_PENDING_CHANGES')
+
+    assert send_request({'action': 'GET_PENDING_CHANGES'}) == {
+        'action': 'GET_PENDING_CHANGES',
+    }
+    assert framed_backend.actions.count('GET_PENDING_CHANGES') == 2
+
+
+def test_other_action_is_not_sent_twice(framed_backend):
+    send_request({'action': 'GET_PUBLIC_KEY'})
+    framed_backend.drop_reply.add('NEW_VERSION')
+
+    response = send_request({'action': 'NEW_VERSION'})
+    assert response['status'] == 'error'
+    assert framed_backend.actions.count('NEW_VERSION') == 1
+
+
+class UnsentSocket:
+    """
+    Pooled connection the backend closed before the request was sent
+    """
+
+    closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendall(self, data):
+        raise BrokenPipeError()
+
+    def close(self):
+        self.closed = True
+
+
+def test_request_that_was_not_sent_is_sent_again(framed_backend, monkeypatch):
+    send_request({'action': 'GET_PUBLIC_KEY'})
+    unsent = UnsentSocket()
+    monkeypatch.setattr(
+        communication._pool, 'acquire', lambda: (unsent, True),
+    )
+
+    assert send_request({'action': 'NEW_VERSION'}) == {
+        'action': 'NEW_VERSION',
+    }
+    assert unsent.closed
+    assert framed_backend.actions.count('NEW_VERSION') == 1
+
+
+def test_pool_evicts_idle_connections(monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.communication.time.monotonic', clock)
+    peers = []
+
+    def connect():
+        s, peer = socket.socketpair()
+        peers.append(peer)
+        return s
+
+    pool = ConnectionPool(connect, max_size=1, idle_timeout=30)
+    first, reused = pool.acquire()
+    assert not reused
+    assert peers[0].recv(len(FRAME_MAGIC)) == FRAME_MAGIC
+
+    pool.release(first)
+    assert pool.acquire() == (first, True)
+
+    second = pool.open()
+    pool.release(first)
+    # Full, so the second connection is closed
+    pool.release(second)
+    assert second.fileno() == -1
+
+    clock.now += 31
+    third, reused = pool.acquire()
+    assert not reused
+    assert first.fileno() == -1
+    assert third is not first
+
+    for s in [third] + peers:
+        s.close()
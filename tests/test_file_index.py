@@ -0,0 +1,177 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from syncr_frontend.constants import FILE_PAGE_MAX
+from syncr_frontend.file_index import FileIndex
+from syncr_frontend.frontend import query_file_table
+
+
+def make_index():
+    return FileIndex({
+        'drop': {
+            'files': {
+                'docs/Readme.md': 100,
+                'src/main.py': 50,
+                'src/util.py': 100,
+                'Build.sh': 0,
+            },
+        },
+        'pending_changes': {
+            'changed': ['src/main.py'],
+            'removed': ['Build.sh'],
+            'unchanged': ['docs/Readme.md', 'src/util.py'],
+            'added': ['notes.txt'],
+        },
+        'remote_pending_changes': {
+            'changed': ['src/util.py'],
+            'added': ['src/new.py'],
+        },
+    })
+
+
+def names(index, positions):
+    return [index.names[position] for position in positions]
+
+
+def test_records_and_statuses():
+    index = make_index()
+
+    assert len(index) == 6
+    assert index.page(0, 10)[-2:] == [
+        {
+            'name': 'notes.txt',
+            'remote_status': None,
+            'local_status': 'added',
+            'percent': 0,
+        },
+        {
+            'name': 'src/new.py',
+            'remote_status': 'added',
+            'local_status': None,
+            'percent': 0,
+        },
+    ]
+    assert index.row(index.positions['src/main.py'])['percent'] == 50
+    assert index.count('local', 'changed') == 1
+    assert index.count('remote', None) == 4
+    assert index.has_changes('local')
+    assert index.has_changes('remote')
+
+
+def test_sort_by_name_is_case_insensitive():
+    index = make_index()
+
+    assert names(index, index.query(sort='name')) == [
+        'Build.sh',
+        'docs/Readme.md',
+        'notes.txt',
+        'src/main.py',
+        'src/new.py',
+        'src/util.py',
+    ]
+    assert names(index, index.query(sort='name', reverse=True))[0] == (
+        'src/util.py'
+    )
+
+
+def test_sort_by_percent_keeps_name_order_among_equals():
+    index = make_index()
+
+    assert names(index, index.query(sort='percent')) == [
+        'Build.sh',
+        'notes.txt',
+        'src/new.py',
+        'src/main.py',
+        'docs/Readme.md',
+        'src/util.py',
+    ]
+
+
+def test_substring_search_is_case_insensitive():
+    index = make_index()
+
+    assert names(index, index.query('README')) == ['docs/Readme.md']
+    assert names(index, index.query('.py', sort='name')) == [
+        'src/main.py',
+        'src/new.py',
+        'src/util.py',
+    ]
+    assert index.query('missing') == []
+    assert index.query('a\nb') == []
+
+
+def test_prefix_search_matches_only_the_start():
+    index = make_index()
+
+    assert names(index, index.query('SRC/', prefix=True)) == [
+        'src/main.py',
+        'src/new.py',
+        'src/util.py',
+    ]
+    assert index.query('main', prefix=True) == []
+
+
+def test_status_filters():
+    index = make_index()
+
+    assert names(index, index.query(local='removed')) == ['Build.sh']
+    assert names(index, index.query('src', remote='added')) == ['src/new.py']
+    with pytest.raises(KeyError):
+        index.query(local='unknown')
+    with pytest.raises(ValueError):
+        index.query(sort='size')
+
+
+def test_page_bounds():
+    index = make_index()
+    positions = index.query(sort='name')
+
+    assert [row['name'] for row in index.rows(positions, 4, 10)] == [
+        'src/new.py',
+        'src/util.py',
+    ]
+    assert index.rows(positions, 10, 10) == []
+    assert len(index.page(5, 10)) == 1
+    assert index.page(6, 10) == []
+
+
+def test_query_file_table_caps_the_page_at_file_page_max():
+    files = {'file{:05}'.format(i): 100 for i in range(FILE_PAGE_MAX + 10)}
+    index = FileIndex({'drop': {'files': files}})
+
+    page = query_file_table(index, MultiDict({'limit': '100000'}))
+    assert page['total'] == FILE_PAGE_MAX + 10
+    assert len(page['rows']) == FILE_PAGE_MAX
+
+    page = query_file_table(index, MultiDict({'offset': '-5', 'limit': '-1'}))
+    assert page['offset'] == 0
+    assert page['rows'] == []
+
+    page = query_file_table(index, MultiDict({'offset': FILE_PAGE_MAX}))
+    assert len(page['rows']) == 10
+
+
+def test_empty_reply():
+    index = FileIndex({})
+
+    assert len(index) == 0
+    assert index.page(0, 10) == []
+    assert index.query('x') == []
+    assert index.query(sort='name') == []
+    assert not index.has_changes('local')
+    assert index.summary() == {
+        'files': 0,
+        'local': {
+            'unchanged': 0, 'changed': 0, 'removed': 0, 'added': 0,
+        },
+        'remote': {
+            'unchanged': 0, 'changed': 0, 'removed': 0, 'added': 0,
+        },
+    }
+
+
+def test_changes_since():
+    index = make_index()
+
+    assert index.changes_since(make_index()) == []
+    assert index.changes_since(FileIndex({})) is None
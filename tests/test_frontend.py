@@ -1,2 +1,127 @@
+import pytest
+
+from syncr_frontend.constants import PROFILE_HEADER
+from syncr_frontend.file_index import FileIndex
+from syncr_frontend.frontend import app
+from syncr_frontend.frontend import profiling_requested
+from syncr_frontend.prefetch import Prefetcher
+
+
 def test_empty_test():
     assert True
+
+
+@pytest.fixture
+def profiling_app():
+    app.config.update(PROFILING=True, PROFILING_TOKEN='secret-token')
+    yield app
+    app.config.update(PROFILING=False, PROFILING_TOKEN=None)
+
+
+@pytest.mark.parametrize('headers, query, expected', [
+    ({PROFILE_HEADER: 'secret-token'}, '', True),
+    ({}, '?profile=secret-token', True),
+    ({PROFILE_HEADER: 'wrong-token'}, '', False),
+    ({}, '?profile=wrong-token', False),
+    ({}, '', False),
+    ({PROFILE_HEADER: ''}, '', False),
+    ({}, '?profile=s%C3%A9cret-token', False),
+    ({PROFILE_HEADER: 'sécret-token'}, '', False),
+])
+def test_profiling_token(profiling_app, headers, query, expected):
+    with profiling_app.test_request_context('/' + query, headers=headers):
+        assert profiling_requested() is expected
+
+
+def test_profiling_non_ascii_token(profiling_app):
+    profiling_app.config['PROFILING_TOKEN'] = 'sécret'
+    with profiling_app.test_request_context('/?profile=s%C3%A9cret'):
+        assert profiling_requested() is True
+    with profiling_app.test_request_context('/?profile=secret'):
+        assert profiling_requested() is False
+
+
+def test_profiling_disabled_ignores_token():
+    app.config['PROFILING_TOKEN'] = 'token'
+    try:
+        with app.test_request_context('/?profile=token'):
+            assert profiling_requested() is False
+    finally:
+        app.config['PROFILING_TOKEN'] = None
+
+
+def test_profiling_without_token_accepts_any_value(profiling_app):
+    profiling_app.config['PROFILING_TOKEN'] = None
+    with profiling_app.test_request_context('/?profile=ünïcödé'):
+        assert profiling_requested() is True
+
+
+def test_selected_drop_index_is_not_cached(backend):
+    backend.add_drop('d1', {'a.txt': 100, 'b.txt': 50}, {
+        'changed': ['b.txt'],
+        'unchanged': ['a.txt'],
+        'added': ['c.txt'],
+    })
+    client = app.test_client()
+
+    assert client.get('/view_owners/d1').status_code == 200
+    page = client.get('/drop/d1/files').get_json()
+    assert page['total'] == 3
+    assert [row['local_status'] for row in page['rows']] == [
+        'unchanged', 'changed', 'added',
+    ]
+
+
+def test_file_index_is_reused_from_the_shared_cache(
+    backend, monkeypatch, tmpdir,
+):
+    from syncr_frontend import frontend
+
+    built = []
+
+    def file_index(selected_drop_info):
+        built.append(selected_drop_info)
+        return FileIndex(selected_drop_info)
+
+    monkeypatch.setitem(app.config, 'CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr('syncr_frontend.frontend.FileIndex', file_index)
+    frontend.configure_caches()
+    backend.add_drop('d1', {'a.txt': 100, 'b.txt': 50})
+    client = app.test_client()
+
+    for _ in range(3):
+        page = client.get('/api/v1/drops/d1/files?q=a').get_json()
+        assert page['total'] == 1
+    assert client.get('/drop/d1/files').get_json()['total'] == 2
+    assert len(built) == 1
+    assert backend.requests['GET_PENDING_CHANGES'] == 1
+
+
+def test_warm_drop_page_is_not_modified(backend, clock, monkeypatch):
+    from syncr_frontend import frontend
+
+    prefetcher = Prefetcher(
+        frontend.prefetch_drop_state,
+        frontend.drop_state_changed,
+        frontend.list_drop_ids,
+        frontend.drop_invalidated_at,
+        workers=1,
+        min_interval=5,
+        max_interval=60,
+        recent=600,
+    )
+    monkeypatch.setattr('syncr_frontend.frontend.prefetcher', prefetcher)
+    monkeypatch.setitem(app.config, 'PREFETCH', True)
+    backend.add_drop('d1', {'a.txt': 100})
+    client = app.test_client()
+
+    response = client.get('/drop/d1')
+    assert b'data-fetched-at' in response.data
+    etag = response.headers['ETag']
+
+    # The age is counted by the page, not rendered into it
+    monkeypatch.setattr('time.time', clock)
+    clock.now = prefetcher.get('d1')[1] + 30
+    response = client.get('/drop/d1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert backend.requests['GET_PENDING_CHANGES'] == 1
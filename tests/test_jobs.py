@@ -0,0 +1,207 @@
+import threading
+import time
+
+import pytest
+
+from syncr_frontend.bulk import DONE
+from syncr_frontend.cache import TTLCache
+from syncr_frontend.constants import ACTION_TIMEOUTS
+from syncr_frontend.constants import JOB_KEEP
+from syncr_frontend.jobs import CANCELLED
+from syncr_frontend.jobs import JobQueue
+from syncr_frontend.jobs import QUEUED
+from syncr_frontend.jobs import QueueFull
+from syncr_frontend.jobs import RUNNING
+from syncr_frontend.shared_cache import SharedCache
+
+
+class Backend:
+    """
+    Stand-in for a backend action that runs until it is released
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, drop_id):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return DONE, 'done ' + drop_id
+
+
+def test_job_runs_and_finishes():
+    queue = JobQueue(1, 4, TTLCache(60))
+    backend = Backend()
+    backend.release.set()
+
+    job = queue.submit('new_version', 'drop', backend)
+    status = queue.wait(job['id'], timeout=5)
+
+    assert status['state'] == DONE
+    assert status['message'] == 'done drop'
+    assert status['finished'] is not None
+    assert queue.status('unknown') is None
+
+
+def test_running_action_is_deduplicated():
+    queue = JobQueue(2, 4, TTLCache(60))
+    backend = Backend()
+
+    first = queue.submit('new_version', 'drop', backend)
+    second = queue.submit('new_version', 'drop', backend)
+    other = queue.submit('sync_update', 'drop', backend)
+
+    assert second['id'] == first['id']
+    assert other['id'] != first['id']
+    assert [job['id'] for job in queue.for_drop(
+        'drop', ['new_version', 'sync_update'],
+    )] == [first['id'], other['id']]
+
+    backend.release.set()
+    queue.wait(first['id'], timeout=5)
+    queue.wait(other['id'], timeout=5)
+    assert queue.for_drop('drop', ['new_version', 'sync_update']) == []
+    third = queue.submit('new_version', 'drop', backend)
+    assert third['id'] != first['id']
+    queue.wait(third['id'], timeout=5)
+
+
+def test_queue_full():
+    queue = JobQueue(1, 1, TTLCache(60))
+    backend = Backend()
+
+    queue.submit('new_version', 'a', backend)
+    backend.started.wait(5)
+    queued = queue.submit('new_version', 'b', backend)
+    assert queued['state'] == QUEUED
+    with pytest.raises(QueueFull):
+        queue.submit('new_version', 'c', backend)
+    # An action already waiting is still found
+    assert queue.submit('new_version', 'b', backend)['id'] == queued['id']
+
+    backend.release.set()
+    queue.wait(queued['id'], timeout=5)
+
+
+def test_claim_is_renewed_when_the_job_starts(monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.cache.time.monotonic', clock)
+    queue = JobQueue(1, 4, TTLCache(60))
+    blocker = Backend()
+    backend = Backend()
+
+    queue.submit('new_version', 'a', blocker)
+    blocker.started.wait(5)
+    job = queue.submit('new_version', 'b', backend)
+
+    # Queued for most of the ttl, then running for most of it again
+    clock.now += 50
+    blocker.release.set()
+    assert backend.started.wait(5)
+    assert queue.wait(job['id'], job['version'], timeout=5)['state'] == RUNNING
+    clock.now += 50
+    assert queue.submit('new_version', 'b', backend)['id'] == job['id']
+
+    backend.release.set()
+    assert queue.wait(job['id'], timeout=5)['state'] == DONE
+    assert backend.calls == 1
+
+
+def test_jobs_are_kept_longer_than_their_actions_run():
+    assert JOB_KEEP > ACTION_TIMEOUTS['NEW_VERSION']
+    assert JOB_KEEP > ACTION_TIMEOUTS['SYNC_UPDATE']
+
+
+def test_cancel_queued_job_never_runs():
+    queue = JobQueue(1, 4, TTLCache(60))
+    blocker = Backend()
+    backend = Backend()
+    backend.release.set()
+
+    queue.submit('new_version', 'a', blocker)
+    blocker.started.wait(5)
+    job = queue.submit('new_version', 'b', backend)
+    status = queue.cancel(job['id'])
+
+    assert status['state'] == CANCELLED
+    assert status['message'] == 'Cancelled before it started'
+    # The slot is free again at once
+    assert queue.submit('new_version', 'b', backend)['id'] != job['id']
+
+    blocker.release.set()
+    queue.wait(job['id'], timeout=5)
+    assert backend.started.wait(5)
+
+
+def test_cancelled_running_job_holds_its_slot_until_backend_returns():
+    queue = JobQueue(1, 4, TTLCache(60))
+    backend = Backend()
+
+    job = queue.submit('new_version', 'drop', backend)
+    backend.started.wait(5)
+    status = queue.cancel(job['id'])
+    assert status['state'] == CANCELLED
+    assert status['finished'] is not None
+
+    # The backend is still working on it, so no second job is started
+    assert queue.submit('new_version', 'drop', backend)['id'] == job['id']
+
+    backend.release.set()
+    for _ in range(500):
+        again = queue.submit('new_version', 'drop', backend)
+        if again['id'] != job['id']:
+            break
+        time.sleep(0.01)
+    assert again['id'] != job['id']
+    # The result of the cancelled job is ignored
+    assert queue.status(job['id'])['state'] == CANCELLED
+    queue.wait(again['id'], timeout=5)
+    assert backend.calls == 2
+
+
+def test_jobs_are_shared_through_the_store(tmpdir):
+    owner = JobQueue(1, 4, SharedCache(str(tmpdir), 'jobs', 60))
+    other = JobQueue(1, 4, SharedCache(str(tmpdir), 'jobs', 60))
+    backend = Backend()
+
+    job = owner.submit('new_version', 'drop', backend)
+    backend.started.wait(5)
+    status = other.wait(job['id'], job['version'], timeout=5)
+    assert status['state'] == RUNNING
+
+    # Submitting through another process finds the running job
+    assert other.submit('new_version', 'drop', backend)['id'] == job['id']
+    assert [job['id'] for job in other.for_drop('drop', ['new_version'])] == [
+        status['id'],
+    ]
+
+    backend.release.set()
+    assert other.wait(job['id'], timeout=5)['state'] == DONE
+    assert backend.calls == 1
+
+
+def test_cancel_through_another_process(tmpdir):
+    owner = JobQueue(1, 4, SharedCache(str(tmpdir), 'jobs', 60))
+    other = JobQueue(1, 4, SharedCache(str(tmpdir), 'jobs', 60))
+    blocker = Backend()
+    backend = Backend()
+
+    running = owner.submit('new_version', 'a', blocker)
+    blocker.started.wait(5)
+    queued = owner.submit('new_version', 'b', backend)
+
+    assert other.cancel(running['id'])['state'] == CANCELLED
+    assert other.cancel(queued['id'])['message'] == (
+        'Cancelled before it started'
+    )
+    assert owner.status(running['id'])['state'] == CANCELLED
+    # Still running in the backend, so the slot is held
+    assert other.submit('new_version', 'a', blocker)['id'] == running['id']
+
+    blocker.release.set()
+    status = owner.wait(queued['id'], timeout=5)
+    assert status['state'] == CANCELLED
+    assert owner.wait(running['id'], timeout=5)['state'] == CANCELLED
+    assert backend.calls == 0
@@ -0,0 +1,131 @@
+import time
+import types
+
+from syncr_frontend.file_index import FileIndex
+from syncr_frontend.frontend import app
+from syncr_frontend.live import LiveUpdates
+from syncr_frontend.live import StreamLimit
+from syncr_frontend.server import live_stream_limit
+
+
+def make_index(files, changed=()):
+    return FileIndex({
+        'drop': {'files': files},
+        'pending_changes': {
+            'changed': list(changed),
+            'unchanged': [name for name in files if name not in changed],
+        },
+    })
+
+
+class Drop:
+    """
+    File index of one drop, replaced by the test to change the drop
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.polls = 0
+
+    def __call__(self, drop_id):
+        index = self.index
+        self.polls += 1
+        return index
+
+
+def next_event(subscriber):
+    return subscriber.get(timeout=5)
+
+
+def change(drop, index):
+    # Between two polls, so the poller sees both states
+    polls = drop.polls
+    while drop.polls < polls + 1:
+        time.sleep(0.001)
+    drop.index = index
+    while drop.polls < polls + 2:
+        time.sleep(0.001)
+
+
+def test_subscribers_share_one_poller():
+    drop = Drop(make_index({'a.txt': 100, 'b.txt': 100}))
+    live_updates = LiveUpdates(drop, 0.01)
+    first = live_updates.subscribe('d1')
+    second = live_updates.subscribe('d1')
+    assert live_updates.stats()['drops'] == 1
+
+    change(drop, make_index({'a.txt': 100, 'b.txt': 50}, changed=['b.txt']))
+    for subscriber in (first, second):
+        event_id, name, data = next_event(subscriber)
+        assert name == 'delta'
+        assert [row['name'] for row in data['rows']] == ['b.txt']
+        assert data['local_changes'] is True
+
+    live_updates.unsubscribe('d1', first)
+    assert live_updates.stats()['drops'] == 1
+    live_updates.unsubscribe('d1', second)
+    assert live_updates.stats()['drops'] == 0
+
+
+def test_added_files_reset_the_table():
+    drop = Drop(make_index({'a.txt': 100}))
+    live_updates = LiveUpdates(drop, 0.01)
+    subscriber = live_updates.subscribe('d1')
+
+    change(drop, make_index({'a.txt': 100, 'b.txt': 100}))
+    event_id, name, data = next_event(subscriber)
+    assert name == 'reset'
+    assert data['summary']['files'] == 2
+    live_updates.unsubscribe('d1', subscriber)
+
+
+def test_subscriber_behind_is_reset():
+    drop = Drop(make_index({'a.txt': 100}))
+    live_updates = LiveUpdates(drop, 0.01, queue_size=1)
+    subscriber = live_updates.subscribe('d1')
+
+    for percent in (90, 80, 70):
+        change(drop, make_index({'a.txt': percent}))
+    live_updates.unsubscribe('d1', subscriber)
+
+    event_id, name, data = subscriber.get_nowait()
+    assert name == 'reset'
+    assert subscriber.empty()
+
+
+def test_stream_limit():
+    streams = StreamLimit()
+    assert streams.acquire(2)
+    assert streams.acquire(2)
+    assert not streams.acquire(2)
+
+    streams.release()
+    assert streams.acquire(2)
+    assert streams.acquire(None)
+    assert streams.stats() == {'open': 3, 'refused': 1}
+
+
+def test_stream_refused_beyond_the_limit(monkeypatch):
+    monkeypatch.setitem(app.config, 'LIVE_MAX_STREAMS', 0)
+
+    response = app.test_client().get('/drop/d1/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(
+        app.config['LIVE_BUSY_RETRY'],
+    )
+
+
+def test_live_stream_limit_follows_the_threads(monkeypatch):
+    monkeypatch.setitem(app.config, 'LIVE_MAX_STREAMS', None)
+
+    def args(threads, live_streams=None):
+        return types.SimpleNamespace(
+            threads=threads, live_streams=live_streams,
+        )
+
+    assert live_stream_limit(args(8)) == 6
+    assert live_stream_limit(args(2)) == 1
+    assert live_stream_limit(args(8, live_streams=20)) == 20
+
+    monkeypatch.setitem(app.config, 'LIVE_MAX_STREAMS', 4)
+    assert live_stream_limit(args(8)) == 4
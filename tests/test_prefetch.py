@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from syncr_frontend.prefetch import Prefetcher
+
+
+def make_prefetcher(fetch=None, invalidations=None):
+    invalidations = {} if invalidations is None else invalidations
+    return Prefetcher(
+        fetch or (lambda drop_id: 'state of ' + drop_id),
+        lambda previous, current: previous != current,
+        lambda: ['drop'],
+        invalidations.get,
+        workers=1,
+        min_interval=0.05,
+        max_interval=0.2,
+        recent=60,
+    )
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_invalidation_by_another_worker():
+    invalidations = {}
+    prefetcher = make_prefetcher(invalidations=invalidations)
+    prefetcher.touch('drop')
+    prefetcher.stop()
+    prefetcher.put('drop', 'old')
+    assert prefetcher.get('drop')[0] == 'old'
+
+    invalidations['drop'] = time.time()
+    assert prefetcher.get('drop') is None
+
+    prefetcher.put('drop', 'new')
+    assert prefetcher.get('drop')[0] == 'new'
+    assert prefetcher.stats()['misses'] == 1
+
+
+def test_pin_waits_for_start(monkeypatch):
+    monkeypatch.setattr('syncr_frontend.prefetch.TICK', 0.01)
+    prefetcher = make_prefetcher()
+    prefetcher.pin('drop')
+
+    time.sleep(0.1)
+    assert prefetcher.stats()['refreshes'] == 0
+
+    prefetcher.start()
+    assert wait_for(lambda: prefetcher.get('drop') is not None)
+    prefetcher.stop()
+
+
+def test_start_again_after_fork(monkeypatch):
+    monkeypatch.setattr('syncr_frontend.prefetch.TICK', 0.01)
+    parent = os.getpid()
+    release = threading.Event()
+
+    def fetch(drop_id):
+        # Holds the parent refresh, which the child never sees finish
+        if os.getpid() == parent:
+            release.wait()
+        return 'state'
+
+    prefetcher = make_prefetcher(fetch)
+    prefetcher.pin('drop')
+    prefetcher.start()
+    assert wait_for(lambda: prefetcher._entries['drop']['running'])
+
+    def refresh_in_child():
+        prefetcher.start()
+        assert wait_for(lambda: prefetcher.get('drop') is not None)
+
+    child = multiprocessing.get_context('fork').Process(
+        target=refresh_in_child,
+    )
+    child.start()
+    child.join()
+    prefetcher.stop()
+    release.set()
+
+    assert child.exitcode == 0
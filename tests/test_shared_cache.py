@@ -0,0 +1,93 @@
+import multiprocessing
+import sqlite3
+
+from syncr_frontend.shared_cache import PURGE_INTERVAL
+from syncr_frontend.shared_cache import SharedCache
+
+
+def test_get_set_and_expiry(tmpdir, monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.shared_cache.time.time', clock)
+    cache = SharedCache(str(tmpdir), 'drops', 10)
+
+    cache.set('key', {'name': 'Drop', 'files': [1, 2]})
+    assert cache.get('key') == {'name': 'Drop', 'files': [1, 2]}
+    clock.now += 10
+    assert cache.get('key', 'default') == 'default'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 0, 'ttl': 10}
+
+
+def test_namespaces_are_separate(tmpdir):
+    drops = SharedCache(str(tmpdir), 'drops', 10)
+    lists = SharedCache(str(tmpdir), 'lists', 10)
+
+    drops.set('key', 'drop')
+    lists.set('key', 'list')
+    assert drops.get('key') == 'drop'
+    assert lists.get('key') == 'list'
+
+    drops.invalidate()
+    assert drops.get('key') is None
+    assert lists.get('key') == 'list'
+    assert lists.stats()['size'] == 1
+
+
+def test_invalidate_one_key(tmpdir):
+    cache = SharedCache(str(tmpdir), 'drops', 10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    cache.invalidate('a')
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+
+def test_zero_ttl_disables_the_cache(tmpdir):
+    cache = SharedCache(str(tmpdir), 'drops', 0)
+
+    cache.set('key', 'value')
+    assert cache.get('key') is None
+
+
+def _set_in_child(directory):
+    SharedCache(directory, 'drops', 10).set('key', 'from child')
+
+
+def test_entries_are_shared_between_processes(tmpdir):
+    cache = SharedCache(str(tmpdir), 'drops', 10)
+    # Opens the connection before forking, the child must reopen it
+    assert cache.get('key') is None
+
+    child = multiprocessing.Process(target=_set_in_child, args=(str(tmpdir),))
+    child.start()
+    child.join()
+
+    assert child.exitcode == 0
+    assert cache.get('key') == 'from child'
+
+
+def test_expired_entries_are_deleted(tmpdir, monkeypatch, clock):
+    monkeypatch.setattr('syncr_frontend.shared_cache.time.time', clock)
+    monkeypatch.setattr('syncr_frontend.shared_cache.time.monotonic', clock)
+    drops = SharedCache(str(tmpdir), 'drops', 10)
+    jobs = SharedCache(str(tmpdir), 'jobs', 100)
+
+    def rows():
+        db = sqlite3.connect(drops.path)
+        try:
+            return db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        finally:
+            db.close()
+
+    drops.set('old', 1)
+    jobs.set('job', 2)
+    clock.now += 30
+    drops.set('new', 3)
+    # Not before PURGE_INTERVAL
+    assert rows() == 3
+
+    clock.now += PURGE_INTERVAL
+    jobs.add('other', 4)
+    # The expired entries of the drops namespace are gone as well
+    assert rows() == 2
+    assert jobs.get('job') == 2
+    assert jobs.get('other') == 4
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from syncr_frontend.singleflight import SingleFlight
+
+
+def test_sequential_calls_each_run():
+    flight = SingleFlight()
+
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.stats() == {'executed': 2, 'coalesced': 0, 'in_flight': 0}
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'value': 42}
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(flight.do('key', slow)),
+    )
+    leader.start()
+    started.wait(5)
+
+    followers = [
+        threading.Thread(
+            target=lambda: results.append(flight.do('key', slow)),
+        )
+        for _ in range(5)
+    ]
+    for follower in followers:
+        follower.start()
+    while flight.stats()['coalesced'] < 5:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 6
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'executed': 1, 'coalesced': 5, 'in_flight': 0}
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+
+    inner = flight.do('outer', lambda: flight.do('inner', lambda: 'done'))
+    assert inner == 'done'
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError('backend down')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.stats()['coalesced'] < 1:
+        pass
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    with pytest.raises(ValueError):
+        flight.do('key', failing)
+    assert flight.do('key', lambda: 'recovered') == 'recovered'